@@ -0,0 +1,160 @@
+"""
+SQL aggregation shared by the dashboard, the CSV report and the weekly budget engine.
+
+Each aggregate comes as a statement builder returning (sql, params), so callers can
+send several in one DbWrapper.fetchall_batch round-trip, and a parser that turns
+the fetched rows into a small typed result.
+"""
+import calendar
+from typing import NamedTuple
+
+from schedules import occurrence_total_sql
+
+
+class MonthTotals(NamedTuple):
+    total_income: float
+    total_expenses: float
+    total_emi: float
+    total_budget: float
+    expense_count: int
+
+    @property
+    def remaining_budget(self):
+        return self.total_budget - self.total_expenses
+
+    @property
+    def net_savings(self):
+        return self.total_income - (self.total_expenses + self.total_emi)
+
+
+class CategoryTotal(NamedTuple):
+    category: str
+    total: float
+    count: int
+
+
+def month_date_range(month):
+    """First and last date ('YYYY-MM-DD') of a 'YYYY-MM' month."""
+    year, month_number = map(int, month.split('-'))
+    last_day = calendar.monthrange(year, month_number)[1]
+    return f'{month}-01', f'{month}-{last_day:02d}'
+
+
+def _expense_month_filter(user_id, month, by_date):
+    # Expenses carry the month they were entered under, which may differ from the
+    # month of their date. by_date selects on the date instead, as the report does.
+    if by_date:
+        return 'user_id = ? AND date BETWEEN ? AND ?', (user_id, *month_date_range(month))
+    return 'month = ? AND user_id = ?', (month, user_id)
+
+
+def month_totals_statement(user_id, month, expenses_by_date=False):
+    expense_filter, expense_params = _expense_month_filter(user_id, month, expenses_by_date)
+    # Income and EMI totals include the month's occurrences of recurring schedules.
+    recurring_income_sql, recurring_income_params = occurrence_total_sql(user_id, 'income', month)
+    recurring_emi_sql, recurring_emi_params = occurrence_total_sql(user_id, 'emi', month)
+    return (f'''
+        SELECT i.total_income, e.total_expenses, e.expense_count, m.total_emi, b.total_budget
+        FROM (SELECT COALESCE(SUM(amount), 0) + {recurring_income_sql} as total_income
+              FROM income WHERE month = ? AND user_id = ?) i,
+             (SELECT COALESCE(SUM(amount), 0) as total_expenses, COUNT(*) as expense_count
+              FROM expenses WHERE {expense_filter}) e,
+             (SELECT COALESCE(SUM(emi_amount), 0) + {recurring_emi_sql} as total_emi
+              FROM emis WHERE month = ? AND user_id = ?) m,
+             (SELECT COALESCE(SUM(amount), 0) as total_budget FROM budgets WHERE month = ? AND user_id = ?) b
+    ''', (*recurring_income_params, month, user_id, *expense_params,
+          *recurring_emi_params, month, user_id, month, user_id))
+
+
+def month_totals_from_rows(rows):
+    row = rows[0]
+    return MonthTotals(
+        total_income=row['total_income'],
+        total_expenses=row['total_expenses'],
+        total_emi=row['total_emi'],
+        total_budget=row['total_budget'],
+        expense_count=row['expense_count'],
+    )
+
+
+def category_totals_statement(user_id, month, expenses_by_date=False):
+    expense_filter, expense_params = _expense_month_filter(user_id, month, expenses_by_date)
+    return (f'''
+        SELECT category, COALESCE(SUM(amount), 0) as total, COUNT(*) as count
+        FROM expenses WHERE {expense_filter}
+        GROUP BY category
+        ORDER BY category
+    ''', expense_params)
+
+
+def category_totals_from_rows(rows):
+    return [CategoryTotal(row['category'], row['total'], row['count']) for row in rows]
+
+
+class MonthlyCategoryTotal(NamedTuple):
+    month: str
+    category: str
+    total: float
+    count: int
+
+
+def monthly_category_totals_statement(user_id, start_month, end_month):
+    """Spend per (month, category) for a range of months, with expenses counted by their date."""
+    return ('''
+        SELECT strftime('%Y-%m', date) as month, category, COALESCE(SUM(amount), 0) as total, COUNT(*) as count
+        FROM expenses WHERE user_id = ? AND date BETWEEN ? AND ?
+        GROUP BY month, category
+        ORDER BY month, category
+    ''', (user_id, month_date_range(start_month)[0], month_date_range(end_month)[1]))
+
+
+def monthly_category_totals_from_rows(rows):
+    return [MonthlyCategoryTotal(row['month'], row['category'], row['total'], row['count']) for row in rows]
+
+
+def payment_type_totals_statement(user_id, month):
+    return ('''
+        SELECT payment_type, COALESCE(SUM(amount), 0) as total
+        FROM expenses WHERE month = ? AND user_id = ?
+        GROUP BY payment_type
+    ''', (month, user_id))
+
+
+def normalize_payment_type(payment_type):
+    # Title-case so 'CASH', 'cash' and 'Cash' are reported as one method.
+    raw = str(payment_type or 'Unknown').strip() or 'Unknown'
+    return raw[0].upper() + raw[1:].lower()
+
+
+def payment_type_totals_from_rows(rows):
+    totals = {}
+    for row in rows:
+        method = normalize_payment_type(row['payment_type'])
+        totals[method] = totals.get(method, 0) + row['total']
+    return totals
+
+
+def weekly_spent_statement(user_id, cycle_start, cycle_end, selected_categories=None):
+    """Spend per whole week since cycle_start, optionally limited to some categories."""
+    selected_categories = selected_categories or []
+    category_filter = ''
+    if selected_categories:
+        placeholders = ','.join('?' for _ in selected_categories)
+        category_filter = f' AND category IN ({placeholders})'
+    return (f'''
+        SELECT CAST((julianday(date) - julianday(?)) / 7 AS INTEGER) as week_offset,
+               COALESCE(SUM(amount), 0) as total
+        FROM expenses
+        WHERE user_id = ? AND date BETWEEN ? AND ?{category_filter}
+        GROUP BY week_offset
+    ''', (cycle_start, user_id, cycle_start, cycle_end, *selected_categories))
+
+
+def weekly_spent_from_rows(rows, week_count):
+    """Spend per week as a list of week_count floats, zero for weeks without expenses."""
+    totals = [0.0] * week_count
+    for row in rows:
+        week_offset = row['week_offset']
+        if week_offset is not None and 0 <= week_offset < week_count:
+            totals[week_offset] = row['total']
+    return totals
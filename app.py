@@ -1,19 +1,53 @@
 import os
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-import bcrypt
+import click
 import sqlite3
 import logging
+import atexit
+import threading
+import time
 import libsql_client
 
-from flask import Flask, render_template, request, redirect, url_for, session, g, send_file, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, g, send_file, flash, jsonify, Response, stream_with_context, has_request_context
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta # Added for month iteration
 import io
 import csv
 import re
 import json
+import hashlib
+import hmac
+import base64
+import tempfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import lru_cache
+
+from aggregation import (
+    category_totals_from_rows, category_totals_statement, month_totals_from_rows,
+    month_totals_statement, monthly_category_totals_statement, payment_type_totals_from_rows,
+    payment_type_totals_statement, weekly_spent_from_rows, weekly_spent_statement,
+)
+from exports import build_export, ledger_chunk_statement
+from pdf_reports import ReportJobStore, report_data_version
+from rollover import ROLLOVER_TABLES, month_pairs, previous_month_pair, run_rollover
+from schedules import (
+    FREQUENCIES, MONTH_PATTERN, SCHEDULE_KINDS, describe_schedule, month_rows_statement, occurrence_filter,
+    schedule_fields,
+)
+from instrumentation import RequestMetrics
+from simulated_libsql import LatencyProfile, SimulatedLibsqlClient
+from passwords import LoginRateLimiter, PasswordHasher, PasswordHasherBusy, measure_cost
+from replica import ReadReplica, drop_replication_log_statements, replication_log_statements, replicated_tables_statement
+from expense_import import ImportAborted, ImportFileError, PARSERS, detect_format, duplicate_lookup_statement, import_expenses
 
 app = Flask(__name__)
+# Behind a reverse proxy (Render), the client address used for login rate limiting
+# comes from X-Forwarded-For; TRUSTED_PROXIES is the number of proxies in front of the app.
+if int(os.environ.get('TRUSTED_PROXIES', 0)):
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=int(os.environ['TRUSTED_PROXIES']))
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -26,16 +60,56 @@ class User(UserMixin):
         self.password_hash = password_hash
 
 
+# The users table schema only changes through migrations, so its identifier
+# column is resolved once per process and reset by apply_schema_compat_migrations.
+_user_identifier_column = None
+
+
 def get_user_identifier_column(db):
-    user_columns_rs = db.execute('PRAGMA table_info(users)')
-    user_columns = {row['name'] for row in db.fetchall(user_columns_rs)}
-    if 'username' in user_columns:
-        return 'username'
-    return 'email'
+    global _user_identifier_column
+    if _user_identifier_column is None:
+        user_columns_rs = db.execute('PRAGMA table_info(users)')
+        user_columns = {row['name'] for row in db.fetchall(user_columns_rs)}
+        _user_identifier_column = 'username' if 'username' in user_columns else 'email'
+    return _user_identifier_column
+
+
+def reset_schema_cache():
+    global _user_identifier_column
+    _user_identifier_column = None
+
+
+# Short-lived per-process cache of user rows so load_user doesn't hit the
+# database on every authenticated request. Entries are dropped on logout and
+# must be dropped with invalidate_cached_user whenever a user row changes.
+# That only reaches the worker process handling the change: in every other
+# worker a deleted or changed user row stays valid for up to USER_CACHE_TTL
+# seconds (0 turns the cache off).
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 60))
+_user_cache = None
+
+
+def _get_user_cache():
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = MemoryCacheStore(max_entries=1024)
+    return _user_cache
+
+
+def invalidate_cached_user(user_id):
+    _get_user_cache().bump_versions([str(user_id)])
+
 
 # User loader for Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
+    user_cache = _get_user_cache()
+    cache_key = str(user_id)
+    version = user_cache.get_version(cache_key)
+    entry = user_cache.get(cache_key)
+    if entry is not None and entry[0] == version:
+        return User(*entry[1])
+
     db = get_db()
     identifier_column = get_user_identifier_column(db)
     user_rs = db.execute(
@@ -44,7 +118,10 @@ def load_user(user_id):
     )
     user = db.fetchone(user_rs)
     if user:
-        return User(user['id'], user['username'], user['password_hash'])
+        user_fields = (user['id'], user['username'], user['password_hash'])
+        if USER_CACHE_TTL > 0:
+            user_cache.set(cache_key, version, user_fields, USER_CACHE_TTL)
+        return User(*user_fields)
     return None
 # Use an environment variable for the secret key in production, with a fallback for local dev
 app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'a_default_fallback_key_for_development')
@@ -88,23 +165,8 @@ DEFAULT_CATEGORY_OPTIONS = [
 
 def get_user_category_options(user_id, active_month=None):
     db = get_db()
-    if active_month:
-        category_rs = db.execute(
-            'SELECT DISTINCT category FROM budgets WHERE user_id = ? AND month = ? ORDER BY category',
-            (user_id, active_month)
-        )
-    else:
-        category_rs = db.execute(
-            'SELECT DISTINCT category FROM budgets WHERE user_id = ? ORDER BY category',
-            (user_id,)
-        )
-
-    db_categories = {
-        (row['category'] or '').strip()
-        for row in db.fetchall(category_rs)
-        if (row['category'] or '').strip()
-    }
-    return sorted(db_categories)
+    category_rs = db.execute(*category_options_statement(user_id, active_month))
+    return category_options_from_rows(db.fetchall(category_rs))
 
 def validate_password(password):
     """Validate password strength. Returns (is_valid, message)"""
@@ -119,15 +181,85 @@ def validate_password(password):
     return True, 'Password is strong.'
 
 
+# --- Passwords and Login Rate Limiting ---
+password_hasher = PasswordHasher(
+    rounds=int(os.environ.get('BCRYPT_ROUNDS', 12)),
+    max_workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+    max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 8)),
+)
+LOGIN_ATTEMPTS_PER_IP = int(os.environ.get('LOGIN_ATTEMPTS_PER_IP', 30))
+LOGIN_FAILURES_PER_USERNAME = int(os.environ.get('LOGIN_FAILURES_PER_USERNAME', 10))
+REGISTRATIONS_PER_IP = int(os.environ.get('REGISTRATIONS_PER_IP', 10))
+
+_login_rate_limiter = None
+_login_rate_limiter_lock = threading.Lock()
+
+
+def get_login_rate_limiter():
+    global _login_rate_limiter
+    if _login_rate_limiter is None:
+        with _login_rate_limiter_lock:
+            if _login_rate_limiter is None:
+                _login_rate_limiter = LoginRateLimiter(
+                    os.environ.get('RATE_LIMIT_PATH') or host_cache_path('ratelimit') + '.db',
+                    window_seconds=float(os.environ.get('LOGIN_RATE_LIMIT_WINDOW', 900)),
+                )
+    return _login_rate_limiter
+
+
+def rate_limit(action, key, limit, count=True):
+    """Seconds the caller must wait before trying again (0 when allowed). Fails open if the store is unavailable."""
+    limiter = get_login_rate_limiter()
+    try:
+        return limiter.hit(key, limit) if count else limiter.check(key, limit)
+    except Exception as error:
+        limiter.record_error()
+        app.logger.warning(f"Rate limit check for {action} failed, allowing the request: {error}")
+        return 0
+
+
+def reset_rate_limit(key):
+    try:
+        get_login_rate_limiter().reset(key)
+    except Exception as error:
+        app.logger.warning(f"Could not reset rate limit {key}: {error}")
+
+
+def too_many_attempts(template, retry_after, message):
+    flash(message, 'error')
+    response = app.make_response((render_template(template), 429))
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+
+def password_service_busy(template):
+    flash('The server is busy. Please try again in a moment.', 'error')
+    response = app.make_response((render_template(template), 503))
+    response.headers['Retry-After'] = '1'
+    return response
+
+
 def hash_password(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return password_hasher.hash(password)
 
 
 def verify_password(password, stored_hash):
-    if stored_hash is None:
-        return False
-    hash_bytes = stored_hash.encode('utf-8') if isinstance(stored_hash, str) else stored_hash
-    return bcrypt.checkpw(password.encode('utf-8'), hash_bytes)
+    return password_hasher.verify(password, stored_hash)
+
+
+@app.cli.command('measure-password-cost')
+@click.option('--target-ms', default=250, show_default=True, help='Longest acceptable time for one hash.')
+def measure_password_cost_command(target_ms):
+    """Time bcrypt at each cost on this machine and suggest BCRYPT_ROUNDS."""
+    suggested = 10
+    for rounds in range(10, 15):
+        milliseconds = measure_cost(rounds) * 1000
+        click.echo(f'rounds {rounds}: {milliseconds:.0f}ms')
+        if milliseconds <= target_ms:
+            suggested = rounds
+    click.echo(f'Suggested BCRYPT_ROUNDS for {target_ms}ms: {suggested} (configured: {password_hasher.rounds})')
+
+# --- End Passwords and Login Rate Limiting ---
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -152,13 +284,23 @@ def register():
             flash(message, 'error')
             return redirect(url_for('register'))
 
+        retry_after = rate_limit('register', f'register:{request.remote_addr}', REGISTRATIONS_PER_IP)
+        if retry_after:
+            return too_many_attempts('register.html', retry_after,
+                                     'Too many accounts created from this address. Please try again later.')
+
         db = get_db()
         identifier_column = get_user_identifier_column(db)
         user_rs = db.execute(f'SELECT * FROM users WHERE {identifier_column} = ?', (username,))
         if db.fetchone(user_rs):
             flash('That username is already taken.', 'error')
             return redirect(url_for('register'))
-        password_hash = hash_password(password)
+        release_db()  # Not held while the hash is computed
+        try:
+            password_hash = hash_password(password)
+        except PasswordHasherBusy:
+            return password_service_busy('register.html')
+        db = get_db()
         db.execute(f'INSERT INTO users ({identifier_column}, password_hash, created_at) VALUES (?, ?, ?)',
                    (username, password_hash, datetime.now().isoformat()))
         db.commit()
@@ -175,6 +317,18 @@ def login():
         username = request.form.get('username', '').strip()
         password = request.form['password']
         remember_me = request.form.get('remember') == 'on'
+        # Turned away before any hashing: too many attempts from this address,
+        # or too many recent failures for this username.
+        username_key = f'login-failures:{username.lower()}'
+        retry_after = (
+            rate_limit('login', f'login:{request.remote_addr}', LOGIN_ATTEMPTS_PER_IP)
+            or rate_limit('login', username_key, LOGIN_FAILURES_PER_USERNAME, count=False)
+        )
+        if retry_after:
+            minutes = max(1, round(retry_after / 60))
+            return too_many_attempts('login.html', retry_after,
+                                     f'Too many login attempts. Please try again in {minutes} minute(s).')
+
         db = get_db()
         identifier_column = get_user_identifier_column(db)
         user_rs = db.execute(
@@ -182,13 +336,35 @@ def login():
             (username,)
         )
         user = db.fetchone(user_rs)
-        if user and verify_password(password, user['password_hash']):
+        # A pooled connection must not sit idle for the length of a bcrypt check.
+        release_db()
+        try:
+            if user:
+                authenticated = verify_password(password, user['password_hash'])
+            else:
+                authenticated = password_hasher.verify_dummy(password)
+            if authenticated and password_hasher.needs_rehash(user['password_hash']):
+                # BCRYPT_ROUNDS changed since this hash was made; upgrade it while the password is at hand.
+                password_hash = password_hasher.rehash(password)
+                db = get_db()
+                db.execute('UPDATE users SET password_hash = ? WHERE id = ?', (password_hash, user['id']))
+                db.commit()
+                invalidate_cached_user(user['id'])
+                user = dict(user, password_hash=password_hash)
+        except PasswordHasherBusy:
+            return password_service_busy('login.html')
+
+        if authenticated:
+            reset_rate_limit(username_key)
             user_obj = User(user['id'], user['username'], user['password_hash'])
             login_user(user_obj, remember=remember_me)
             session.permanent = remember_me
+            if READ_REPLICA_ENABLED:
+                note_session_write()  # the account may be newer than this worker's replica
             flash('Logged in successfully.', 'success')
             return redirect(url_for('index'))
         else:
+            rate_limit('login', username_key, LOGIN_FAILURES_PER_USERNAME)
             flash('Invalid username or password.', 'error')
             return redirect(url_for('login'))
     return render_template('login.html')
@@ -196,6 +372,7 @@ def login():
 @app.route('/logout')
 @login_required
 def logout():
+    invalidate_cached_user(current_user.id)
     logout_user()
     flash('Logged out successfully.', 'success')
     return redirect(url_for('login'))
@@ -213,15 +390,16 @@ def api_edit_income(income_id):
         return jsonify({'status': 'error', 'message': 'All fields are required!'}), 400
 
     try:
+        amount_value = float(amount)
         db = get_db()
+        previous_month = get_record_month(db, 'income', current_user.id, income_id)
         db.execute(
             'UPDATE income SET description = ?, amount = ?, month = ? WHERE id = ? AND user_id = ?',
-            (description, float(amount), month, income_id, current_user.id)
+            (description, amount_value, month, income_id, current_user.id)
         )
         db.commit()
-        message = 'Income updated successfully!'
-
-        return jsonify({'status': 'success', 'message': message})
+        invalidate_budget_data(current_user.id, [previous_month, month])
+        return mutation_response('Income updated successfully!', lists=['income'])
     except ValueError:
         return jsonify({'status': 'error', 'message': 'Invalid amount. Please use numbers only.'}), 400
     except Exception as e:
@@ -229,88 +407,232 @@ def api_edit_income(income_id):
         return jsonify({'status': 'error', 'message': 'An error occurred while updating the income.'}), 500
 
 # --- Database Abstraction ---
+# Distinct SQL texts kept prepared: the libSQL form of each statement is built
+# once, and every sqlite3 connection keeps this many compiled statements.
+STATEMENT_CACHE_SIZE = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 512))
+_LIBSQL_USER_ID = re.compile(r'\buser_id\b')
+_LIBSQL_NATIVE_TYPES = frozenset({str, int, float, bytes, type(None)})
+_READ_STATEMENT = re.compile(r'\s*(SELECT|WITH)\b', re.IGNORECASE)
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def prepare_libsql_sql(sql):
+    """SQL text as sent to libSQL, computed once per distinct statement."""
+    return _LIBSQL_USER_ID.sub('"user_id"', sql)
+
+
+def _bind_libsql_value(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()  # Stored as text, the way sqlite3 stores them
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def bind_libsql_params(params):
+    """Parameters as a list libSQL can bind; values are never inlined into the SQL."""
+    if all(type(value) in _LIBSQL_NATIVE_TYPES for value in params):
+        return list(params)
+    return [_bind_libsql_value(value) for value in params]
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def is_read_statement(sql):
+    return _READ_STATEMENT.match(sql) is not None
+
+
 # This wrapper provides a unified interface for both SQLite and Turso (libSQL).
 class DbWrapper:
-    def __init__(self, conn, is_libsql):
+    def __init__(self, conn, is_libsql, pool=None, metrics=None, replica=None, read_after=0.0, on_write=None):
         self._conn = conn
         self._is_libsql = is_libsql
-
-    def _quote_libsql_value(self, value):
-        if value is None:
-            return 'NULL'
-        if isinstance(value, bool):
-            return '1' if value else '0'
-        if isinstance(value, (int, float)):
-            return str(value)
-        text = str(value).replace("'", "''")
-        return f"'{text}'"
-
-    def _inline_libsql_params(self, sql, params):
-        if not params:
-            return sql
-        rendered_sql = sql
-        for value in params:
-            replacement = self._quote_libsql_value(value)
-            rendered_sql = rendered_sql.replace('?', replacement, 1)
-        return rendered_sql
-
-    def _normalize_libsql_sql(self, sql):
-        return re.sub(r'\buser_id\b', '"user_id"', sql)
+        self._pool = pool
+        self._metrics = metrics
+        self._last_statement = None
+        # Reads may be answered by a local ReadReplica while it has synced past
+        # read_after; after this wrapper's first write every read goes to the primary.
+        self._replica = replica
+        self._read_after = read_after
+        self._on_write = on_write
+        self._wrote = False
+        self._uncommitted_write = False
+        # Oldest replica sync any read of this wrapper was answered from (None: all reads were from the primary).
+        self.replica_synced_at = None
+        # Number of statements / batches sent to the database through this wrapper.
+        self.round_trips = 0
+        # Time spent in, and rows read from, the database through this wrapper.
+        self.query_seconds = 0.0
+        self.rows_returned = 0
+
+    def _observe(self, operation, sqls, started, rows=0):
+        seconds = time.perf_counter() - started
+        self.query_seconds += seconds
+        self.rows_returned += rows
+        if self._metrics is not None:
+            self._last_statement = self._metrics.statement_key(sqls)
+            self._metrics.observe_query(operation, self._last_statement, seconds, rows)
+
+    def _observe_fetch(self, started, rows):
+        # sqlite3 cursors step through their rows while being fetched, so that time counts as query time too.
+        self.query_seconds += time.perf_counter() - started
+        self.rows_returned += rows
+        if self._metrics is not None and self._last_statement is not None:
+            self._metrics.observe_rows(self._last_statement, rows)
+
+    def _use_replica(self):
+        if self._replica is None or self._wrote or not self._replica.can_serve(self._read_after):
+            return False
+        synced_at = self._replica.synced_at
+        if self.replica_synced_at is None or synced_at < self.replica_synced_at:
+            self.replica_synced_at = synced_at
+        return True
+
+    def read_from_primary(self):
+        """Sends this wrapper's remaining reads to the primary, e.g. before reads that decide what to write."""
+        self._wrote = True
+
+    def consistent_since(self, moment):
+        """True if every read so far saw all writes committed before `moment` (wall time)."""
+        return self.replica_synced_at is None or self.replica_synced_at >= moment
+
+    def _written(self):
+        self._uncommitted_write = False
+        if self._on_write is not None:
+            self._on_write()
 
     def execute(self, sql, params=()):
         """Executes a query. For non-SELECT queries, it returns None.
            For SELECT queries, it returns an object that can be passed to fetch methods."""
+        is_read = is_read_statement(sql)
+        if is_read and self._use_replica():
+            started = time.perf_counter()
+            cursor = self._replica.connection().execute(sql, params)
+            self._observe('replica', [sql], started)
+            return cursor
+        if not is_read:
+            self._wrote = True
+
+        self.round_trips += 1
+        started = time.perf_counter()
         if self._is_libsql:
-            normalized_sql = self._normalize_libsql_sql(sql)
-            if not params:
-                return self._conn.execute(normalized_sql)
-            try:
-                return self._conn.execute(normalized_sql, params)
-            except Exception as error:
-                app.logger.warning(f"libSQL parameter binding failed, using inlined SQL. Error: {error}")
-                rendered_sql = self._inline_libsql_params(normalized_sql, params)
-                return self._conn.execute(rendered_sql)
+            result_set = self._conn.execute(prepare_libsql_sql(sql), bind_libsql_params(params) if params else None)
+            # A libSQL result set arrives complete, so its rows are counted here rather than when fetched.
+            self._observe('execute', [sql], started, len(result_set.rows))
+            if not is_read:
+                self._written()  # libSQL commits every statement on its own
+            return result_set
         else:
             cursor = self._conn.cursor()
             cursor.execute(sql, params)
+            self._observe('execute', [sql], started)
+            if not is_read:
+                self._uncommitted_write = True
             return cursor
 
+    @staticmethod
+    def _split_statement(statement):
+        if isinstance(statement, tuple):  # query with params
+            return statement[0], tuple(statement[1] or ())
+        return statement, ()
+
     def execute_batch(self, sqls):
-        """Executes multiple SQL statements in a batch."""
+        """Executes multiple SQL statements atomically in a single round-trip.
+
+        Returns one result per statement (a ResultSet for Turso, a cursor for
+        SQLite). If any statement fails, none of them are applied.
+        """
+        statements = [self._split_statement(sql) for sql in sqls]
+        if not statements:
+            return []
+        self._wrote = True
+
         if self._is_libsql:
-            for i, sql in enumerate(sqls):
-                try:
-                    if isinstance(sql, tuple):
-                        self.execute(sql[0], sql[1])
-                    else:
-                        self.execute(sql)
-                except Exception as e:
-                    app.logger.error(f"Batch execution failed at index {i}: {e}", exc_info=True)
-                    raise
-        else:
-            # For sqlite3, execute them one by one
-            cursor = self._conn.cursor()
-            for sql in sqls:
-                if isinstance(sql, tuple): # query with params
-                    cursor.execute(sql[0], sql[1])
+            # libsql_client wraps a batch in BEGIN/COMMIT and sends it as one
+            # request, rolling the whole batch back if any statement fails.
+            self.round_trips += 1
+            started = time.perf_counter()
+            try:
+                results = self._conn.batch([
+                    (prepare_libsql_sql(sql), bind_libsql_params(params)) for sql, params in statements
+                ])
+            except Exception as e:
+                app.logger.error(f"Batch execution failed: {e}", exc_info=True)
+                raise
+            self._observe('batch', [sql for sql, _ in statements], started)
+            self._written()
+            return results
+
+        # For sqlite3, run consecutive statements sharing the same SQL text
+        # through executemany, all inside one transaction.
+        results = []
+        started = time.perf_counter()
+        try:
+            index = 0
+            while index < len(statements):
+                sql, params = statements[index]
+                group_end = index + 1
+                while group_end < len(statements) and statements[group_end][0] == sql:
+                    group_end += 1
+
+                cursor = self._conn.cursor()
+                if group_end - index > 1:
+                    cursor.executemany(sql, [params for _, params in statements[index:group_end]])
                 else:
-                    cursor.execute(sql)
+                    cursor.execute(sql, params)
+                self.round_trips += 1
+                results.extend([cursor] * (group_end - index))
+                index = group_end
             self._conn.commit()
+        except Exception as e:
+            self._conn.rollback()
+            app.logger.error(f"Batch execution failed: {e}", exc_info=True)
+            raise
+        self._observe('batch', [sql for sql, _ in statements], started)
+        self._written()
+        return results
+
+    def fetchall_batch(self, sqls):
+        """Runs several read queries in one round-trip and returns each one's rows as a list of dicts."""
+        statements = [self._split_statement(sql) for sql in sqls]
+        if self._use_replica():
+            conn = self._replica.connection()
+            started = time.perf_counter()
+            rows = [[dict(row) for row in conn.execute(sql, params).fetchall()] for sql, params in statements]
+            self._observe('replica', [sql for sql, _ in statements], started, sum(len(r) for r in rows))
+            return rows
+        if self._is_libsql:
+            self.round_trips += 1
+            started = time.perf_counter()
+            result_sets = self._conn.batch([
+                (prepare_libsql_sql(sql), bind_libsql_params(params)) for sql, params in statements
+            ])
+            rows = [self._rows(result_set) for result_set in result_sets]
+            self._observe('read_batch', [sql for sql, _ in statements], started, sum(len(r) for r in rows))
+            return rows
+        return [self.fetchall(self.execute(sql, params)) for sql, params in statements]
+
+    @staticmethod
+    def _rows(result_set):
+        columns = result_set.columns
+        return [dict(zip(columns, row)) for row in result_set.rows]
 
     def fetchall(self, result_set_or_cursor):
         """Fetches all rows from a result set or cursor and returns them as a list of dicts."""
-        if self._is_libsql:
+        if not isinstance(result_set_or_cursor, sqlite3.Cursor):
             # result_set_or_cursor is a ResultSet object from Turso
-            columns = result_set_or_cursor.columns
-            return [dict(zip(columns, row)) for row in result_set_or_cursor.rows]
+            return self._rows(result_set_or_cursor)
         else:
             # result_set_or_cursor is a standard sqlite3.Cursor
+            started = time.perf_counter()
             rows = result_set_or_cursor.fetchall()
+            self._observe_fetch(started, len(rows))
             return [dict(row) for row in rows]
 
     def fetchone(self, result_set_or_cursor):
         """Fetches one row and returns it as a dict."""
-        if self._is_libsql:
+        if not isinstance(result_set_or_cursor, sqlite3.Cursor):
             # result_set_or_cursor is a ResultSet object from Turso
             if result_set_or_cursor and result_set_or_cursor.rows:
                 columns = result_set_or_cursor.columns
@@ -318,17 +640,24 @@ class DbWrapper:
             return None
         else:
             # result_set_or_cursor is a standard sqlite3.Cursor
+            started = time.perf_counter()
             row = result_set_or_cursor.fetchone()
+            self._observe_fetch(started, 1 if row else 0)
             return dict(row) if row else None
 
     def commit(self):
         """Commits a transaction. No-op for Turso as it auto-commits."""
         if not self._is_libsql:
             self._conn.commit()
+            if self._uncommitted_write:
+                self._written()
 
     def close(self):
-        """Closes the connection."""
-        self._conn.close()
+        """Returns the connection to its pool, or closes it when unpooled."""
+        if self._pool is not None:
+            self._pool.release(self._conn)
+        else:
+            self._conn.close()
 
 # --- End Database Abstraction ---
 
@@ -337,32 +666,421 @@ class DbWrapper:
 DATABASE = 'budget.db'
 
 
+# --- Connection Pool ---
+# Opening a Turso client costs a fresh HTTPS/TLS handshake, so every worker
+# process keeps a small pool of open connections and hands them out per request.
+class PoolTimeoutError(RuntimeError):
+    """Raised when no pooled connection becomes available in time."""
+
+
+class ConnectionPool:
+    """Bounded, fork-aware pool of raw SQLite / libSQL connections."""
+
+    def __init__(self, factory, is_libsql, max_size=4, acquire_timeout=10.0,
+                 idle_timeout=300.0, health_check_interval=30.0, max_idle=None):
+        self._factory = factory
+        self.is_libsql = is_libsql
+        self.max_size = max(1, int(max_size))
+        # Connections kept open between requests; 0 closes each one on release,
+        # so every request opens its own, as before connections were pooled.
+        self.max_idle = self.max_size if max_idle is None else max(0, min(int(max_idle), self.max_size))
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._lock = threading.Condition()
+        self._idle = []  # (conn, last_used) pairs, most recently used last
+        self._in_use = 0
+        self._pid = os.getpid()
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'evicted_idle': 0,
+            'health_check_failures': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'fork_resets': 0,
+        }
+
+    def _check_fork(self):
+        # Connections (and libsql's background event loop thread) inherited
+        # from a parent process are unusable in a forked gunicorn worker, so
+        # drop them without closing and start from an empty pool.
+        if self._pid == os.getpid():
+            return
+        self._lock = threading.Condition()
+        self._idle = []
+        self._in_use = 0
+        self._pid = os.getpid()
+        self._stats['fork_resets'] += 1
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception as error:
+            app.logger.warning(f"Failed to close pooled connection: {error}")
+
+    def _pop_expired_locked(self):
+        if not self.idle_timeout:
+            return []
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = [conn for conn, last_used in self._idle if last_used < cutoff]
+        if expired:
+            self._idle = [(conn, last_used) for conn, last_used in self._idle if last_used >= cutoff]
+            self._stats['evicted_idle'] += len(expired)
+        return expired
+
+    def _is_healthy(self, conn, last_used):
+        if getattr(conn, 'closed', False):
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            conn.execute('SELECT 1')
+            return True
+        except Exception as error:
+            app.logger.warning(f"Pooled connection failed health check: {error}")
+            return False
+
+    def acquire(self):
+        """Checks out a connection, reusing an idle one when possible."""
+        self._check_fork()
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._lock:
+            expired = self._pop_expired_locked()
+            if not self._idle and self._in_use >= self.max_size:
+                self._stats['waits'] += 1
+            while not self._idle and self._in_use >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(f"No database connection available within {self.acquire_timeout}s")
+                self._lock.wait(remaining)
+            entry = self._idle.pop() if self._idle else None
+            self._in_use += 1
+            self._stats['checkouts'] += 1
+
+        for conn in expired:
+            self._close_quietly(conn)
+
+        try:
+            if entry is not None:
+                conn, last_used = entry
+                if self._is_healthy(conn, last_used):
+                    with self._lock:
+                        self._stats['reused'] += 1
+                    return conn
+                with self._lock:
+                    self._stats['health_check_failures'] += 1
+                self._close_quietly(conn)
+            conn = self._factory()
+            with self._lock:
+                self._stats['created'] += 1
+            return conn
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+
+    def release(self, conn, discard=False):
+        """Returns a connection to the pool, or closes it when discarded."""
+        if self._pid != os.getpid():
+            return
+        if not discard and not self.is_libsql:
+            try:
+                # Never hand a half-finished transaction to the next request.
+                if conn.in_transaction:
+                    conn.rollback()
+            except Exception as error:
+                app.logger.warning(f"Discarding pooled connection after failed rollback: {error}")
+                discard = True
+
+        with self._lock:
+            self._in_use = max(0, self._in_use - 1)
+            keep = not discard and len(self._idle) < self.max_idle
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._stats['discarded'] += 1
+            self._lock.notify()
+
+        if not keep:
+            self._close_quietly(conn)
+
+    def close_all(self):
+        """Closes every idle connection; checked-out connections are closed on release."""
+        self._check_fork()
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._stats)
+            metrics.update({
+                'max_size': self.max_size,
+                'max_idle': self.max_idle,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'pid': self._pid,
+            })
+        return metrics
+
+
+_connection_pool = None
+_connection_pool_lock = threading.Lock()
+# Set when SIMULATED_DB_LATENCY_MS selects the simulated remote backend.
+_simulated_latency = None
+
+
+def _build_connection_pool():
+    global _simulated_latency
+    db_url = os.environ.get("TURSO_DATABASE_URL")
+    auth_token = os.environ.get("TURSO_AUTH_TOKEN")
+    simulated_latency_ms = os.environ.get("SIMULATED_DB_LATENCY_MS")
+
+    if db_url and auth_token:
+        # Production: Connect to Turso (libSQL cloud DB)
+        https_url = db_url.replace("libsql://", "https://")
+
+        def factory():
+            return _on_daemon_thread(lambda: libsql_client.create_client_sync(url=https_url, auth_token=auth_token))
+
+        is_libsql = True
+        app.logger.info("Database backend: Turso (libSQL)")
+        if simulated_latency_ms:
+            app.logger.warning("SIMULATED_DB_LATENCY_MS is ignored when TURSO_DATABASE_URL is set.")
+    elif simulated_latency_ms:
+        # Local development against budget.db as if it were a remote libSQL database.
+        profile = _simulated_latency = LatencyProfile(
+            float(simulated_latency_ms) / 1000,
+            float(os.environ.get("SIMULATED_DB_JITTER_MS", 0)) / 1000,
+            connect_seconds=float(os.environ.get("SIMULATED_DB_CONNECT_MS", 0)) / 1000,
+        )
+
+        def factory():
+            return _on_daemon_thread(lambda: SimulatedLibsqlClient(DATABASE, profile))
+
+        is_libsql = True
+        app.logger.info(f"Database backend: simulated libSQL over {DATABASE} ({simulated_latency_ms}ms per round-trip)")
+    else:
+        # Local development: Connect to local SQLite file
+        app.logger.warning("TURSO_DATABASE_URL not set — falling back to local SQLite (budget.db). Do not use this in production.")
+
+        def factory():
+            # Pooled connections may be handed to a different request thread.
+            conn = sqlite3.connect(DATABASE, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+            conn.row_factory = sqlite3.Row
+            return conn
+
+        is_libsql = False
+        app.logger.info("Database backend: Local SQLite (budget.db)")
+
+    return ConnectionPool(
+        factory,
+        is_libsql,
+        max_size=int(os.environ.get('DB_POOL_SIZE', 4)),
+        acquire_timeout=float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        idle_timeout=float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300)),
+        health_check_interval=float(os.environ.get('DB_POOL_HEALTH_CHECK_INTERVAL', 30)),
+        max_idle=os.environ.get('DB_POOL_MAX_IDLE'),
+    )
+
+
+def get_connection_pool():
+    global _connection_pool
+    if _connection_pool is None:
+        with _connection_pool_lock:
+            if _connection_pool is None:
+                _connection_pool = _build_connection_pool()
+    return _connection_pool
+
+
+def simulated_latency_profile():
+    """The LatencyProfile of the simulated libSQL backend, or None when another backend is in use."""
+    get_connection_pool()
+    return _simulated_latency
+
+
+def _on_daemon_thread(create):
+    """
+    Returns create()'s result, called on a short-lived daemon thread. libsql's
+    sync client starts an event loop thread in its constructor, and threads
+    inherit their creator's daemon flag, so pooled clients made this way never
+    keep the process from exiting (e.g. build.sh's init_db() or a gunicorn
+    worker) and are still running when the atexit handler closes them.
+    """
+    result = {}
+
+    def run():
+        try:
+            result['value'] = create()
+        except BaseException as error:
+            result['error'] = error
+
+    thread = threading.Thread(target=run, name='libsql-connect', daemon=True)
+    thread.start()
+    thread.join()
+    if 'error' in result:
+        raise result['error']
+    return result['value']
+
+
+def _close_connection_pool():
+    if _connection_pool is not None:
+        _connection_pool.close_all()
+
+
+atexit.register(_close_connection_pool)
+
+# --- End Connection Pool ---
+
+
+# --- Read Replica ---
+# With READ_REPLICA=1 each worker keeps a local SQLite copy of the primary
+# (see replica.py) and GET requests read from it. A session that writes
+# remembers when, and its reads go back to the primary until the replica has
+# synced past that moment, so users always see their own changes.
+READ_REPLICA_ENABLED = os.environ.get('READ_REPLICA', '0') == '1'
+READ_REPLICA_SYNC_INTERVAL = float(os.environ.get('READ_REPLICA_SYNC_INTERVAL', 2))
+READ_REPLICA_MAX_STALENESS = float(os.environ.get('READ_REPLICA_MAX_STALENESS', 30))
+REPLICA_READ_AFTER_KEY = '_replica_read_after'
+_read_replica = None
+_read_replica_pid = None
+_read_replica_lock = threading.Lock()
+
+
+@contextmanager
+def primary_db():
+    """A DbWrapper on a pooled primary connection, for work outside a request."""
+    pool = get_connection_pool()
+    db = DbWrapper(pool.acquire(), is_libsql=pool.is_libsql, pool=pool)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def read_replica_path():
+    # One file per worker process: each replica is written by its own sync thread.
+    name = os.path.basename(host_cache_path('replica')) + f'-{os.getpid()}.db'
+    return os.path.join(os.environ.get('READ_REPLICA_DIR') or tempfile.gettempdir(), name)
+
+
+def _remove_read_replica_file():
+    if _read_replica is not None and _read_replica_pid == os.getpid():
+        _read_replica.stop()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(_read_replica.path + suffix)
+            except OSError:
+                pass
+
+
+def get_read_replica():
+    """This worker's ReadReplica, started on first use; None unless READ_REPLICA is on."""
+    global _read_replica, _read_replica_pid
+    if not READ_REPLICA_ENABLED:
+        return None
+    if _read_replica is None or _read_replica_pid != os.getpid():
+        with _read_replica_lock:
+            if _read_replica is None or _read_replica_pid != os.getpid():
+                replica = ReadReplica(read_replica_path(), primary_db, sync_interval=READ_REPLICA_SYNC_INTERVAL,
+                                      max_staleness=READ_REPLICA_MAX_STALENESS, logger=app.logger)
+                replica.start()
+                _read_replica, _read_replica_pid = replica, os.getpid()
+                app.logger.info(f"Read replica: {replica.path} (sync every {READ_REPLICA_SYNC_INTERVAL:g}s)")
+    return _read_replica
+
+
+def note_session_write():
+    """Makes this session read from the primary until the replica has synced past now."""
+    session[REPLICA_READ_AFTER_KEY] = time.time()
+
+
+def ensure_replication_log(db):
+    """Creates the primary's replication log and its triggers on every table (idempotent)."""
+    tables = [row['name'] for row in db.fetchall(db.execute(*replicated_tables_statement()))]
+    db.execute_batch(replication_log_statements(tables))
+
+
+atexit.register(_remove_read_replica_file)
+
+# --- End Read Replica ---
+
+
 def get_db():
     db = getattr(g, '_database', None)
     if db is None:
-        db_url = os.environ.get("TURSO_DATABASE_URL")
-        auth_token = os.environ.get("TURSO_AUTH_TOKEN")
-
-        if db_url and auth_token:
-            # Production: Connect to Turso (libSQL cloud DB)
-            https_url = db_url.replace("libsql://", "https://")
-            conn = libsql_client.create_client_sync(url=https_url, auth_token=auth_token)
-            db = g._database = DbWrapper(conn, is_libsql=True)
-            app.logger.info("Database backend: Turso (libSQL)")
-        else:
-            # Local development: Connect to local SQLite file
-            app.logger.warning("TURSO_DATABASE_URL not set — falling back to local SQLite (budget.db). Do not use this in production.")
-            conn = sqlite3.connect(DATABASE)
-            conn.row_factory = sqlite3.Row
-            db = g._database = DbWrapper(conn, is_libsql=False)
-            app.logger.info("Database backend: Local SQLite (budget.db)")
+        pool = get_connection_pool()
+        replica, read_after, on_write = None, 0.0, None
+        if READ_REPLICA_ENABLED and has_request_context():
+            on_write = note_session_write
+            if request.method in ('GET', 'HEAD'):
+                replica = get_read_replica()
+                read_after = session.get(REPLICA_READ_AFTER_KEY, 0.0)
+        db = g._database = DbWrapper(pool.acquire(), is_libsql=pool.is_libsql, pool=pool, metrics=request_metrics,
+                                     replica=replica, read_after=read_after, on_write=on_write)
     return db
 
+def release_db():
+    """Returns the request's connection to the pool early; a later get_db() checks out another."""
+    db = g.pop('_database', None)
+    if db is not None:
+        # Kept so the request's Server-Timing and metrics still count what this connection did.
+        released = g.setdefault('_released_db_usage', [0.0, 0, 0])
+        released[0] += db.query_seconds
+        released[1] += db.round_trips
+        released[2] += db.rows_returned
+        db.close()
+
 @app.teardown_appcontext
 def close_connection(exception):
+    release_db()
+
+
+# --- Request Instrumentation ---
+# Per-worker timings of every request and database statement, served by /metrics.
+# Statements slower than SLOW_QUERY_MS are logged with their normalized SQL.
+request_metrics = RequestMetrics(
+    slow_query_seconds=float(os.environ.get('SLOW_QUERY_MS', 100)) / 1000,
+    logger=app.logger,
+)
+
+
+@app.before_request
+def start_request_timer():
+    g._request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('_request_started', None)
+    if started is None:
+        return response
+    # Streamed responses (report exports) are timed up to their first byte.
+    seconds = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
     db = getattr(g, '_database', None)
+    db_seconds, round_trips, rows = g.pop('_released_db_usage', [0.0, 0, 0])
     if db is not None:
-        db.close()
+        db_seconds += db.query_seconds
+        round_trips += db.round_trips
+        rows += db.rows_returned
+    request_metrics.observe_request(request.method, route, response.status_code, seconds,
+                                    db_seconds=db_seconds, round_trips=round_trips, rows=rows)
+    response.headers.add('Server-Timing', server_timing(seconds, db_seconds, round_trips, rows))
+    return response
+
+
+def server_timing(seconds, db_seconds, round_trips, rows):
+    """Server-Timing header value: database time, round-trips and rows, and the request's total time."""
+    return f'db;dur={db_seconds * 1000:.1f};desc="{round_trips} round-trips, {rows} rows", app;dur={seconds * 1000:.1f}'
+
+# --- End Request Instrumentation ---
 
 def get_smart_default_month():
     """
@@ -440,6 +1158,239 @@ def apply_schema_compat_migrations(db):
     ensure_column_exists(db, 'budgets', 'user_id', 'INTEGER')
     ensure_column_exists(db, 'budgets', 'month', 'TEXT')
     ensure_column_exists(db, 'weekly_budgets', 'selected_categories', 'TEXT')
+    ensure_column_exists(db, 'weekly_budgets', 'week_start', 'TEXT')
+    ensure_column_exists(db, 'weekly_budgets', 'week_end', 'TEXT')
+    apply_versioned_migrations(db)
+    if READ_REPLICA_ENABLED:
+        ensure_replication_log(db)
+    reset_schema_cache()
+
+
+# --- Change Feed ---
+# Triggers append (user, month, table, id) to change_log for every insert,
+# update and delete of a month's expenses, income, EMIs and budgets; schedule
+# changes are logged under month '*' because they can touch any month. The
+# AUTOINCREMENT seq is the version clients pass to /api/changes as `since`,
+# and the newest seq of a month versions its report data (see report_data_etag).
+# Every CHANGE_LOG_PRUNE_EVERY entries the log drops all but the newest
+# CHANGE_LOG_RETENTION; a client whose version was pruned reloads the month.
+CHANGE_LOG = 'change_log'
+CHANGE_LOG_MONTH_TABLES = ('expenses', 'income', 'emis', 'budgets')
+CHANGE_LOG_RETENTION = 50000
+CHANGE_LOG_PRUNE_EVERY = 1000
+ALL_MONTHS = '*'
+
+
+def change_log_schema_statements():
+    log = f'INSERT INTO {CHANGE_LOG} (user_id, month, table_name, row_id)'
+    statements = [
+        f'''CREATE TABLE IF NOT EXISTS {CHANGE_LOG} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            month TEXT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL
+        )''',
+        f'CREATE INDEX IF NOT EXISTS idx_{CHANGE_LOG}_user_month_seq ON {CHANGE_LOG} (user_id, month, seq)',
+        f'''CREATE TRIGGER IF NOT EXISTS {CHANGE_LOG}_prune AFTER INSERT ON {CHANGE_LOG}
+            WHEN NEW.seq % {CHANGE_LOG_PRUNE_EVERY} = 0
+            BEGIN DELETE FROM {CHANGE_LOG} WHERE seq <= NEW.seq - {CHANGE_LOG_RETENTION}; END''',
+    ]
+    for table in CHANGE_LOG_MONTH_TABLES:
+        statements += [
+            f'''CREATE TRIGGER IF NOT EXISTS {CHANGE_LOG}_{table}_insert AFTER INSERT ON {table}
+                BEGIN {log} VALUES (NEW.user_id, NEW.month, '{table}', NEW.id); END''',
+            f'''CREATE TRIGGER IF NOT EXISTS {CHANGE_LOG}_{table}_update AFTER UPDATE ON {table}
+                BEGIN
+                    {log} SELECT OLD.user_id, OLD.month, '{table}', OLD.id
+                        WHERE OLD.month IS NOT NEW.month OR OLD.user_id IS NOT NEW.user_id;
+                    {log} VALUES (NEW.user_id, NEW.month, '{table}', NEW.id);
+                END''',
+            f'''CREATE TRIGGER IF NOT EXISTS {CHANGE_LOG}_{table}_delete AFTER DELETE ON {table}
+                BEGIN {log} VALUES (OLD.user_id, OLD.month, '{table}', OLD.id); END''',
+        ]
+    for event, row in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')):
+        statements.append(
+            f'''CREATE TRIGGER IF NOT EXISTS {CHANGE_LOG}_schedules_{event} AFTER {event.upper()} ON schedules
+                BEGIN {log} VALUES ({row}.user_id, '{ALL_MONTHS}', 'schedules', {row}.id); END'''
+        )
+    return statements
+
+
+def change_log_statements(user_id, month, since, limit):
+    """The log's bounds, then up to limit of the month's changes after seq `since`."""
+    return [
+        (f'''SELECT (SELECT MIN(seq) FROM {CHANGE_LOG}) AS first_seq,
+                    (SELECT seq FROM sqlite_sequence WHERE name = ?) AS last_seq''', (CHANGE_LOG,)),
+        (f'''SELECT seq, table_name, row_id FROM {CHANGE_LOG}
+             WHERE user_id = ? AND month IN (?, '{ALL_MONTHS}') AND seq > ?
+             ORDER BY seq LIMIT ?''', (user_id, month, since, limit)),
+    ]
+
+
+def report_data_version_statement(user_id, month):
+    """
+    The newest change_log seq of the month's rows and of the user's recurring
+    entries, and the log's oldest seq: index lookups only. The version of the
+    month's report data (see report_data_etag).
+    """
+    return (
+        f'''SELECT (SELECT MAX(seq) FROM {CHANGE_LOG} WHERE user_id = ? AND month = ?) AS month_seq,
+                   (SELECT MAX(seq) FROM {CHANGE_LOG} WHERE user_id = ? AND month = '{ALL_MONTHS}') AS schedule_seq,
+                   (SELECT MIN(seq) FROM {CHANGE_LOG}) AS first_seq''',
+        (user_id, month, user_id)
+    )
+
+# --- End Change Feed ---
+
+
+# Versioned schema migrations, applied once each in order and recorded in
+# schema_migrations. Statements must be idempotent because several gunicorn
+# workers may run startup migrations at the same time.
+SCHEMA_MIGRATIONS = [
+    (1, 'hot path indexes', [
+        'CREATE INDEX IF NOT EXISTS idx_expenses_user_month_date ON expenses (user_id, month, date)',
+        'CREATE INDEX IF NOT EXISTS idx_expenses_user_date_category ON expenses (user_id, date, category, amount)',
+        'CREATE INDEX IF NOT EXISTS idx_income_user_month_id ON income (user_id, month, id)',
+        'CREATE INDEX IF NOT EXISTS idx_emis_user_month_id ON emis (user_id, month, id)',
+    ]),
+    (2, 'weekly budget dirty tracking', [
+        '''CREATE TABLE IF NOT EXISTS weekly_budget_dirty (
+            user_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            PRIMARY KEY (user_id, month)
+        )''',
+    ]),
+    # Covers the month totals and category / payment method GROUP BYs in aggregation.py,
+    # so the dashboard aggregates are answered from the index without reading rows.
+    (3, 'expense aggregation index', [
+        'CREATE INDEX IF NOT EXISTS idx_expenses_user_month_category ON expenses (user_id, month, category, amount, payment_type)',
+    ]),
+    # Duplicate detection for bulk imports matches on (date, amount, description).
+    (4, 'expense import dedupe index', [
+        'CREATE INDEX IF NOT EXISTS idx_expenses_user_date_amount_description ON expenses (user_id, date, amount, description)',
+    ]),
+    # Recurring income / EMI series, expanded into months at read time (schedules.py).
+    (5, 'recurring schedules', [
+        '''CREATE TABLE IF NOT EXISTS schedules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            label TEXT NOT NULL,
+            amount REAL NOT NULL,
+            start_month TEXT NOT NULL,
+            end_month TEXT,
+            interval_months INTEGER NOT NULL DEFAULT 1,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_schedules_user_kind_start ON schedules (user_id, kind, start_month)',
+    ]),
+    # Per-(user, month) log of changed rows, read by /api/changes and report data ETags
+    # (see change_log_schema_statements).
+    (6, 'change log', change_log_schema_statements()),
+]
+
+
+def get_applied_migration_versions(db):
+    db.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+    db.commit()
+    versions_rs = db.execute('SELECT version FROM schema_migrations')
+    return {row['version'] for row in db.fetchall(versions_rs)}
+
+
+def apply_versioned_migrations(db):
+    applied_versions = get_applied_migration_versions(db)
+    for version, name, statements in SCHEMA_MIGRATIONS:
+        if version in applied_versions:
+            continue
+        try:
+            db.execute_batch(statements + [(
+                'INSERT OR IGNORE INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)',
+                (version, name, datetime.utcnow().isoformat())
+            )])
+            app.logger.info(f"Schema migration: Applied version {version} ({name})")
+        except Exception as error:
+            app.logger.error(f"Schema migration {version} ({name}) failed: {error}", exc_info=True)
+            raise
+
+
+def recent_transactions_statement(user_id, active_month):
+    """Recent transactions for the mobile view, including recurring income occurrences."""
+    # Ensure date for income is a full date string for proper sorting
+    schedule_filter, schedule_params = occurrence_filter(user_id, 'income', active_month)
+    return (f"""
+        SELECT date, category, description, amount, 'expense' as type
+        FROM expenses
+        WHERE month = ? AND user_id = ?
+        UNION ALL
+        SELECT month || '-01' as date, 'Income' as category, description, amount, 'income' as type
+        FROM income
+        WHERE month = ? AND user_id = ?
+        UNION ALL
+        SELECT ? || '-01' as date, 'Income' as category, s.label as description, s.amount, 'income' as type
+        FROM schedules s
+        WHERE {schedule_filter}
+        ORDER BY date DESC
+        LIMIT 5
+    """, (active_month, user_id, active_month, user_id, active_month, *schedule_params))
+
+
+def available_months_statement(user_id):
+    # Recurring schedules contribute the month they start in.
+    return ('''
+        SELECT DISTINCT strftime("%Y-%m", date) as month FROM expenses WHERE user_id = ?
+        UNION
+        SELECT DISTINCT month FROM income WHERE user_id = ?
+        UNION
+        SELECT DISTINCT month FROM emis WHERE user_id = ?
+        UNION
+        SELECT DISTINCT start_month FROM schedules WHERE user_id = ?
+        ORDER BY month DESC
+    ''', (user_id, user_id, user_id, user_id))
+
+
+def check_query_plans(db):
+    """Returns {query_name: [plan steps]} for hot-path queries that scan a whole table."""
+    scans = {}
+    for name, (sql, params) in HOT_PATH_QUERIES.items():
+        plan_rs = db.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        details = [row['detail'] for row in db.fetchall(plan_rs)]
+        # Scanning a materialized subquery reads its (already aggregated) result, not a table.
+        subqueries = {detail.split()[-1] for detail in details if detail.startswith(('MATERIALIZE ', 'CO-ROUTINE '))}
+        table_scans = [
+            detail for detail in details
+            if detail.startswith('SCAN ') and 'CONSTANT ROW' not in detail and detail.split()[1] not in subqueries
+        ]
+        if table_scans:
+            scans[name] = table_scans
+    return scans
+
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Fail if any hot-path query regresses to a full table scan."""
+    scans = check_query_plans(get_db())
+    for name, details in scans.items():
+        click.echo(f"{name}: {'; '.join(details)}", err=True)
+    if scans:
+        raise SystemExit(1)
+    click.echo(f'All {len(HOT_PATH_QUERIES)} hot-path queries use an index.')
+
+@app.cli.command('drop-replication-log')
+def drop_replication_log_command():
+    """Remove the read replicas' change log and triggers from the primary (run with READ_REPLICA off)."""
+    db = get_db()
+    tables = [row['name'] for row in db.fetchall(db.execute(*replicated_tables_statement()))]
+    db.execute_batch(drop_replication_log_statements(tables))
+    click.echo(f'Dropped the replication log and its triggers on {len(tables)} tables.')
 
 def init_db():
     with app.app_context():
@@ -504,6 +1455,8 @@ def init_db():
                 user_id INTEGER NOT NULL,
                 month TEXT NOT NULL,
                 week_index INTEGER NOT NULL,
+                week_start TEXT,
+                week_end TEXT,
                 base_budget REAL NOT NULL DEFAULT 0,
                 carry_in REAL NOT NULL DEFAULT 0,
                 effective_budget REAL NOT NULL DEFAULT 0,
@@ -598,24 +1551,16 @@ def get_week_boundaries(month_str, db=None, user_id=None):
     
     return weeks
 
-def get_weekly_spent(db, user_id, month_str, week_start, week_end, selected_categories=None):
-    """Sum of expenses in a given week for a user, optionally filtered by selected categories."""
-    selected_categories = selected_categories or []
-    if selected_categories:
-        placeholders = ','.join('?' for _ in selected_categories)
-        rs = db.execute(
-            f'''SELECT COALESCE(SUM(amount), 0) as total FROM expenses
-               WHERE user_id = ? AND date BETWEEN ? AND ? AND category IN ({placeholders})''',
-            (user_id, week_start, week_end, *selected_categories)
-        )
-    else:
-        rs = db.execute(
-            '''SELECT COALESCE(SUM(amount), 0) as total FROM expenses
-               WHERE user_id = ? AND date BETWEEN ? AND ?''',
-            (user_id, week_start, week_end)
-        )
-    row = db.fetchone(rs)
-    return row['total'] if row else 0.0
+def get_weekly_spent_totals(db, user_id, weeks, selected_categories=None):
+    """
+    Spend for every week of a budget cycle in a single GROUP BY query, optionally
+    filtered by selected categories. Expenses are bucketed by whole weeks from the
+    cycle start, so the returned list lines up with `weeks`.
+    """
+    if not weeks:
+        return []
+    sql, params = weekly_spent_statement(user_id, weeks[0][1], weeks[-1][2], selected_categories)
+    return weekly_spent_from_rows(db.fetchall(db.execute(sql, params)), len(weeks))
 
 
 def parse_selected_categories(raw_categories):
@@ -635,50 +1580,49 @@ def parse_selected_categories(raw_categories):
     return [category.strip() for category in raw_categories.split(',') if category.strip()]
 
 def initialize_weekly_budgets(db, user_id, month_str):
-    """Initialize weekly budgets for a month if not already present."""
+    """Initialize weekly budgets for a month if not already present. Returns the week boundaries."""
     from datetime import datetime
     now = datetime.utcnow().isoformat()
     weeks = get_week_boundaries(month_str, db, user_id)
 
     valid_week_indices = [week_index for week_index, _, _ in weeks]
+    statements = []
     if valid_week_indices:
         placeholders = ','.join('?' for _ in valid_week_indices)
-        db.execute(
+        statements.append((
             f'''DELETE FROM weekly_budgets
                 WHERE user_id = ? AND month = ? AND week_index NOT IN ({placeholders})''',
             (user_id, month_str, *valid_week_indices)
-        )
+        ))
     else:
-        db.execute(
+        statements.append((
             'DELETE FROM weekly_budgets WHERE user_id = ? AND month = ?',
             (user_id, month_str)
-        )
-    
-    for week_index, _, _ in weeks:
-        # Check if already exists
-        rs = db.execute(
-            'SELECT id FROM weekly_budgets WHERE user_id = ? AND month = ? AND week_index = ?',
-            (user_id, month_str, week_index)
-        )
-        if not db.fetchone(rs):
-            db.execute(
-                '''INSERT INTO weekly_budgets 
-                   (user_id, month, week_index, base_budget, carry_in, effective_budget, spent, variance, status, selected_categories, created_at, updated_at)
-                   VALUES (?, ?, ?, 0, 0, 0, 0, 0, 'normal', '', ?, ?)''',
-                (user_id, month_str, week_index, now, now)
-            )
-    db.commit()
+        ))
 
-def recalculate_weekly_budgets(db, user_id, month_str):
+    # UNIQUE(user_id, month, week_index) makes existing weeks a no-op.
+    for week_index, week_start, week_end in weeks:
+        statements.append((
+            '''INSERT OR IGNORE INTO weekly_budgets
+               (user_id, month, week_index, week_start, week_end, base_budget, carry_in, effective_budget, spent, variance, status, selected_categories, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?, 0, 0, 0, 0, 0, 'normal', '', ?, ?)''',
+            (user_id, month_str, week_index, week_start, week_end, now, now)
+        ))
+    db.execute_batch(statements)
+    return weeks
+
+def recalculate_weekly_budgets(db, user_id, month_str, weeks=None):
     """
         Recalculate all weekly budgets for a month:
         - Compute spent for each week
         - Compute variance (effective_budget - spent)
         - Redistribute only overspend across remaining weeks equally
             (week excess reduces future week budgets)
+        Pass `weeks` when the caller already has the week boundaries.
     """
     from datetime import datetime
-    weeks = get_week_boundaries(month_str, db, user_id)
+    if weeks is None:
+        weeks = get_week_boundaries(month_str, db, user_id)
     now = datetime.utcnow().isoformat()
     
     # Fetch all weekly budgets for this month
@@ -739,12 +1683,15 @@ def recalculate_weekly_budgets(db, user_id, month_str):
 
             weekly_data[week_index]['base_budget'] = allocated_budget
 
-    # Calculate spent for each week (filtered by selected categories, if configured)
-    for week_index, week_start, week_end in weeks:
-        week_categories = categories_by_week.get(week_index) or default_selected_categories
-        spent = get_weekly_spent(db, user_id, month_str, week_start, week_end, week_categories)
+    # Calculate spent for each week (filtered by selected categories, if configured).
+    # Weeks normally share one category selection, so this is a single query.
+    spent_by_categories = {}
+    for position, (week_index, _, _) in enumerate(weeks):
+        week_categories = tuple(categories_by_week.get(week_index) or default_selected_categories)
+        if week_categories not in spent_by_categories:
+            spent_by_categories[week_categories] = get_weekly_spent_totals(db, user_id, weeks, list(week_categories))
         if week_index in weekly_data:
-            weekly_data[week_index]['spent'] = spent
+            weekly_data[week_index]['spent'] = spent_by_categories[week_categories][position]
 
     # Redistribute monthly selected-category budget across weeks.
     # Overspend in earlier weeks reduces the pool available for later weeks.
@@ -791,126 +1738,755 @@ def recalculate_weekly_budgets(db, user_id, month_str):
         wd['status'] = status
 
 
-    # Write back to DB
+    # Write back to DB and clear the dirty flag in one batch
+    week_ranges = {week_index: (week_start, week_end) for week_index, week_start, week_end in weeks}
+    statements = []
     for week_index, wd in weekly_data.items():
-        db.execute(
+        week_start, week_end = week_ranges.get(week_index, (wd.get('week_start'), wd.get('week_end')))
+        statements.append((
             '''UPDATE weekly_budgets 
-               SET base_budget = ?, carry_in = ?, effective_budget = ?, spent = ?, variance = ?, status = ?, updated_at = ?
+               SET base_budget = ?, carry_in = ?, effective_budget = ?, spent = ?, variance = ?, status = ?,
+                   week_start = ?, week_end = ?, updated_at = ?
                WHERE user_id = ? AND month = ? AND week_index = ?''',
-            (wd['base_budget'], wd['carry_in'], wd['effective_budget'], wd['spent'], wd['variance'], wd['status'], now, user_id, month_str, week_index)
-        )
-    db.commit()
+            (wd['base_budget'], wd['carry_in'], wd['effective_budget'], wd['spent'], wd['variance'], wd['status'],
+             week_start, week_end, now, user_id, month_str, week_index)
+        ))
+    statements.append((
+        'DELETE FROM weekly_budget_dirty WHERE user_id = ? AND month = ?',
+        (user_id, month_str)
+    ))
+    db.execute_batch(statements)
+
+
+# --- Weekly budget invalidation ---
+# Mutations that can change a month's weekly budgets flag (user, month) in
+# weekly_budget_dirty; GET /api/weekly_budget only recomputes flagged months.
+# A budget cycle can start in the previous calendar month and end in the next
+# one, so an expense dated in month X can affect months X-1, X and X+1.
+_ADJACENT_MONTH_SHIFTS_SQL = "(SELECT '-1 month' AS shift UNION ALL SELECT '+0 month' UNION ALL SELECT '+1 month')"
+
+
+def weekly_budgets_dirty_statement(user_id, months):
+    """The (sql, params) statement flagging the given months, or None if there are none."""
+    months = [month for month in dict.fromkeys(months) if month]
+    if not months:
+        return None
+    values = ', '.join('(?, ?)' for _ in months)
+    params = [value for month in months for value in (user_id, month)]
+    return f'INSERT OR IGNORE INTO weekly_budget_dirty (user_id, month) VALUES {values}', params
+
+
+def mark_weekly_budgets_dirty(db, user_id, months):
+    """Flags the weekly budgets of the given months for recompute on next read."""
+    statement = weekly_budgets_dirty_statement(user_id, months)
+    if statement is not None:
+        db.execute(*statement)
+
+
+def expense_dates_dirty_statement(user_id, expense_dates):
+    """
+    The (sql, params) statement flagging every month whose budget cycle could
+    contain one of `expense_dates`, or None if there are none. Keep the dates
+    under SQLite's 500-term compound SELECT limit.
+    """
+    expense_dates = [expense_date for expense_date in dict.fromkeys(expense_dates) if expense_date]
+    if not expense_dates:
+        return None
+    dates_sql = ' UNION ALL '.join('SELECT ? AS date' for _ in expense_dates)
+    return (
+        f'''INSERT OR IGNORE INTO weekly_budget_dirty (user_id, month)
+            SELECT ?, strftime('%Y-%m', dates.date, 'start of month', shifts.shift)
+            FROM ({dates_sql}) dates, {_ADJACENT_MONTH_SHIFTS_SQL} shifts''',
+        (user_id, *expense_dates)
+    )
+
+
+def expense_dates_dirty_statements(user_id, expense_dates, dates_per_statement=400):
+    """expense_dates_dirty_statement for any number of dates, split under the compound SELECT limit."""
+    expense_dates = list(dict.fromkeys(expense_dates))
+    return [
+        statement for start in range(0, len(expense_dates), dates_per_statement)
+        for statement in [expense_dates_dirty_statement(user_id, expense_dates[start:start + dates_per_statement])]
+        if statement is not None
+    ]
+
+
+def mark_expense_dates_dirty(db, user_id, expense_dates):
+    """Flags every month whose budget cycle could contain one of `expense_dates`."""
+    statement = expense_dates_dirty_statement(user_id, expense_dates)
+    if statement is not None:
+        db.execute(*statement)
+
+
+def weekly_budget_rows_statement(user_id, month_str):
+    return (
+        '''SELECT wb.*,
+                  EXISTS(SELECT 1 FROM weekly_budget_dirty d WHERE d.user_id = wb.user_id AND d.month = wb.month) as is_dirty
+           FROM weekly_budgets wb
+           WHERE wb.user_id = ? AND wb.month = ?
+           ORDER BY wb.week_index''',
+        (user_id, month_str)
+    )
+
+
+def fetch_weekly_budget_rows(db, user_id, month_str):
+    """Stored weekly budget rows for a month, each with an is_dirty flag."""
+    return db.fetchall(db.execute(*weekly_budget_rows_statement(user_id, month_str)))
+
+
+def weekly_budget_rows_are_stale(rows):
+    if not rows:
+        return True
+    return any(row.get('is_dirty') or not row.get('week_start') or not row.get('week_end') for row in rows)
+
+
+# Every write of a month's weekly rows sets their updated_at, so the number of
+# rows and the range of their updated_at identify the rows' contents.
+def weekly_budget_version_statement(user_id, month_str):
+    """One indexed lookup of the month's weekly budget version, without reading the rows' data."""
+    return (
+        '''SELECT COUNT(*) AS weeks, MIN(updated_at) AS first_update, MAX(updated_at) AS last_update,
+                  SUM(COALESCE(week_start, '') = '' OR COALESCE(week_end, '') = '') AS incomplete,
+                  EXISTS(SELECT 1 FROM weekly_budget_dirty d WHERE d.user_id = ? AND d.month = ?) AS is_dirty
+           FROM weekly_budgets
+           WHERE user_id = ? AND month = ?''',
+        (user_id, month_str, user_id, month_str)
+    )
+
+
+def weekly_budget_version_etag(user_id, month_str, row):
+    """ETag of the stored weekly rows from weekly_budget_version_statement; None while they need recomputing."""
+    if not row or not row['weeks'] or row['incomplete'] or row['is_dirty']:
+        return None
+    return data_etag('weekly_budget', user_id, month_str, f"{row['weeks']}:{row['first_update']}:{row['last_update']}")
+
+
+def weekly_budget_rows_etag(user_id, month_str, rows):
+    """The same ETag, from weekly rows that are not stale."""
+    updates = [row['updated_at'] for row in rows]
+    return data_etag('weekly_budget', user_id, month_str, f'{len(rows)}:{min(updates)}:{max(updates)}')
 
 # ========== END WEEKLY BUDGET HELPERS ==========
 
+# ========== DASHBOARD CACHE ==========
+# get_budget_data snapshots are cached per (user, month) together with the
+# month's version stamp. Writes bump the version after they commit, and a
+# snapshot is only served while its version is still current, so a snapshot
+# computed concurrently with a write can never hide that write.
+
+class MemoryCacheStore:
+    """Process-local cache store. Only coherent when a single worker serves the app."""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (version, expires_at, value), least recently used first
+        self._versions = {}
+
+    def get_version(self, key):
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def bump_versions(self, keys):
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+                self._entries.pop(key, None)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            version, expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return version, value
+
+    def set(self, key, version, value, ttl):
+        with self._lock:
+            self._entries[key] = (version, time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCacheStore:
+    """Cache store shared by every worker on the host through a local SQLite file."""
+
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries=512):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS cache_versions (key TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+            conn.execute('''CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_entries_last_access ON cache_entries (last_access)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_version(self, key):
+        row = self._connect().execute('SELECT version FROM cache_versions WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_versions(self, keys):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                '''INSERT INTO cache_versions (key, version) VALUES (?, 1)
+                   ON CONFLICT(key) DO UPDATE SET version = version + 1''',
+                [(key,) for key in keys]
+            )
+            conn.executemany('DELETE FROM cache_entries WHERE key = ?', [(key,) for key in keys])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get(self, key):
+        conn = self._connect()
+        row = conn.execute('SELECT version, value, expires_at FROM cache_entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        version, value, expires_at = row
+        now = time.time()
+        if expires_at < now:
+            conn.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+            return None
+        conn.execute('UPDATE cache_entries SET last_access = ? WHERE key = ?', (now, key))
+        return version, json.loads(value)
+
+    def set(self, key, version, value, ttl):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, version, value, expires_at, last_access) VALUES (?, ?, ?, ?, ?)',
+            (key, version, json.dumps(value), now + ttl, now)
+        )
+        conn.execute(
+            '''DELETE FROM cache_entries WHERE key IN (
+                   SELECT key FROM cache_entries ORDER BY last_access DESC LIMIT -1 OFFSET ?
+               )''',
+            (self.max_entries,)
+        )
+
+
+class DashboardCache:
+    """Version-stamped (user, month) snapshot cache in front of a cache store."""
+
+    def __init__(self, store, ttl=300):
+        self.store = store
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'errors': 0}
+
+    def _key(self, user_id, month):
+        # Keys include the user's generation, so invalidate_user retires every month at once.
+        generation = self.store.get_version(f'{user_id}:generation')
+        return f'{user_id}:{generation}:{month}'
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def lookup(self, user_id, month):
+        """
+        Returns (version, snapshot); snapshot is None on a miss. Pass the version
+        to save() so a write that lands while the snapshot is being built makes
+        that snapshot stale immediately.
+        """
+        key = f'{user_id}:{month}'
+        try:
+            key = self._key(user_id, month)
+            version = self.store.get_version(key)
+            entry = self.store.get(key)
+        except Exception as error:
+            app.logger.warning(f"Dashboard cache read failed for {key}: {error}")
+            self._count('errors')
+            return None, None
+
+        if entry is not None and entry[0] == version:
+            self._count('hits')
+            return version, entry[1]
+        self._count('misses')
+        return version, None
+
+    def save(self, user_id, month, version, data):
+        if version is None:
+            return
+        key = f'{user_id}:{month}'
+        try:
+            key = self._key(user_id, month)
+            self.store.set(key, version, data, self.ttl)
+        except Exception as error:
+            app.logger.warning(f"Dashboard cache write failed for {key}: {error}")
+            self._count('errors')
+
+    def get_or_load(self, user_id, month, loader, consistent_since=None):
+        """
+        Cached data of the month, else loader()'s. consistent_since(moment), if
+        given, says whether the loaded data saw every write committed before
+        moment; data read from a replica that is behind the looked-up version
+        is returned but not cached under it.
+        """
+        looked_up_at = time.time()
+        version, data = self.lookup(user_id, month)
+        if data is None:
+            data = loader()
+            if consistent_since is None or consistent_since(looked_up_at):
+                self.save(user_id, month, version, data)
+        return data
+
+    def invalidate(self, user_id, months):
+        keys = [f'{user_id}:{month}' for month in dict.fromkeys(months) if month]
+        if not keys:
+            return
+        try:
+            keys = [self._key(user_id, month) for month in dict.fromkeys(months) if month]
+            self.store.bump_versions(keys)
+            self._count('invalidations', len(keys))
+        except Exception as error:
+            app.logger.error(f"Dashboard cache invalidation failed for {keys}: {error}", exc_info=True)
+            self._count('errors')
+
+    def invalidate_user(self, user_id):
+        """Retires every cached month of the user, for writes that span open-ended month ranges."""
+        try:
+            self.store.bump_versions([f'{user_id}:generation'])
+            self._count('invalidations')
+        except Exception as error:
+            app.logger.error(f"Dashboard cache invalidation failed for user {user_id}: {error}", exc_info=True)
+            self._count('errors')
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._stats)
+        metrics['backend'] = self.store.name
+        return metrics
+
+
+_dashboard_cache = None
+_dashboard_cache_lock = threading.Lock()
+
+
+def host_cache_path(name):
+    """Temp-dir path for a cache of this database that every gunicorn worker on the host shares."""
+    database_id = os.environ.get("TURSO_DATABASE_URL") or os.path.abspath(DATABASE)
+    return os.path.join(
+        tempfile.gettempdir(),
+        f"budget_planner_{name}_{hashlib.sha1(database_id.encode('utf-8')).hexdigest()[:12]}"
+    )
+
+
+def _build_dashboard_cache():
+    backend = os.environ.get('DASHBOARD_CACHE_BACKEND', 'sqlite').lower()
+    max_entries = int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRIES', 512))
+    ttl = float(os.environ.get('DASHBOARD_CACHE_TTL', 300))
+
+    if backend == 'memory':
+        store = MemoryCacheStore(max_entries=max_entries)
+    else:
+        default_path = host_cache_path('cache') + '.db'
+        store = SQLiteCacheStore(os.environ.get('DASHBOARD_CACHE_PATH', default_path), max_entries=max_entries)
+    app.logger.info(f"Dashboard cache backend: {store.name}")
+    return DashboardCache(store, ttl=ttl)
+
+
+def get_dashboard_cache():
+    global _dashboard_cache
+    if _dashboard_cache is None:
+        with _dashboard_cache_lock:
+            if _dashboard_cache is None:
+                _dashboard_cache = _build_dashboard_cache()
+    return _dashboard_cache
+
+
+def invalidate_budget_data(user_id, months):
+    """Call after committing any write that changes a month's dashboard data."""
+    get_dashboard_cache().invalidate(user_id, months)
+
+
+def invalidate_all_budget_data(user_id):
+    """Call after committing a write that can change any of the user's months, e.g. a schedule edit."""
+    get_dashboard_cache().invalidate_user(user_id)
+
+
+def get_record_month(db, table_name, user_id, record_id):
+    """Month of one of the user's income / emis / budgets / expenses rows, or None."""
+    rs = db.execute(f'SELECT month FROM {table_name} WHERE id = ? AND user_id = ?', (record_id, user_id))
+    row = db.fetchone(rs)
+    return row['month'] if row else None
+
+
+def get_expense_month_and_date(db, user_id, expense_id):
+    rs = db.execute('SELECT month, date FROM expenses WHERE id = ? AND user_id = ?', (expense_id, user_id))
+    return db.fetchone(rs)
+
+# ========== END DASHBOARD CACHE ==========
+
 def get_budget_data(active_month):
     """Fetches and calculates all necessary data for a given month for the current user."""
-    app.logger.info(f"--- Fetching data for active_month: {active_month} ---")
     if not current_user.is_authenticated:
         return {}
-    db = get_db()
+    user_id = current_user.id
+    return get_dashboard_cache().get_or_load(
+        user_id, active_month, lambda: load_budget_data(get_db(), user_id, active_month),
+        consistent_since=lambda moment: get_db().consistent_since(moment)
+    )
 
-    # Fetch all data for the active month for current user
-    expenses_rs = db.execute('SELECT * FROM expenses WHERE month = ? AND user_id = ? ORDER BY date DESC', (active_month, current_user.id))
-    expenses = db.fetchall(expenses_rs)
-    app.logger.info(f"Found {len(expenses)} expenses.")
 
-    income_rs = db.execute('SELECT * FROM income WHERE month = ? AND user_id = ? ORDER BY id DESC', (active_month, current_user.id))
-    income = db.fetchall(income_rs)
-    app.logger.info(f"Found {len(income)} income records.")
+# Expenses are sent to the browser a page at a time, newest first. Pages are
+# keyset-paginated on (date, id) so later pages cost the same as the first.
+EXPENSE_PAGE_SIZE = int(os.environ.get('EXPENSE_PAGE_SIZE', 50))
+MAX_EXPENSE_PAGE_SIZE = 500
 
-    emis_rs = db.execute('SELECT * FROM emis WHERE month = ? AND user_id = ? ORDER BY id DESC', (active_month, current_user.id))
-    emis = db.fetchall(emis_rs)
-    app.logger.info(f"Found {len(emis)} EMI records.")
 
-    budget_cursor = db.execute('SELECT id, category, amount FROM budgets WHERE month = ? AND user_id = ?', (active_month, current_user.id))
-    budget_list = db.fetchall(budget_cursor)
-    budget = {row['category']: row['amount'] for row in budget_list}
-    app.logger.info(f"Found budget categories: {list(budget.keys())}")
+def encode_expense_cursor(expense):
+    raw = json.dumps([expense['date'], expense['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
 
 
-    # --- SERVER-SIDE CALCULATIONS ---
-    total_income = sum(i['amount'] for i in income)
-    total_expenses = sum(e['amount'] for e in expenses)
-    total_emi = sum(e['emi_amount'] for e in emis)
-    total_budget = sum(budget.values())
-    remaining_budget = total_budget - total_expenses
-    net_savings = total_income - (total_expenses + total_emi)
-    
-    app.logger.info(f"Calculated Totals: Income={total_income}, Expenses={total_expenses}, EMI={total_emi}, Budget={total_budget}")
+def decode_expense_cursor(cursor):
+    """Returns the (date, id) an expense page continues after. Raises ValueError for bad cursors."""
+    try:
+        expense_date, expense_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('Invalid cursor.')
+    if not isinstance(expense_date, str) or not isinstance(expense_id, int):
+        raise ValueError('Invalid cursor.')
+    return expense_date, expense_id
 
 
-    # Prepare data for bar chart (budget vs. spent)
-    category_totals = {}
-    for expense in expenses:
-        category = expense['category']
-        amount = expense['amount']
-        category_totals[category] = category_totals.get(category, 0) + amount
+def expense_search_condition():
+    return (
+        "(lower(description) LIKE ? ESCAPE '\\' OR lower(category) LIKE ? ESCAPE '\\'"
+        " OR lower(COALESCE(payment_type, '')) LIKE ? ESCAPE '\\')"
+    )
 
-    chart_labels = sorted(set(list(category_totals.keys()) + list(budget.keys())))
-    budget_values = [budget.get(cat, 0) for cat in chart_labels]
-    spent_values = [category_totals.get(cat, 0) for cat in chart_labels]
 
-    # Fetch recent transactions for mobile view
-    # Ensure date for income is a full date string for proper sorting
-    recent_trans_rs = db.execute("""
-        SELECT date, category, description, amount, 'expense' as type
-        FROM expenses
-        WHERE month = ? AND user_id = ?
-        UNION ALL
-        SELECT month || '-01' as date, 'Income' as category, description, amount, 'income' as type
-        FROM income
-        WHERE month = ? AND user_id = ?
-        ORDER BY date DESC
-        LIMIT 5
-    """, (active_month, current_user.id, active_month, current_user.id))
-    recent_transactions = db.fetchall(recent_trans_rs)
-    app.logger.info(f"Found {len(recent_transactions)} recent transactions for mobile view.")
+def like_pattern(search_term):
+    escaped = search_term.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def expense_page_statement(user_id, month, limit, after=None, search_term=''):
+    """One page of a month's expenses; fetches limit + 1 rows so split_expense_page can tell if more exist."""
+    conditions = ['month = ?', 'user_id = ?']
+    params = [month, user_id]
+    if after:
+        conditions.append('(date, id) < (?, ?)')
+        params.extend(after)
+    if search_term:
+        conditions.append(expense_search_condition())
+        params.extend([like_pattern(search_term)] * 3)
+    params.append(limit + 1)
+    return (
+        f"SELECT * FROM expenses WHERE {' AND '.join(conditions)} ORDER BY date DESC, id DESC LIMIT ?",
+        tuple(params)
+    )
+
+
+def split_expense_page(rows, limit):
+    """Returns (expenses, next_cursor) from rows fetched by expense_page_statement."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_expense_cursor(rows[-1])
+    return rows, None
+
+
+def change_version_statement():
+    """The newest change_log seq: the version of data read after it, for /api/changes?since=."""
+    return ('SELECT COALESCE(MAX(seq), 0) AS version FROM sqlite_sequence WHERE name = ?', (CHANGE_LOG,))
+
+
+def month_summary_statements(user_id, active_month):
+    """The month's budgets and aggregates, in the order build_month_summary expects their rows."""
+    return [
+        ('SELECT id, category, amount FROM budgets WHERE month = ? AND user_id = ?', (active_month, user_id)),
+        recent_transactions_statement(user_id, active_month),
+        month_totals_statement(user_id, active_month),
+        category_totals_statement(user_id, active_month),
+        payment_type_totals_statement(user_id, active_month),
+    ]
+
+
+def budget_data_statements(user_id, active_month):
+    """The dashboard queries for one month, in the order build_budget_data expects their rows."""
+    # The version is read first, so the data is at least as new as the version it is sent with.
+    return [
+        change_version_statement(),
+        expense_page_statement(user_id, active_month, EXPENSE_PAGE_SIZE),
+        month_rows_statement(user_id, 'income', active_month),
+        month_rows_statement(user_id, 'emi', active_month),
+        *month_summary_statements(user_id, active_month),
+    ]
+
+
+def load_budget_data(db, user_id, active_month):
+    """Runs the dashboard queries for one month in a single round-trip, bypassing the cache."""
+    app.logger.debug(f"--- Fetching data for active_month: {active_month} ---")
+    return build_budget_data(active_month, *db.fetchall_batch(budget_data_statements(user_id, active_month)))
+
+
+def build_budget_data(active_month, version_rows, expense_rows, income, emis, *summary_rows):
+    """Builds the dashboard payload from the rows of budget_data_statements."""
+    expenses, expenses_next_cursor = split_expense_page(expense_rows, EXPENSE_PAGE_SIZE)
+    app.logger.debug(f"Found {len(expenses)} expenses on the first page.")
+    app.logger.debug(f"Found {len(income)} income records.")
+    app.logger.debug(f"Found {len(emis)} EMI records.")
 
     # This dictionary is the single source of truth for the frontend.
     result_data = {
         'active_month': active_month,
+        'changes_version': version_rows[0]['version'],
         'expenses': expenses,
+        'expenses_next_cursor': expenses_next_cursor,
         'income': income,
         'emis': emis,
+        **build_month_summary(*summary_rows),
+    }
+    app.logger.debug(f"--- Finished fetching data for {active_month}. Returning {len(result_data)} keys. ---")
+    return result_data
+
+
+def build_month_summary(budget_list, recent_transactions, totals_rows, category_rows, payment_type_rows):
+    """
+    The dashboard's budgets, totals and chart series from the rows of
+    month_summary_statements; mutation responses and /api/changes send it on its own.
+    """
+    totals = month_totals_from_rows(totals_rows)
+    budget = {row['category']: row['amount'] for row in budget_list}
+    app.logger.debug(f"Found budget categories: {list(budget.keys())}")
+
+    # --- SERVER-SIDE CALCULATIONS (aggregated in SQL) ---
+    app.logger.debug(f"Calculated Totals: Income={totals.total_income}, Expenses={totals.total_expenses}, EMI={totals.total_emi}, Budget={totals.total_budget}")
+
+    category_totals = {row.category: row.total for row in category_totals_from_rows(category_rows)}
+    payment_type_totals = payment_type_totals_from_rows(payment_type_rows)
+
+    # Prepare data for bar chart (budget vs. spent)
+    chart_labels = sorted(set(list(category_totals.keys()) + list(budget.keys())))
+    budget_values = [budget.get(cat, 0) for cat in chart_labels]
+    spent_values = [category_totals.get(cat, 0) for cat in chart_labels]
+
+    app.logger.debug(f"Found {len(recent_transactions)} recent transactions for mobile view.")
+    return {
+        'expense_count': totals.expense_count,
+        'payment_type_totals': payment_type_totals,
         'budget': budget,
         'budgets_list': budget_list,
         'doughnut_chart_labels': chart_labels,
         'budget_values': budget_values,
         'spent_values': spent_values,
-        'total_income': total_income,
-        'total_expenses': total_expenses,
-        'total_emi': total_emi,
-        'total_budget': total_budget,
-        'remaining_budget': remaining_budget,
-        'net_savings': net_savings,
+        'total_income': totals.total_income,
+        'total_expenses': totals.total_expenses,
+        'total_emi': totals.total_emi,
+        'total_budget': totals.total_budget,
+        'remaining_budget': totals.remaining_budget,
+        'net_savings': totals.net_savings,
         'recent_transactions': recent_transactions
     }
-    app.logger.info(f"--- Finished fetching data for {active_month}. Returning {len(result_data)} keys. ---")
-    return result_data
 
 
-def upsert_budget_amount(db, user_id, month_value, category_name, amount_value):
-    category = (category_name or '').strip()
-    if not category:
-        raise ValueError('Budget category is required.')
+def category_options_statement(user_id, active_month=None):
+    if active_month:
+        return (
+            'SELECT DISTINCT category FROM budgets WHERE user_id = ? AND month = ? ORDER BY category',
+            (user_id, active_month)
+        )
+    return (
+        'SELECT DISTINCT category FROM budgets WHERE user_id = ? ORDER BY category',
+        (user_id,)
+    )
+
+
+def category_options_from_rows(category_rows):
+    db_categories = {
+        (row['category'] or '').strip()
+        for row in category_rows
+        if (row['category'] or '').strip()
+    }
+    return sorted(db_categories)
+
 
-    existing_rs = db.execute(
-        'SELECT id FROM budgets WHERE user_id = ? AND month = ? AND category = ? LIMIT 1',
-        (user_id, month_value, category)
+# Queries on the dashboard / weekly budget hot path. Each must be answered from
+# an index; check_query_plans fails if any of them falls back to a table scan.
+HOT_PATH_QUERIES = {
+    'smart_default_month': (
+        'SELECT COUNT(*) as count FROM expenses WHERE month = ? AND user_id = ?',
+        ('2000-01', 0)
+    ),
+    'expense_page': expense_page_statement(0, '2000-01', 50, after=('2000-01-31', 0)),
+    'month_totals': month_totals_statement(0, '2000-01'),
+    'expense_category_totals': category_totals_statement(0, '2000-01'),
+    'report_category_totals': category_totals_statement(0, '2000-01', expenses_by_date=True),
+    'payment_type_totals': payment_type_totals_statement(0, '2000-01'),
+    'month_income': month_rows_statement(0, 'income', '2000-01'),
+    'month_emis': month_rows_statement(0, 'emi', '2000-01'),
+    'month_budgets': month_summary_statements(0, '2000-01')[0],
+    'recent_transactions': recent_transactions_statement(0, '2000-01'),
+    'available_months': available_months_statement(0),
+    'category_options': category_options_statement(0, '2000-01'),
+    'week_boundaries': (
+        'SELECT MIN(date) as first_expense_date FROM expenses WHERE user_id = ? AND date BETWEEN ? AND ?',
+        (0, '2000-01-01', '2000-01-31')
+    ),
+    'weekly_spent_totals': weekly_spent_statement(0, '2000-01-01', '2000-01-31', ['Groceries']),
+    'change_log': change_log_statements(0, '2000-01', 0, 201)[1],
+    'report_data_version': report_data_version_statement(0, '2000-01'),
+    'report_monthly_category_totals': monthly_category_totals_statement(0, '2000-01', '2000-12'),
+    'report_ledger_chunk': ledger_chunk_statement(0, ('2000-01-01', 0), '2000-12-31'),
+    'import_duplicate_lookup': duplicate_lookup_statement(0, [('2000-01-01', 1.0, 'Coffee'), ('2000-01-02', 2.0, 'Tea')], 0),
+    'weekly_budget_rows': weekly_budget_rows_statement(0, '2000-01'),
+}
+
+
+def load_dashboard_data(db, user_id, active_month):
+    """
+    Everything index() renders, fetched in one batched round-trip: the month's
+    budget data (unless cached), the available months and the category options.
+    Returns (js_data, available_months, category_options).
+    """
+    dashboard_cache = get_dashboard_cache()
+    looked_up_at = time.time()
+    version, js_data = dashboard_cache.lookup(user_id, active_month)
+
+    statements = [available_months_statement(user_id), category_options_statement(user_id, active_month)]
+    if js_data is None:
+        statements.extend(budget_data_statements(user_id, active_month))
+    results = db.fetchall_batch(statements)
+
+    available_months = [row['month'] for row in results[0]]
+    category_options = category_options_from_rows(results[1])
+    if js_data is None:
+        js_data = build_budget_data(active_month, *results[2:])
+        if db.consistent_since(looked_up_at):
+            dashboard_cache.save(user_id, active_month, version, js_data)
+    return js_data, available_months, category_options
+
+
+# Budgets set from the dashboard are propagated this many months ahead; requests
+# may choose another horizon with horizon_months, up to MAX_BUDGET_HORIZON_MONTHS.
+BUDGET_HORIZON_MONTHS = int(os.environ.get('BUDGET_HORIZON_MONTHS', 3))
+MAX_BUDGET_HORIZON_MONTHS = 24
+_BUDGET_UPSERT_ROWS_PER_STATEMENT = 200  # 4 parameters per row stays under SQLite's 999 limit
+
+
+def budget_horizon_months(requested=None):
+    """Months to propagate a budget over. Raises ValueError for an invalid request."""
+    if requested in (None, ''):
+        return max(1, min(BUDGET_HORIZON_MONTHS, MAX_BUDGET_HORIZON_MONTHS))
+    horizon = int(requested)
+    if not 1 <= horizon <= MAX_BUDGET_HORIZON_MONTHS:
+        raise ValueError(f'horizon_months must be between 1 and {MAX_BUDGET_HORIZON_MONTHS}.')
+    return horizon
+
+
+def upsert_budget_statements(user_id, months, budget_map):
+    """
+    Statements setting every category in budget_map to its amount in each month,
+    as multi-row upserts on the UNIQUE(user_id, month, category) constraint.
+    """
+    rows = []
+    for month_value in months:
+        for category_name, amount_value in budget_map.items():
+            category = (category_name or '').strip()
+            if not category:
+                raise ValueError('Budget category is required.')
+            rows.append((user_id, month_value, category, amount_value))
+
+    statements = []
+    for start in range(0, len(rows), _BUDGET_UPSERT_ROWS_PER_STATEMENT):
+        chunk = rows[start:start + _BUDGET_UPSERT_ROWS_PER_STATEMENT]
+        values = ', '.join('(?, ?, ?, ?)' for _ in chunk)
+        statements.append((
+            f'''INSERT INTO budgets (user_id, month, category, amount) VALUES {values}
+                ON CONFLICT(user_id, month, category) DO UPDATE SET amount = excluded.amount''',
+            [value for row in chunk for value in row]
+        ))
+    return statements
+
+
+def save_budgets(db, user_id, months, budget_map):
+    """Upserts the budget grid and flags the months' weekly budgets in one transaction."""
+    db.execute_batch(
+        upsert_budget_statements(user_id, months, budget_map)
+        + [weekly_budgets_dirty_statement(user_id, months)]
     )
-    existing = db.fetchone(existing_rs)
+    invalidate_budget_data(user_id, months)
+
+# --- Conditional GET ---
+# /api/report_data and /api/weekly_budget send strong ETags made from a
+# per-(user, month) version that is much cheaper to read than the data, read
+# from the database so every worker agrees on it: the month's newest
+# change_log entries for report data, and the stored rows' updated_at range
+# for weekly budgets. Each is one indexed lookup. A request whose If-None-Match
+# still names the current version gets a bodiless 304 without the data being
+# loaded. Responses are `private, no-cache`: browsers keep them, but
+# revalidate before every use.
+API_CACHE_CONTROL = 'private, no-cache'
+
+
+def data_etag(kind, user_id, month, version):
+    """Strong ETag of a user's `kind` data for a month at `version`; None when the version is unknown."""
+    if version is None:
+        return None
+    return hashlib.sha256(f'{kind}:{user_id}:{month}:{version}'.encode('utf-8')).hexdigest()[:32]
+
+
+def report_data_etag(user_id, month, version_row):
+    """ETag of the month's report data from report_data_version_statement's row."""
+    version = f"{version_row['month_seq']}:{version_row['schedule_seq']}"
+    if version_row['month_seq'] is None or version_row['schedule_seq'] is None:
+        # Nothing (left) in the log: once pruning has removed the entries of a
+        # month, its oldest seq keeps the version from matching an earlier one.
+        version += f":{version_row['first_seq']}"
+    return data_etag('report_data', user_id, month, version)
+
+
+def report_data_is_current(data, version_row):
+    """
+    Whether report data, e.g. a cached snapshot, was read after the month's
+    last change in version_row, so that row's ETag describes it.
+    """
+    last_change = max(version_row['month_seq'] or 0, version_row['schedule_seq'] or 0)
+    return data.get('changes_version', 0) >= last_change
+
+
+def not_modified(etag):
+    """A bodiless 304 if the request's If-None-Match names etag, else None."""
+    if etag is None or not request.if_none_match.contains_weak(etag):
+        return None
+    return with_etag(Response(status=304), etag)
+
+
+def with_etag(response, etag):
+    if etag is not None:
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = API_CACHE_CONTROL
+    return response
+
+# --- End Conditional GET ---
 
-    if existing:
-        db.execute(
-            'UPDATE budgets SET amount = ? WHERE user_id = ? AND month = ? AND category = ?',
-            (amount_value, user_id, month_value, category)
-        )
-    else:
-        db.execute(
-            'INSERT INTO budgets (user_id, month, category, amount) VALUES (?, ?, ?, ?)',
-            (user_id, month_value, category, amount_value)
-        )
 
 @app.route('/api/report_data', methods=['GET'])
 @login_required
@@ -918,62 +2494,327 @@ def api_report_data():
     """API endpoint to fetch all dashboard data for a given month."""
     active_month = request.args.get('month_select')
     if not active_month:
-        return jsonify({'status': 'error', 'message': 'Month parameter is required.'}), 400
+        return jsonify({'status': 'error', 'message': 'Month parameter is required.'}), 400
+
+    try:
+        db = get_db()
+        version_row = db.fetchone(db.execute(*report_data_version_statement(current_user.id, active_month)))
+        etag = report_data_etag(current_user.id, active_month, version_row)
+        response = not_modified(etag)
+        if response is not None:
+            return response
+        data = get_budget_data(active_month)
+        if not report_data_is_current(data, version_row):
+            # A snapshot cached before the month's last change, e.g. in a worker's
+            # memory cache that another worker's invalidation never reached.
+            get_dashboard_cache().invalidate(current_user.id, [active_month])
+            data = get_budget_data(active_month)
+        # Data read from a replica that lags the version must not be labelled with it.
+        return with_etag(jsonify(data), etag if report_data_is_current(data, version_row) else None)
+    except Exception as e:
+        app.logger.error(f"Error fetching report data for month {active_month}: {e}")
+        return jsonify({'status': 'error', 'message': 'An internal error occurred.'}), 500
+
+
+# --- Delta Sync ---
+# Instead of reloading /api/report_data after every change, the browser
+# applies deltas to the month it shows: the expenses that changed (upserted
+# rows, deleted ids), the income / EMI lists when they changed, and the month
+# summary (build_month_summary: budgets, totals, chart series, recent
+# transactions). Mutation endpoints answer with the delta of their write for
+# the month the client names in view_month; /api/changes returns the delta of
+# everything written to a month since a change_log version, e.g. from another
+# tab or device. A delta costs one round-trip and never loads the expense list.
+CHANGE_FEED_MAX_ROWS = 200  # More changes than this and the client reloads the month instead
+_LIST_KEYS = {'income': 'income', 'emi': 'emis'}
+_TABLE_LISTS = {'income': 'income', 'emis': 'emi'}
+
+
+def month_delta_statements(user_id, month, expense_ids=(), lists=()):
+    """The queries of a month's delta, in the order build_month_delta expects their rows."""
+    statements = []
+    if expense_ids:
+        statements.append((
+            f"SELECT * FROM expenses WHERE user_id = ? AND month = ? AND id IN ({', '.join('?' for _ in expense_ids)})",
+            (user_id, month, *expense_ids)
+        ))
+    statements += [month_rows_statement(user_id, kind, month) for kind in lists]
+    statements.append((
+        'SELECT EXISTS(SELECT 1 FROM weekly_budget_dirty WHERE user_id = ? AND month = ?) AS is_dirty',
+        (user_id, month)
+    ))
+    return statements + month_summary_statements(user_id, month)
+
+
+def build_month_delta(month, results, expense_ids=(), lists=()):
+    """
+    The delta from the rows of month_delta_statements. Expenses in expense_ids
+    that are no longer in the month (deleted, or moved to another month) are
+    listed as deleted. weekly_budgets_stale tells the client to reload the
+    month's weekly budgets.
+    """
+    results = list(results)
+    delta = {'month': month}
+    if expense_ids:
+        rows = results.pop(0)
+        present = {row['id'] for row in rows}
+        delta['expenses'] = {
+            'upserted': rows,
+            'deleted': [expense_id for expense_id in expense_ids if expense_id not in present],
+        }
+    for kind in lists:
+        delta[_LIST_KEYS[kind]] = results.pop(0)
+    delta['weekly_budgets_stale'] = bool(results.pop(0)[0]['is_dirty'])
+    delta['summary'] = build_month_summary(*results)
+    return delta
+
+
+def load_month_delta(db, user_id, month, expense_ids=(), lists=()):
+    expense_ids = list(dict.fromkeys(expense_id for expense_id in expense_ids if expense_id is not None))
+    results = db.fetchall_batch(month_delta_statements(user_id, month, expense_ids, lists))
+    return build_month_delta(month, results, expense_ids, lists)
+
+
+def delta_covers(row, expense_ids, lists, schedule_ids):
+    """Whether a delta of expense_ids and lists, written for schedule_ids, includes a change_log row."""
+    table = row['table_name']
+    if table == 'expenses':
+        return row['row_id'] in expense_ids
+    if table == 'schedules':
+        return row['row_id'] in schedule_ids
+    if table == 'budgets':
+        return True  # every delta carries the month's budgets in its summary
+    return _TABLE_LISTS[table] in lists
+
+
+def load_mutation_delta(db, user_id, month, since, expense_ids=(), lists=(), schedule_ids=()):
+    """
+    (delta, version) of a write to a month, in one batch. version is the
+    change_log version the delta brings a client at version `since` up to, or
+    None when `since` is None or the month has other changes since then that
+    the delta leaves out; that client keeps its version and gets them, with
+    this write, from /api/changes.
+    """
+    expense_ids = list(dict.fromkeys(expense_id for expense_id in expense_ids if expense_id is not None))
+    statements = month_delta_statements(user_id, month, expense_ids, lists)
+    if since is None:
+        return build_month_delta(month, db.fetchall_batch(statements), expense_ids, lists), None
+    bounds, rows, *results = db.fetchall_batch(
+        change_log_statements(user_id, month, since, CHANGE_FEED_MAX_ROWS + 1) + statements
+    )
+    version, changes = change_feed_plan(since, bounds, rows)
+    covered = changes is not None and all(delta_covers(row, expense_ids, lists, schedule_ids) for row in rows)
+    return build_month_delta(month, results, expense_ids, lists), version if covered else None
+
+
+def mutation_response(message, expense_ids=(), lists=(), schedule_ids=(), **extra):
+    """
+    The success response of a write: the message, plus the delta of the month
+    the request names in view_month (query parameter), if any. With `since`
+    (the client's changes_version) it also carries the change_log `version`
+    the client is at once it applies the delta, when the delta covers every
+    change since then (schedule_ids: the recurring entries the write
+    changed). Call after committing. If the delta cannot be loaded
+    the write still succeeded, so the response goes without it and the client
+    reloads the month instead.
+    """
+    payload = {'status': 'success', 'message': message, **extra}
+    month = request.args.get('view_month')
+    if month and MONTH_PATTERN.match(month):
+        since = request.args.get('since', type=int)
+        try:
+            payload['delta'], version = load_mutation_delta(
+                get_db(), current_user.id, month, since if since is not None and since >= 0 else None,
+                expense_ids, lists, schedule_ids
+            )
+            if version is not None:
+                payload['version'] = version
+        except Exception as e:
+            app.logger.warning(f"Could not load the delta of {month} for user {current_user.id}: {e}")
+    return jsonify(payload)
+
+
+def change_feed_plan(since, bounds, rows, from_replica=False):
+    """
+    (version, changes) from the rows of change_log_statements. changes is None
+    when the client must reload the month (the log was pruned past `since`, is
+    older than `since`, or more than CHANGE_FEED_MAX_ROWS changed), else the
+    expense_ids and lists arguments of load_month_delta, or {} when nothing
+    changed.
+    """
+    first_seq, last_seq = bounds[0]['first_seq'], bounds[0]['last_seq'] or 0
+    version = max(last_seq, rows[-1]['seq'] if rows else 0)
+    if since > version:
+        if not from_replica:
+            return version, None  # a version from another database, e.g. one restored from a backup
+        version = since  # the client has read the primary ahead of this worker's replica
+    if (first_seq if first_seq is not None else last_seq + 1) > since + 1 or len(rows) > CHANGE_FEED_MAX_ROWS:
+        return version, None
+    if not rows:
+        return version, {}
+    tables = {row['table_name'] for row in rows}
+    return version, {
+        'expense_ids': list(dict.fromkeys(row['row_id'] for row in rows if row['table_name'] == 'expenses')),
+        'lists': [kind for kind, table in (('income', 'income'), ('emi', 'emis'))
+                  if table in tables or 'schedules' in tables],
+    }
+
+
+def change_feed_args(args):
+    """(month, since) of an /api/changes request. Raises ValueError for invalid parameters."""
+    month = args.get('month')
+    if not month or not MONTH_PATTERN.match(month):
+        raise ValueError('month must be YYYY-MM.')
+    try:
+        since = int(args.get('since', ''))
+    except ValueError:
+        raise ValueError('since must be a version from changes_version.')
+    if since < 0:
+        raise ValueError('since must be a version from changes_version.')
+    return month, since
+
+
+def change_feed_payload(version, delta):
+    if delta is None:
+        return {'status': 'reset', 'version': version}
+    return {'status': 'success', 'version': version, 'delta': delta or None}
+
+
+@app.route('/api/changes', methods=['GET'])
+@login_required
+def api_changes():
+    """
+    What changed in a month since version `since` (changes_version of
+    /api/report_data, or the version of the previous answer): a delta, null
+    when nothing changed, or status 'reset' when the client must reload the
+    month with /api/report_data.
+    """
+    try:
+        month, since = change_feed_args(request.args)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    try:
+        db = get_db()
+        user_id = current_user.id
+        bounds, rows = db.fetchall_batch(change_log_statements(user_id, month, since, CHANGE_FEED_MAX_ROWS + 1))
+        version, changes = change_feed_plan(since, bounds, rows, from_replica=db.replica_synced_at is not None)
+        delta = load_month_delta(db, user_id, month, **changes) if changes else changes
+        return jsonify(change_feed_payload(version, delta))
+    except Exception as e:
+        app.logger.error(f"Error fetching changes for month {month}: {e}")
+        return jsonify({'status': 'error', 'message': 'An internal error occurred.'}), 500
+
+# --- End Delta Sync ---
+
+def expense_list_args(args):
+    """(month, search term, limit, after) of an /api/expenses query. Raises ValueError for bad arguments."""
+    active_month = args.get('month_select')
+    if not active_month:
+        raise ValueError('Month parameter is required.')
+    search_term = (args.get('q') or '').strip()
+    limit = args.get('limit', default=EXPENSE_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_EXPENSE_PAGE_SIZE))
+    cursor = args.get('cursor')
+    after = decode_expense_cursor(cursor) if cursor else None
+    return active_month, search_term, limit, after
+
+
+def expense_list_statements(user_id, active_month, search_term, limit, after):
+    """The page query, plus the matching total and count when searching."""
+    statements = [expense_page_statement(user_id, active_month, limit, after, search_term)]
+    if search_term:
+        statements.append((
+            f'''SELECT COALESCE(SUM(amount), 0) as total, COUNT(*) as count FROM expenses
+                WHERE month = ? AND user_id = ? AND {expense_search_condition()}''',
+            (active_month, user_id, *[like_pattern(search_term)] * 3)
+        ))
+    return statements
+
+
+def expense_list_payload(results, search_term, limit):
+    expenses, next_cursor = split_expense_page(results[0], limit)
+    payload = {'status': 'success', 'expenses': expenses, 'next_cursor': next_cursor}
+    if search_term:
+        payload['matching_total'] = results[1][0]['total']
+        payload['matching_count'] = results[1][0]['count']
+    return payload
+
+
+@app.route('/api/expenses', methods=['GET'])
+@login_required
+def api_expenses():
+    """One page of a month's expenses, newest first, optionally filtered by a search term."""
+    try:
+        active_month, search_term, limit, after = expense_list_args(request.args)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
 
     try:
-        data = get_budget_data(active_month)
-        return jsonify(data)
+        db = get_db()
+        results = db.fetchall_batch(expense_list_statements(current_user.id, active_month, search_term, limit, after))
+        return jsonify(expense_list_payload(results, search_term, limit))
     except Exception as e:
-        app.logger.error(f"Error fetching report data for month {active_month}: {e}")
+        app.logger.error(f"Error fetching expenses for month {active_month}: {e}")
         return jsonify({'status': 'error', 'message': 'An internal error occurred.'}), 500
 
 # ========== WEEKLY BUDGET ENDPOINTS ==========
 
+def weekly_budget_payload(weekly_budgets):
+    """The /api/weekly_budget response for a month's up-to-date weekly budget rows."""
+    selected_categories_default = []
+    result = []
+    for wb in weekly_budgets:
+        row_selected_categories = parse_selected_categories(wb.get('selected_categories', ''))
+        if row_selected_categories and not selected_categories_default:
+            selected_categories_default = row_selected_categories
+        result.append({
+            'week_index': wb['week_index'],
+            'week_start': wb['week_start'],
+            'week_end': wb['week_end'],
+            'base_budget': wb.get('base_budget', 0),
+            'carry_in': wb.get('carry_in', 0),
+            'effective_budget': wb.get('effective_budget', 0),
+            'spent': wb.get('spent', 0),
+            'variance': wb.get('variance', 0),
+            'status': wb.get('status', 'normal'),
+            'selected_categories': row_selected_categories
+        })
+
+    return {
+        'status': 'success',
+        'weekly_budgets': result,
+        'selected_categories': selected_categories_default
+    }
+
 @app.route('/api/weekly_budget', methods=['GET'])
 @login_required
 def api_get_weekly_budget():
-    """Fetch all weekly budgets for a given month."""
+    """Fetch all weekly budgets for a given month.
+
+    Serves the stored rows as-is; they are only recomputed when a mutation has
+    flagged the month dirty or the month has never been computed. A request
+    whose If-None-Match names the stored rows' version gets a 304 after one
+    version lookup.
+    """
     month = request.args.get('month')
     if not month:
         return jsonify({'status': 'error', 'message': 'Month parameter required'}), 400
     
     try:
         db = get_db()
-        initialize_weekly_budgets(db, current_user.id, month)
-        recalculate_weekly_budgets(db, current_user.id, month)
-        
-        weeks = get_week_boundaries(month, db, current_user.id)
-        wb_rs = db.execute(
-            'SELECT * FROM weekly_budgets WHERE user_id = ? AND month = ? ORDER BY week_index',
-            (current_user.id, month)
-        )
-        weekly_budgets = db.fetchall(wb_rs)
-        
-        selected_categories_default = []
-        result = []
-        for i, (week_index, start, end) in enumerate(weeks):
-            wb = weekly_budgets[i] if i < len(weekly_budgets) else {}
-            row_selected_categories = parse_selected_categories(wb.get('selected_categories', ''))
-            if row_selected_categories and not selected_categories_default:
-                selected_categories_default = row_selected_categories
-            result.append({
-                'week_index': week_index,
-                'week_start': start,
-                'week_end': end,
-                'base_budget': wb.get('base_budget', 0),
-                'carry_in': wb.get('carry_in', 0),
-                'effective_budget': wb.get('effective_budget', 0),
-                'spent': wb.get('spent', 0),
-                'variance': wb.get('variance', 0),
-                'status': wb.get('status', 'normal'),
-                'selected_categories': row_selected_categories
-            })
-        
-        return jsonify({
-            'status': 'success',
-            'weekly_budgets': result,
-            'selected_categories': selected_categories_default
-        })
+        if request.if_none_match:
+            version_row = db.fetchone(db.execute(*weekly_budget_version_statement(current_user.id, month)))
+            response = not_modified(weekly_budget_version_etag(current_user.id, month, version_row))
+            if response is not None:
+                return response
+        weekly_budgets = fetch_weekly_budget_rows(db, current_user.id, month)
+        if weekly_budget_rows_are_stale(weekly_budgets):
+            db.read_from_primary()  # the recompute must start from the primary's rows, not the replica's
+            weeks = initialize_weekly_budgets(db, current_user.id, month)
+            recalculate_weekly_budgets(db, current_user.id, month, weeks)
+            weekly_budgets = fetch_weekly_budget_rows(db, current_user.id, month)
+        etag = weekly_budget_rows_etag(current_user.id, month, weekly_budgets) if weekly_budgets else None
+        return with_etag(jsonify(weekly_budget_payload(weekly_budgets)), etag)
     except Exception as e:
         app.logger.error(f"Error fetching weekly budget: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -1047,12 +2888,11 @@ def api_set_all_weekly_budget():
         if monthly_budget <= 0:
             return jsonify({'status': 'error', 'message': 'Selected categories have no budget or invalid amount'}), 400
 
-        initialize_weekly_budgets(db, current_user.id, month)
+        weeks = initialize_weekly_budgets(db, current_user.id, month)
 
         from datetime import datetime
         from datetime import datetime as dt
         now = datetime.utcnow().isoformat()
-        weeks = get_week_boundaries(month, db, current_user.id)
         if not weeks:
             return jsonify({'status': 'error', 'message': 'No weeks available for this month'}), 400
 
@@ -1091,7 +2931,7 @@ def api_set_all_weekly_budget():
             )
 
         db.commit()
-        recalculate_weekly_budgets(db, current_user.id, month)
+        recalculate_weekly_budgets(db, current_user.id, month, weeks)
 
         category_str = ', '.join(selected_categories)
         return jsonify({'status': 'success', 'message': f'Weekly budget set from {category_str} categories'})
@@ -1111,33 +2951,53 @@ def health_check():
         'message': 'Budget app is running'
     }), 200
 
+
+def worker_metrics():
+    """The counters of this worker's subsystems, by subsystem name."""
+    return {
+        'db_pool': get_connection_pool().metrics(),
+        'dashboard_cache': get_dashboard_cache().metrics(),
+        'pdf_reports': get_report_job_store().metrics(),
+        'statement_cache': prepare_libsql_sql.cache_info()._asdict(),
+        'passwords': password_hasher.metrics(),
+        'login_rate_limit': get_login_rate_limiter().metrics(),
+        **({'simulated_db': _simulated_latency.metrics()} if _simulated_latency is not None else {}),
+        **({'read_replica': _read_replica.metrics()} if _read_replica is not None else {}),
+    }
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Prometheus metrics for this worker process; with format=json, the same
+    counters plus the slowest statements and latest slow queries as JSON. Set
+    METRICS_TOKEN to require a bearer token; against Turso (production) the
+    endpoint is off without one, since the JSON names the app's SQL.
+    """
+    token = os.environ.get('METRICS_TOKEN')
+    if not token and os.environ.get('TURSO_DATABASE_URL'):
+        return Response('Set METRICS_TOKEN to enable /metrics\n', status=403, mimetype='text/plain')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    if request.args.get('format') == 'json':
+        return jsonify({**worker_metrics(), 'instrumentation': request_metrics.summary()})
+    body = request_metrics.render_prometheus(gauges=worker_metrics())
+    return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/', methods=['GET'])
 @login_required
 def index():
     # Use smart default month detection, but allow manual override via URL parameter
-    smart_default = get_smart_default_month()
-    active_month = request.args.get('month_select', default=smart_default)
+    active_month = request.args.get('month_select') or get_smart_default_month()
     
-    app.logger.info(f"Index route: Smart default month = {smart_default}, URL param = {request.args.get('month_select')}, Final active_month = {active_month}")
+    app.logger.info(f"Index route: URL param = {request.args.get('month_select')}, Final active_month = {active_month}")
     
     # Check for a success message passed in the URL, used for redirects from edit pages
     flash_success = request.args.get('flash_success')
     if flash_success:
         flash(flash_success, 'success')
 
-    js_data = get_budget_data(active_month)
-
-    db = get_db()
-    available_months_rs = db.execute('''
-        SELECT DISTINCT strftime("%Y-%m", date) as month FROM expenses WHERE user_id = ?
-        UNION
-        SELECT DISTINCT month FROM income WHERE user_id = ?
-        UNION
-        SELECT DISTINCT month FROM emis WHERE user_id = ?
-        ORDER BY month DESC
-    ''', (current_user.id, current_user.id, current_user.id))
-    available_months = [row['month'] for row in db.fetchall(available_months_rs)]
-    category_options = get_user_category_options(current_user.id, active_month)
+    js_data, available_months, category_options = load_dashboard_data(get_db(), current_user.id, active_month)
 
     return render_template('index.html', 
                          js_data=js_data, 
@@ -1176,7 +3036,9 @@ def add_expense():
                VALUES (?, ?, ?, ?, ?, ?, ?)''',
             (current_user.id, month_for_db, date, category, description, float(amount), payment_type)
         )
+        mark_expense_dates_dirty(db, current_user.id, [date])
         db.commit()
+        invalidate_budget_data(current_user.id, [month_for_db])
         flash('Expense added successfully!', 'success')
     except ValueError:
         flash('Invalid amount entered. Please use numbers only.', 'error')
@@ -1203,14 +3065,17 @@ def api_add_expense():
     try:
         month_for_db = active_month
         db = get_db()
-        db.execute(
+        # fetchall steps the INSERT to completion, so the transaction can commit.
+        inserted, = db.fetchall(db.execute(
             '''INSERT INTO expenses (user_id, month, date, category, description, amount, payment_type)
-               VALUES (?, ?, ?, ?, ?, ?, ?)''',
+               VALUES (?, ?, ?, ?, ?, ?, ?) RETURNING id''',
             (current_user.id, month_for_db, date, category, description, float(amount), payment_type)
-        )
+        ))
+        mark_expense_dates_dirty(db, current_user.id, [date])
         db.commit()
-        
-        return jsonify({'status': 'success', 'message': 'Expense added successfully!'})
+        invalidate_budget_data(current_user.id, [month_for_db])
+
+        return mutation_response('Expense added successfully!', expense_ids=[inserted['id']])
     except ValueError:
         return jsonify({'status': 'error', 'message': 'Invalid amount. Please use numbers only.'}), 400
     except Exception as e:
@@ -1218,6 +3083,104 @@ def api_add_expense():
         return jsonify({'status': 'error', 'message': 'An error occurred while adding the expense.'}), 500
 
 
+@app.route('/api/import_expenses', methods=['POST'])
+@login_required
+def api_import_expenses():
+    """
+    Bulk-imports expenses from an uploaded CSV or OFX statement (multipart field
+    `file`). Optional form fields: format (csv or ofx, else taken from the file
+    name), dry_run, default_category and default_payment_type. Rows already
+    present with the same date, amount and description are skipped; invalid rows
+    are reported by row number without stopping the import.
+    """
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'status': 'error', 'message': 'Choose a CSV or OFX file to import.'}), 400
+    dry_run = request.form.get('dry_run', '').lower() in ('1', 'true', 'yes', 'on')
+
+    user_id = current_user.id
+    db = get_db()
+    try:
+        import_format = detect_format(upload.filename, request.form.get('format'))
+        summary = import_expenses(
+            db, user_id, PARSERS[import_format](upload.stream),
+            dry_run=dry_run,
+            default_category=request.form.get('default_category'),
+            default_payment_type=request.form.get('default_payment_type'),
+            extra_statements=lambda expenses: expense_dates_dirty_statements(user_id, [e['date'] for e in expenses])
+        )
+    except ImportFileError as e:
+        if not e.summary or not e.summary['total_rows']:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        if not dry_run and e.summary['months']:
+            invalidate_budget_data(user_id, e.summary['months'])
+        return jsonify({
+            'status': 'error',
+            'message': f"{e} {'Would import' if dry_run else 'Imported'} {e.summary['imported']} expenses before that.",
+            **e.summary
+        }), 400
+    except ImportAborted as e:
+        app.logger.error(f"Expense import for user {user_id} aborted after {e.summary['imported']} rows: {e}", exc_info=True)
+        if e.summary['months']:
+            invalidate_budget_data(user_id, e.summary['months'])
+        return jsonify({
+            'status': 'error',
+            'message': f"The import stopped after {e.summary['imported']} expenses because of a database error. "
+                       f"Importing the file again will skip the expenses already added.",
+            **e.summary
+        }), 500
+
+    if not dry_run and summary['months']:
+        invalidate_budget_data(user_id, summary['months'])
+    verb = 'Would import' if dry_run else 'Imported'
+    app.logger.info(f"Expense import for user {user_id}: {verb.lower()} {summary['imported']} of {summary['total_rows']} rows")
+    return jsonify({
+        'status': 'success',
+        'message': f"{verb} {summary['imported']} expenses; {summary['duplicates']} duplicates skipped, "
+                   f"{summary['error_count']} rows with errors.",
+        **summary
+    })
+
+
+# --- RECURRING INCOME / EMI ---
+# Income and EMIs are added as schedules (schedules.py) rather than copied into
+# each month; frequency=once adds a single one-off row to the month instead.
+
+def add_recurring_or_once(kind, label, amount_value, month):
+    """
+    Adds income / an EMI from the request's frequency, end_month and occurrences
+    fields and returns (success message, ids of the schedules added). Raises
+    ValueError for invalid fields.
+    """
+    spec = SCHEDULE_KINDS[kind]
+    form = request.form
+    if form.get('frequency') is None and not form.get('end_month') and not form.get('occurrences'):
+        # Clients that predate schedules get what they always did: the next three months.
+        form = {'frequency': 'monthly', 'occurrences': '3'}
+    noun = 'Income' if kind == 'income' else 'EMI'
+    db = get_db()
+
+    if (form.get('frequency') or '').strip().lower() == 'once':
+        db.execute(
+            f'INSERT INTO {spec.table} (user_id, {spec.label}, {spec.amount}, month) VALUES (?, ?, ?, ?)',
+            (current_user.id, label, amount_value, month)
+        )
+        db.commit()
+        invalidate_budget_data(current_user.id, [month])
+        return f'{noun} added for {month} successfully!', []
+
+    start_month, end_month, interval_months = schedule_fields(form, month)
+    now = datetime.utcnow().isoformat()
+    inserted, = db.fetchall(db.execute(
+        '''INSERT INTO schedules (user_id, kind, label, amount, start_month, end_month, interval_months, created_at, updated_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) RETURNING id''',
+        (current_user.id, kind, label, amount_value, start_month, end_month, interval_months, now, now)
+    ))
+    db.commit()
+    invalidate_all_budget_data(current_user.id)
+    return f'{noun} added {describe_schedule(start_month, end_month, interval_months)} successfully!', [inserted['id']]
+
+
 @app.route('/api/add_income', methods=['POST'])
 @login_required
 def api_add_income():
@@ -1229,24 +3192,15 @@ def api_add_income():
         return jsonify({'status': 'error', 'message': 'All fields are required!'}), 400
 
     try:
-        db = get_db()
-        num_months = 3  # Default to adding income for the next 3 months
-        start_month = datetime.strptime(month, '%Y-%m')
-        
-        queries = []
-        for i in range(num_months):
-            current_month_dt = start_month + relativedelta(months=i)
-            current_month_str = current_month_dt.strftime('%Y-%m')
-            queries.append(
-                ('INSERT INTO income (user_id, description, amount, month) VALUES (?, ?, ?, ?)',
-                (current_user.id, description, float(amount), current_month_str))
-            )
-        
-        db.execute_batch(queries)
-        message = f'Income added for {num_months} months successfully!'
-        return jsonify({'status': 'success', 'message': message})
+        amount_value = float(amount)
     except ValueError:
         return jsonify({'status': 'error', 'message': 'Invalid amount. Please use numbers only.'}), 400
+
+    try:
+        message, schedule_ids = add_recurring_or_once('income', description, amount_value, month)
+        return mutation_response(message, lists=['income'], schedule_ids=schedule_ids)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error adding income via API: {e}", exc_info=True)
         return jsonify({'status': 'error', 'message': 'An error occurred while adding the income.'}), 500
@@ -1262,29 +3216,120 @@ def api_add_emi():
         return jsonify({'status': 'error', 'message': 'All fields are required!'}), 400
     
     try:
-        db = get_db()
-        num_months = 3  # Default to adding EMI for the next 3 months
-        start_month = datetime.strptime(month, '%Y-%m')
-
-        queries = []
-        for i in range(num_months):
-            current_month_dt = start_month + relativedelta(months=i)
-            current_month_str = current_month_dt.strftime('%Y-%m')
-            queries.append(
-                ('INSERT INTO emis (user_id, loan_name, emi_amount, month) VALUES (?, ?, ?, ?)',
-                (current_user.id, loan_name, float(emi_amount), current_month_str))
-            )
-
-        db.execute_batch(queries)
-        message = f'EMI added for {num_months} months successfully!'
-        return jsonify({'status': 'success', 'message': message})
+        amount_value = float(emi_amount)
     except ValueError:
         return jsonify({'status': 'error', 'message': 'Invalid amount. Please use numbers only.'}), 400
+
+    try:
+        message, schedule_ids = add_recurring_or_once('emi', loan_name, amount_value, month)
+        return mutation_response(message, lists=['emi'], schedule_ids=schedule_ids)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
         app.logger.error(f"Error adding EMI via API: {e}", exc_info=True)
         return jsonify({'status': 'error', 'message': 'An error occurred while adding the EMI.'}), 500
 
 
+def get_schedule(db, user_id, schedule_id):
+    rs = db.execute('SELECT * FROM schedules WHERE id = ? AND user_id = ?', (schedule_id, user_id))
+    return db.fetchone(rs)
+
+
+@app.route('/api/schedules', methods=['GET'])
+@login_required
+def api_schedules():
+    """The user's recurring income / EMI series, optionally filtered by kind."""
+    kind = request.args.get('kind')
+    if kind and kind not in SCHEDULE_KINDS:
+        return jsonify({'status': 'error', 'message': 'kind must be income or emi.'}), 400
+    db = get_db()
+    if kind:
+        rs = db.execute('SELECT * FROM schedules WHERE user_id = ? AND kind = ? ORDER BY start_month, id', (current_user.id, kind))
+    else:
+        rs = db.execute('SELECT * FROM schedules WHERE user_id = ? ORDER BY kind, start_month, id', (current_user.id,))
+    return jsonify({'status': 'success', 'schedules': db.fetchall(rs)})
+
+
+@app.route('/api/edit_schedule/<int:schedule_id>', methods=['POST'])
+@login_required
+def api_edit_schedule(schedule_id):
+    """
+    Updates a whole series in one write. Form fields: label (or description /
+    loan_name), amount (or emi_amount), and optionally frequency and end_month
+    (empty for open-ended).
+    """
+    label = request.form.get('label') or request.form.get('description') or request.form.get('loan_name')
+    amount = request.form.get('amount') or request.form.get('emi_amount')
+    if not all([label, amount]):
+        return jsonify({'status': 'error', 'message': 'All fields are required!'}), 400
+
+    try:
+        amount_value = float(amount)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid amount. Please use numbers only.'}), 400
+
+    try:
+        db = get_db()
+        schedule = get_schedule(db, current_user.id, schedule_id)
+        if schedule is None:
+            return jsonify({'status': 'error', 'message': 'Recurring entry not found.'}), 404
+        end_month, interval_months = schedule['end_month'], schedule['interval_months']
+        if 'frequency' in request.form or 'end_month' in request.form:
+            _, end_month, interval_months = schedule_fields({
+                'frequency': request.form.get('frequency') or next(
+                    (name for name, months in FREQUENCIES.items() if months == interval_months), 'monthly'),
+                'end_month': request.form.get('end_month', end_month or ''),
+            }, schedule['start_month'])
+        db.execute(
+            '''UPDATE schedules SET label = ?, amount = ?, end_month = ?, interval_months = ?, updated_at = ?
+               WHERE id = ? AND user_id = ?''',
+            (label, amount_value, end_month, interval_months, datetime.utcnow().isoformat(), schedule_id, current_user.id)
+        )
+        db.commit()
+        invalidate_all_budget_data(current_user.id)
+        return mutation_response('Recurring entry updated for every month.', lists=[schedule['kind']],
+                                 schedule_ids=[schedule_id])
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        app.logger.error(f"Error updating schedule {schedule_id} via API: {e}")
+        return jsonify({'status': 'error', 'message': 'An error occurred while updating the recurring entry.'}), 500
+
+
+@app.route('/api/delete_schedule/<int:schedule_id>', methods=['POST'])
+@login_required
+def api_delete_schedule(schedule_id):
+    """
+    With from_month, stops the series before that month and keeps earlier months;
+    without it (or from the series' first month) deletes the whole series.
+    """
+    from_month = request.form.get('from_month') or (request.get_json(silent=True) or {}).get('from_month')
+    if from_month and not MONTH_PATTERN.match(from_month):
+        return jsonify({'status': 'error', 'message': f'Invalid month: {from_month!r}. Use YYYY-MM.'}), 400
+    try:
+        db = get_db()
+        schedule = get_schedule(db, current_user.id, schedule_id)
+        if schedule is None:
+            return jsonify({'status': 'error', 'message': 'Recurring entry not found.'}), 404
+        if from_month and from_month > schedule['start_month']:
+            end_month = (datetime.strptime(from_month, '%Y-%m') - relativedelta(months=1)).strftime('%Y-%m')
+            if schedule['end_month'] is None or schedule['end_month'] > end_month:
+                db.execute(
+                    'UPDATE schedules SET end_month = ?, updated_at = ? WHERE id = ? AND user_id = ?',
+                    (end_month, datetime.utcnow().isoformat(), schedule_id, current_user.id)
+                )
+            message = f'Recurring entry stopped from {from_month}.'
+        else:
+            db.execute('DELETE FROM schedules WHERE id = ? AND user_id = ?', (schedule_id, current_user.id))
+            message = 'Recurring entry deleted.'
+        db.commit()
+        invalidate_all_budget_data(current_user.id)
+        return mutation_response(message, lists=[schedule['kind']], schedule_ids=[schedule_id])
+    except Exception as e:
+        app.logger.error(f"Error deleting schedule {schedule_id}: {e}")
+        return jsonify({'status': 'error', 'message': 'An error occurred while deleting the recurring entry.'}), 500
+
+
 @app.route('/set_budget', methods=['POST'])
 @login_required
 def set_budget():
@@ -1333,10 +3378,7 @@ def set_budget():
         return redirect(url_for('index', month_select=active_month))
 
     try:
-        db = get_db()
-        for category_name, amount in budget_map.items():
-            upsert_budget_amount(db, current_user.id, active_month, category_name, amount)
-        db.commit()
+        save_budgets(get_db(), current_user.id, [active_month], budget_map)
     except Exception as e:
         app.logger.error(f"Error setting budget: {e}")
         flash('An error occurred while setting budget categories.', 'error')
@@ -1357,10 +3399,8 @@ def api_set_budget():
         return jsonify({'status': 'error', 'message': 'All fields are required!'}), 400
 
     try:
-        db = get_db()
-        upsert_budget_amount(db, current_user.id, active_month, category, float(amount))
-        db.commit()
-        return jsonify({'status': 'success', 'message': 'Budget set successfully!'})
+        save_budgets(get_db(), current_user.id, [active_month], {category: float(amount)})
+        return mutation_response('Budget set successfully!')
     except ValueError:
         return jsonify({'status': 'error', 'message': 'Invalid amount. Please use numbers only.'}), 400
     except Exception as e:
@@ -1377,8 +3417,11 @@ def api_set_budgets():
         return jsonify({'status': 'error', 'message': 'Month is required!'}), 400
 
     try:
-        db = get_db()
-        num_months = 3  # Default to propagating the budget for the next 3 months
+        num_months = budget_horizon_months(request.form.get('horizon_months'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    try:
         start_month = datetime.strptime(active_month, '%Y-%m')
         categories = request.form.getlist('budget_category[]')
         amounts = request.form.getlist('budget_amount[]')
@@ -1401,13 +3444,8 @@ def api_set_budgets():
         if not budget_map:
             return jsonify({'status': 'error', 'message': 'Add at least one budget category and amount.'}), 400
         
-        for i in range(num_months):
-            current_month_dt = start_month + relativedelta(months=i)
-            current_month_str = current_month_dt.strftime('%Y-%m')
-
-            for category, amount in budget_map.items():
-                upsert_budget_amount(db, current_user.id, current_month_str, category, amount)
-        db.commit()
+        updated_months = [(start_month + relativedelta(months=i)).strftime('%Y-%m') for i in range(num_months)]
+        save_budgets(get_db(), current_user.id, updated_months, budget_map)
         message = f'Budget updated for {num_months} months successfully!'
         return jsonify({'status': 'success', 'message': message})
     except ValueError as e:
@@ -1462,8 +3500,13 @@ def delete_expense(expense_id):
     active_month = request.args.get('month_select', default=smart_default)
     try:
         db = get_db()
+        expense = get_expense_month_and_date(db, current_user.id, expense_id)
         db.execute('DELETE FROM expenses WHERE id = ? AND user_id = ?', (expense_id, current_user.id))
+        if expense:
+            mark_expense_dates_dirty(db, current_user.id, [expense['date']])
         db.commit()
+        if expense:
+            invalidate_budget_data(current_user.id, [expense['month']])
         flash('Expense deleted successfully!', 'success')
     except Exception as e:
         app.logger.error(f"Error deleting expense {expense_id}: {e}")
@@ -1488,11 +3531,14 @@ def edit_expense(expense_id):
         # Use the active_month from the form, not the expense's date
         month_for_db = request.form.get('month_select', active_month)
 
+        previous = get_expense_month_and_date(db, current_user.id, expense_id) or {}
         db.execute('''UPDATE expenses 
                    SET month = ?, date = ?, category = ?, description = ?, amount = ?, payment_type = ?
                    WHERE id = ? AND user_id = ?''',
                    (month_for_db, date, category, description, float(amount), payment_type, expense_id, current_user.id))
+        mark_expense_dates_dirty(db, current_user.id, [previous.get('date'), date])
         db.commit()
+        invalidate_budget_data(current_user.id, [previous.get('month'), month_for_db])
         flash('Expense updated successfully!', 'success')
         return redirect(url_for('index', month_select=month_for_db))
 
@@ -1584,15 +3630,19 @@ def api_edit_item(item_id):
 
     try:
         month_for_db = active_month
+        amount_value = float(amount)
         db = get_db()
+        previous = get_expense_month_and_date(db, current_user.id, item_id) or {}
         db.execute(
             """UPDATE expenses 
                SET date = ?, category = ?, description = ?, amount = ?, payment_type = ?, month = ?
                WHERE id = ? AND user_id = ?""",
-            (date, category, description, float(amount), payment_type, month_for_db, item_id, current_user.id)
+            (date, category, description, amount_value, payment_type, month_for_db, item_id, current_user.id)
         )
+        mark_expense_dates_dirty(db, current_user.id, [previous.get('date'), date])
         db.commit()
-        return jsonify({'status': 'success', 'message': 'Expense updated successfully!'})
+        invalidate_budget_data(current_user.id, [previous.get('month'), month_for_db])
+        return mutation_response('Expense updated successfully!', expense_ids=[item_id])
     except ValueError:
         return jsonify({'status': 'error', 'message': 'Invalid amount. Please use numbers only.'}), 400
     except Exception as e:
@@ -1613,15 +3663,16 @@ def api_edit_emi(emi_id):
         return jsonify({'status': 'error', 'message': 'All fields are required!'}), 400
 
     try:
+        amount_value = float(emi_amount)
         db = get_db()
+        emi_month = get_record_month(db, 'emis', current_user.id, emi_id)
         db.execute(
             'UPDATE emis SET loan_name = ?, emi_amount = ? WHERE id = ? AND user_id = ?',
-            (loan_name, float(emi_amount), emi_id, current_user.id)
+            (loan_name, amount_value, emi_id, current_user.id)
         )
         db.commit()
-        message = 'EMI updated successfully!'
-
-        return jsonify({'status': 'success', 'message': message})
+        invalidate_budget_data(current_user.id, [emi_month])
+        return mutation_response('EMI updated successfully!', lists=['emi'])
     except ValueError:
         return jsonify({'status': 'error', 'message': 'Invalid amount. Please use numbers only.'}), 400
     except Exception as e:
@@ -1655,13 +3706,17 @@ def api_edit_expense(expense_id):
             month = data.get('month', '')
             if not all([date, category, description, amount, payment_type, month]):
                 return jsonify({'status': 'error', 'message': 'All fields are required.'}), 400
+            amount_value = float(amount)
+            previous = get_expense_month_and_date(db, current_user.id, expense_id) or {}
             db.execute(
                 '''UPDATE expenses SET month=?, date=?, category=?, description=?, amount=?, payment_type=?
                    WHERE id=? AND user_id=?''',
-                (month, date, category, description, float(amount), payment_type, expense_id, current_user.id)
+                (month, date, category, description, amount_value, payment_type, expense_id, current_user.id)
             )
+            mark_expense_dates_dirty(db, current_user.id, [previous.get('date'), date])
             db.commit()
-            return jsonify({'status': 'success', 'message': 'Expense updated successfully!'})
+            invalidate_budget_data(current_user.id, [previous.get('month'), month])
+            return mutation_response('Expense updated successfully!', expense_ids=[expense_id])
         except Exception as e:
             app.logger.error(f"Error updating expense {expense_id}: {e}")
             return jsonify({'status': 'error', 'message': 'Failed to update expense.'}), 500
@@ -1672,9 +3727,14 @@ def api_edit_expense(expense_id):
 def api_delete_expense_post(item_id):
     try:
         db = get_db()
+        expense = get_expense_month_and_date(db, current_user.id, item_id)
         db.execute('DELETE FROM expenses WHERE id = ? AND user_id = ?', (item_id, current_user.id))
+        if expense:
+            mark_expense_dates_dirty(db, current_user.id, [expense['date']])
         db.commit()
-        return jsonify({'status': 'success', 'message': 'Expense deleted successfully!'})
+        if expense:
+            invalidate_budget_data(current_user.id, [expense['month']])
+        return mutation_response('Expense deleted successfully!', expense_ids=[item_id])
     except Exception as e:
         app.logger.error(f"Error deleting expense {item_id}: {e}")
         return jsonify({'status': 'error', 'message': 'An error occurred while deleting the expense.'}), 500
@@ -1684,9 +3744,11 @@ def api_delete_expense_post(item_id):
 def api_delete_income(income_id):
     try:
         db = get_db()
+        income_month = get_record_month(db, 'income', current_user.id, income_id)
         db.execute('DELETE FROM income WHERE id = ? AND user_id = ?', (income_id, current_user.id))
         db.commit()
-        return jsonify({'status': 'success', 'message': 'Income record deleted successfully!'})
+        invalidate_budget_data(current_user.id, [income_month])
+        return mutation_response('Income record deleted successfully!', lists=['income'])
     except Exception as e:
         app.logger.error(f"Error deleting income {income_id}: {e}")
         return jsonify({'status': 'error', 'message': 'An error occurred while deleting the income record.'}), 500
@@ -1696,9 +3758,11 @@ def api_delete_income(income_id):
 def api_delete_emi(emi_id):
     try:
         db = get_db()
+        emi_month = get_record_month(db, 'emis', current_user.id, emi_id)
         db.execute('DELETE FROM emis WHERE id = ? AND user_id = ?', (emi_id, current_user.id))
         db.commit()
-        return jsonify({'status': 'success', 'message': 'EMI record deleted successfully!'})
+        invalidate_budget_data(current_user.id, [emi_month])
+        return mutation_response('EMI record deleted successfully!', lists=['emi'])
     except Exception as e:
         app.logger.error(f"Error deleting EMI {emi_id}: {e}")
         return jsonify({'status': 'error', 'message': 'An error occurred while deleting the EMI record.'}), 500
@@ -1743,18 +3807,19 @@ def api_edit_budget(budget_id):
             'UPDATE budgets SET category = ?, amount = ? WHERE id = ? AND user_id = ?',
             (category, amount, budget_id, current_user.id)
         )
+        mark_weekly_budgets_dirty(db, current_user.id, [current_budget['month']])
         db.commit()
-        
-        return jsonify({
-            'status': 'success',
-            'message': 'Budget record updated successfully!',
-            'budget': {
+        invalidate_budget_data(current_user.id, [current_budget['month']])
+
+        return mutation_response(
+            'Budget record updated successfully!',
+            budget={
                 'id': budget_id,
                 'category': category,
                 'amount': amount,
                 'month': current_budget['month']
             }
-        })
+        )
     except Exception as e:
         app.logger.error(f"Error editing budget {budget_id}: {e}", exc_info=True)
         return jsonify({'status': 'error', 'message': 'An error occurred while editing the budget record.'}), 500
@@ -1765,9 +3830,12 @@ def api_delete_budget(budget_id):
     """Inline delete for budget records."""
     try:
         db = get_db()
+        budget_month = get_record_month(db, 'budgets', current_user.id, budget_id)
         db.execute('DELETE FROM budgets WHERE id = ? AND user_id = ?', (budget_id, current_user.id))
+        mark_weekly_budgets_dirty(db, current_user.id, [budget_month])
         db.commit()
-        return jsonify({'status': 'success', 'message': 'Budget record deleted successfully!'})
+        invalidate_budget_data(current_user.id, [budget_month])
+        return mutation_response('Budget record deleted successfully!')
     except Exception as e:
         app.logger.error(f"Error deleting budget {budget_id}: {e}", exc_info=True)
         return jsonify({'status': 'error', 'message': 'An error occurred while deleting the budget record.'}), 500
@@ -1776,236 +3844,283 @@ def api_delete_budget(budget_id):
 @app.route('/generate_report')
 @login_required
 def generate_report():
-    # This route will generate a report for the current month.
-    active_month = datetime.now().strftime('%Y-%m')
-    db = get_db()
+    """
+    Streams a report as CSV or Excel. Query parameters: shape (budget_vs_actual,
+    ledger or category_pivot), start_month / end_month (YYYY-MM) and format
+    (csv or xlsx). Defaults to this month's budget vs. actual CSV.
+    """
+    start_month = request.args.get('start_month') or request.args.get('month_select') or datetime.now().strftime('%Y-%m')
+    end_month = request.args.get('end_month') or start_month
+    try:
+        export = build_export(
+            get_db(), current_user.id,
+            request.args.get('shape', 'budget_vs_actual'), start_month, end_month,
+            request.args.get('format', 'csv')
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    app.logger.info(f"Streaming report {export.filename} for user {current_user.id}")
+    return Response(
+        stream_with_context(export.chunks),
+        mimetype=export.mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{export.filename}"'}
+    )
 
-    # Fetch data for current user
-    expenses_rs = db.execute('SELECT * FROM expenses WHERE strftime("%Y-%m", date) = ? AND user_id = ?', (active_month, current_user.id))
-    expenses = db.fetchall(expenses_rs)
+# --- PDF REPORTS ---
+# report_pdf.html is rendered to PDF by pdf_reports.ReportJobStore in a background
+# process pool; the endpoints below only enqueue jobs and serve finished files.
+
+_report_job_store = None
+_report_job_store_lock = threading.Lock()
+
+
+def get_report_job_store():
+    global _report_job_store
+    if _report_job_store is None:
+        with _report_job_store_lock:
+            if _report_job_store is None:
+                _report_job_store = ReportJobStore(
+                    os.environ.get('REPORT_CACHE_DIR', host_cache_path('reports')),
+                    max_workers=int(os.environ.get('REPORT_WORKERS', 1)),
+                    job_timeout=float(os.environ.get('REPORT_JOB_TIMEOUT', 300)),
+                    logger=app.logger
+                )
+    return _report_job_store
+
+
+def load_report_pdf_data(db, user_id, month):
+    """Everything report_pdf.html shows for a month, fetched in one batch."""
+    totals_rows, expenses, income, emis, budgets = db.fetchall_batch([
+        month_totals_statement(user_id, month),
+        ('SELECT date, category, description, amount FROM expenses WHERE month = ? AND user_id = ? ORDER BY date, id',
+         (month, user_id)),
+        month_rows_statement(user_id, 'income', month),
+        month_rows_statement(user_id, 'emi', month),
+        ('SELECT category, amount FROM budgets WHERE month = ? AND user_id = ? ORDER BY category', (month, user_id)),
+    ])
+    totals = month_totals_from_rows(totals_rows)
+    return {
+        'month': month,
+        'total_income': totals.total_income,
+        'total_expenses': totals.total_expenses,
+        'total_emis': totals.total_emi,
+        'total_budgeted': totals.total_budget,
+        'net_savings': totals.net_savings,
+        'income_data': [{'description': row['description'], 'amount': row['amount']} for row in income],
+        'expenses_data': expenses,
+        'emis_data': [{'loan_name': row['loan_name'], 'emi_amount': row['emi_amount']} for row in emis],
+        'budget_data': budgets,
+    }
 
-    income_rs = db.execute('SELECT * FROM income WHERE month = ? AND user_id = ?', (active_month, current_user.id))
-    income = db.fetchall(income_rs)
 
-    emis_rs = db.execute('SELECT * FROM emis WHERE month = ? AND user_id = ?', (active_month, current_user.id))
-    emis = db.fetchall(emis_rs)
+def report_job_payload(job):
+    payload = {
+        'status': 'success',
+        'job_id': job['job_id'],
+        'month': job['month'],
+        'state': job['state'],
+        'status_url': url_for('api_pdf_report_status', job_id=job['job_id']),
+    }
+    if job['state'] == 'done':
+        payload['download_url'] = url_for('api_download_pdf_report', job_id=job['job_id'])
+    elif job['state'] == 'failed':
+        payload['message'] = 'The PDF report could not be generated. Please try again.'
+    return payload
 
-    budget_rs = db.execute('SELECT category, amount FROM budgets WHERE month = ? AND user_id = ?', (active_month, current_user.id))
-    budget = {row['category']: row['amount'] for row in db.fetchall(budget_rs)}
 
-    # Calculate totals
-    total_income = sum(i['amount'] for i in income)
-    total_expenses = sum(e['amount'] for e in expenses)
-    total_emi = sum(e['emi_amount'] for e in emis)
-    total_budget = sum(budget.values())
-    remaining_budget = total_budget - total_expenses
-    net_savings = total_income - (total_expenses + total_emi)
+@app.route('/api/reports/pdf', methods=['POST'])
+@login_required
+def api_enqueue_pdf_report():
+    """Starts rendering a month's PDF report, or returns the finished one if the month is unchanged."""
+    data = request.get_json(silent=True) or request.form
+    month = data.get('month') or data.get('month_select')
+    if not month or not MONTH_PATTERN.match(month):
+        return jsonify({'status': 'error', 'message': 'A month in YYYY-MM format is required.'}), 400
 
-    # Generate CSV report
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Category', 'Budgeted Amount', 'Actual Amount', 'Difference'])
-    
-    for category, budgeted_amount in budget.items():
-        actual_amount = sum(e['amount'] for e in expenses if e['category'] == category)
-        difference = budgeted_amount - actual_amount
-        writer.writerow([category, budgeted_amount, actual_amount, difference])
+    try:
+        report_data = load_report_pdf_data(get_db(), current_user.id, month)
+        job = get_report_job_store().enqueue(
+            current_user.id, month, report_data_version(report_data),
+            lambda: render_template(
+                'report_pdf.html', report_date=datetime.now().strftime('%Y-%m-%d %H:%M'), **report_data
+            )
+        )
+    except Exception as e:
+        app.logger.error(f"Error enqueueing PDF report for month {month}: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': 'An internal error occurred.'}), 500
 
-    # Add summary row
-    writer.writerow(['Total', total_budget, total_expenses, total_budget - total_expenses])
+    return jsonify(report_job_payload(job)), 200 if job['state'] == 'done' else 202
 
-    output.seek(0)
 
-    return send_file(
-        output,
-        mimetype="text/csv",
-        as_attachment=True,
-        download_name=f"budget_report_{active_month}.csv"
-    )
+@app.route('/api/reports/pdf/<job_id>', methods=['GET'])
+@login_required
+def api_pdf_report_status(job_id):
+    job = get_report_job_store().status(current_user.id, job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Report job not found.'}), 404
+    return jsonify(report_job_payload(job))
 
-# --- COPY FROM PREVIOUS MONTH ENDPOINTS ---
 
-@app.route('/api/copy_income_from_previous', methods=['POST'])
+@app.route('/api/reports/pdf/<job_id>/download', methods=['GET'])
 @login_required
-def copy_income_from_previous():
-    """Copy income records from the previous month to the current month."""
+def api_download_pdf_report(job_id):
+    pdf_path = get_report_job_store().pdf_path(current_user.id, job_id)
+    if pdf_path is None:
+        return jsonify({'status': 'error', 'message': 'Report is not ready.'}), 404
+    month = job_id[:7]  # Job ids start with the report month
+    return send_file(pdf_path, mimetype='application/pdf', as_attachment=True, download_name=f"budget_report_{month}.pdf")
+
+# --- COPY FROM PREVIOUS MONTH ENDPOINTS ---
+# All month copies go through rollover.run_rollover: one batched read, then one
+# transaction of DELETE + INSERT ... SELECT per target month that differs.
+
+def rollover_side_effect_statements(user_id, changes):
+    """Extra statements for a rollover's transaction: budget changes invalidate weekly budgets."""
+    statement = weekly_budgets_dirty_statement(
+        user_id, [change['target_month'] for change in changes if change['table'] == 'budgets']
+    )
+    return [statement] if statement is not None else []
+
+
+def apply_rollover(user_id, table_names, pairs, dry_run=False):
+    changes = run_rollover(
+        get_db(), user_id, table_names, pairs, dry_run=dry_run,
+        extra_statements=lambda applied: rollover_side_effect_statements(user_id, applied)
+    )
+    changed_months = sorted({change['target_month'] for change in changes if change['applied']})
+    if changed_months:
+        invalidate_budget_data(user_id, changed_months)
+    return changes
+
+
+# (table, noun for copied rows, noun for the table's data) used in the copy endpoints' messages.
+COPY_FROM_PREVIOUS_LABELS = {
+    'income': ('income records', 'income records', 'income'),
+    'budgets': ('budget categories', 'budget records', 'budget'),
+    'emis': ('EMI records', 'EMI records', 'EMI'),
+}
+
+
+def copy_from_previous_month(table_name, error_subject):
+    copied_noun, records_noun, data_noun = COPY_FROM_PREVIOUS_LABELS[table_name]
     try:
-        app.logger.info(f"Copy income request received. Request data: {request.json}")
-        current_month = request.json.get('current_month')
-        app.logger.info(f"Current month from request: {current_month}")
-        
+        current_month = (request.get_json(silent=True) or {}).get('current_month')
         if not current_month:
             return jsonify({'status': 'error', 'message': 'Current month is required'}), 400
-        
-        # Calculate previous month
-        current_date = datetime.strptime(current_month, '%Y-%m')
-        previous_date = current_date - relativedelta(months=1)
-        previous_month = previous_date.strftime('%Y-%m')
-        
-        db = get_db()
-        
-        # Get income records from previous month for current user
-        previous_income_rs = db.execute('SELECT description, amount FROM income WHERE month = ? AND user_id = ?', (previous_month, current_user.id))
-        previous_income = db.fetchall(previous_income_rs)
-        
-        if not previous_income:
-            # Check what months have income data to provide helpful suggestions
-            available_months_rs = db.execute('SELECT DISTINCT month FROM income WHERE user_id = ? ORDER BY month DESC LIMIT 5', (current_user.id,))
+        previous_month, current_month = previous_month_pair(current_month)
+
+        changes = apply_rollover(current_user.id, [table_name], [(previous_month, current_month)])
+        copied_count = changes[0]['source_count']
+
+        schedule_kind = next((kind for kind, spec in SCHEDULE_KINDS.items() if spec.table == table_name), None)
+        if not copied_count and schedule_kind:
+            # Recurring entries are never copied: each month shows its own occurrences.
+            schedule_filter, schedule_params = occurrence_filter(current_user.id, schedule_kind, previous_month)
+            db = get_db()
+            recurring, = db.fetchall(db.execute(
+                f'SELECT COUNT(*) AS count FROM schedules s WHERE {schedule_filter}', schedule_params
+            ))
+            if recurring['count']:
+                return jsonify({
+                    'status': 'success',
+                    'message': f"Nothing to copy from {previous_month}: its {recurring['count']} {records_noun} are recurring "
+                               f"and already appear in every month they repeat in.",
+                    'copied_count': 0,
+                    'changes': changes[0]
+                })
+
+        if not copied_count:
+            # Check what months have data to provide helpful suggestions
+            db = get_db()
+            available_months_rs = db.execute(
+                f'SELECT DISTINCT month FROM {table_name} WHERE user_id = ? ORDER BY month DESC LIMIT 5', (current_user.id,)
+            )
             available_months = [row['month'] for row in db.fetchall(available_months_rs)]
-            
             if available_months:
                 months_text = ', '.join(available_months)
-                return jsonify({
-                    'status': 'error', 
-                    'message': f'No income records found for {previous_month}. Available months with income data: {months_text}'
-                }), 404
+                message = f'No {records_noun} found for {previous_month}. Available months with {data_noun} data: {months_text}'
             else:
-                return jsonify({
-                    'status': 'error', 
-                    'message': f'No income records found for {previous_month}. No income data exists in the database yet.'
-                }), 404
-        
-        # Delete existing income for current month
-        db.execute('DELETE FROM income WHERE month = ? AND user_id = ?', (current_month, current_user.id))
-        
-        # Copy income records to current month
-        copied_count = 0
-        for record in previous_income:
-            db.execute('INSERT INTO income (user_id, month, description, amount) VALUES (?, ?, ?, ?)',
-                      (current_user.id, current_month, record['description'], record['amount']))
-            copied_count += 1
-        
-        db.commit()
-        
+                message = f'No {records_noun} found for {previous_month}. No {data_noun} data exists in the database yet.'
+            return jsonify({'status': 'error', 'message': message}), 404
+
         return jsonify({
-            'status': 'success', 
-            'message': f'Copied {copied_count} income records from {previous_month}',
-            'copied_count': copied_count
+            'status': 'success',
+            'message': f'Copied {copied_count} {copied_noun} from {previous_month}',
+            'copied_count': copied_count,
+            'changes': changes[0]
         })
-        
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     except Exception as e:
-        app.logger.error(f"Error copying income from previous month: {e}")
-        return jsonify({'status': 'error', 'message': 'An error occurred while copying income records'}), 500
+        app.logger.error(f"Error copying {data_noun} from previous month: {e}")
+        return jsonify({'status': 'error', 'message': f'An error occurred while copying {error_subject}'}), 500
+
+
+@app.route('/api/copy_income_from_previous', methods=['POST'])
+@login_required
+def copy_income_from_previous():
+    """Copy income records from the previous month to the current month."""
+    return copy_from_previous_month('income', 'income records')
 
 
 @app.route('/api/copy_budget_from_previous', methods=['POST'])
 @login_required
 def copy_budget_from_previous():
     """Copy budget settings from the previous month to the current month."""
-    try:
-        current_month = request.json.get('current_month')
-        if not current_month:
-            return jsonify({'status': 'error', 'message': 'Current month is required'}), 400
-        
-        # Calculate previous month
-        current_date = datetime.strptime(current_month, '%Y-%m')
-        previous_date = current_date - relativedelta(months=1)
-        previous_month = previous_date.strftime('%Y-%m')
-        
-        db = get_db()
-        
-        # Get budget records from previous month for current user
-        previous_budget_rs = db.execute('SELECT category, amount FROM budgets WHERE month = ? AND user_id = ?', (previous_month, current_user.id))
-        previous_budget = db.fetchall(previous_budget_rs)
-        
-        if not previous_budget:
-            # Check what months have budget data to provide helpful suggestions
-            available_months_rs = db.execute('SELECT DISTINCT month FROM budgets WHERE user_id = ? ORDER BY month DESC LIMIT 5', (current_user.id,))
-            available_months = [row['month'] for row in db.fetchall(available_months_rs)]
-            
-            if available_months:
-                months_text = ', '.join(available_months)
-                return jsonify({
-                    'status': 'error', 
-                    'message': f'No budget records found for {previous_month}. Available months with budget data: {months_text}'
-                }), 404
-            else:
-                return jsonify({
-                    'status': 'error', 
-                    'message': f'No budget records found for {previous_month}. No budget data exists in the database yet.'
-                }), 404
-        
-        # Delete existing budget for current month
-        db.execute('DELETE FROM budgets WHERE month = ? AND user_id = ?', (current_month, current_user.id))
-        
-        # Copy budget records to current month
-        copied_count = 0
-        for record in previous_budget:
-            db.execute('INSERT INTO budgets (user_id, month, category, amount) VALUES (?, ?, ?, ?)',
-                      (current_user.id, current_month, record['category'], record['amount']))
-            copied_count += 1
-        
-        db.commit()
-        
-        return jsonify({
-            'status': 'success', 
-            'message': f'Copied {copied_count} budget categories from {previous_month}',
-            'copied_count': copied_count
-        })
-        
-    except Exception as e:
-        app.logger.error(f"Error copying budget from previous month: {e}")
-        return jsonify({'status': 'error', 'message': 'An error occurred while copying budget settings'}), 500
+    return copy_from_previous_month('budgets', 'budget settings')
 
 
 @app.route('/api/copy_emi_from_previous', methods=['POST'])
 @login_required
 def copy_emi_from_previous():
     """Copy EMI records from the previous month to the current month."""
+    return copy_from_previous_month('emis', 'EMI records')
+
+
+@app.route('/api/rollover', methods=['POST'])
+@login_required
+def api_rollover():
+    """
+    Copies income, EMIs and/or budgets from a source month or range onto a target
+    month or range in one transaction. JSON body: source_month or source_start /
+    source_end, target_month or target_start / target_end, tables (default all
+    three) and dry_run. Returns what changed (or would change) per table and month.
+    """
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({'status': 'error', 'message': 'Expected a JSON object.'}), 400
+    table_names = payload.get('tables') or list(ROLLOVER_TABLES)
+    if not isinstance(table_names, list):
+        return jsonify({'status': 'error', 'message': 'tables must be a list of income, emis and/or budgets.'}), 400
+    unknown_tables = [name for name in table_names if name not in ROLLOVER_TABLES]
+    if unknown_tables:
+        return jsonify({'status': 'error', 'message': f"Unknown tables: {', '.join(map(str, unknown_tables))}. Use income, emis or budgets."}), 400
     try:
-        current_month = request.json.get('current_month')
-        if not current_month:
-            return jsonify({'status': 'error', 'message': 'Current month is required'}), 400
-        
-        # Calculate previous month
-        current_date = datetime.strptime(current_month, '%Y-%m')
-        previous_date = current_date - relativedelta(months=1)
-        previous_month = previous_date.strftime('%Y-%m')
-        
-        db = get_db()
-        
-        # Get EMI records from previous month for current user
-        previous_emi_rs = db.execute('SELECT loan_name, emi_amount FROM emis WHERE month = ? AND user_id = ?', (previous_month, current_user.id))
-        previous_emi = db.fetchall(previous_emi_rs)
-        
-        if not previous_emi:
-            # Check what months have EMI data to provide helpful suggestions
-            available_months_rs = db.execute('SELECT DISTINCT month FROM emis WHERE user_id = ? ORDER BY month DESC LIMIT 5', (current_user.id,))
-            available_months = [row['month'] for row in db.fetchall(available_months_rs)]
-            
-            if available_months:
-                months_text = ', '.join(available_months)
-                return jsonify({
-                    'status': 'error', 
-                    'message': f'No EMI records found for {previous_month}. Available months with EMI data: {months_text}'
-                }), 404
-            else:
-                return jsonify({
-                    'status': 'error', 
-                    'message': f'No EMI records found for {previous_month}. No EMI data exists in the database yet.'
-                }), 404
-        
-        # Delete existing EMI for current month
-        db.execute('DELETE FROM emis WHERE month = ? AND user_id = ?', (current_month, current_user.id))
-        
-        # Copy EMI records to current month
-        copied_count = 0
-        for record in previous_emi:
-            db.execute('INSERT INTO emis (user_id, month, loan_name, emi_amount) VALUES (?, ?, ?, ?)',
-                      (current_user.id, current_month, record['loan_name'], record['emi_amount']))
-            copied_count += 1
-        
-        db.commit()
-        
-        return jsonify({
-            'status': 'success', 
-            'message': f'Copied {copied_count} EMI records from {previous_month}',
-            'copied_count': copied_count
-        })
-        
+        source_start = payload.get('source_start') or payload.get('source_month')
+        target_start = payload.get('target_start') or payload.get('target_month')
+        pairs = month_pairs(
+            source_start, payload.get('source_end') or source_start,
+            target_start, payload.get('target_end') or target_start
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    dry_run = bool(payload.get('dry_run'))
+    try:
+        changes = apply_rollover(current_user.id, table_names, pairs, dry_run=dry_run)
     except Exception as e:
-        app.logger.error(f"Error copying EMI from previous month: {e}")
-        return jsonify({'status': 'error', 'message': 'An error occurred while copying EMI records'}), 500
+        app.logger.error(f"Error rolling over months for user {current_user.id}: {e}", exc_info=True)
+        return jsonify({'status': 'error', 'message': 'An error occurred while rolling over the months. Nothing was changed.'}), 500
+
+    changed = [change for change in changes if change['source_count'] and (change['added'] or change['removed'] or change['changed'])]
+    verb = 'Would update' if dry_run else 'Updated'
+    return jsonify({
+        'status': 'success',
+        'message': f'{verb} {len(changed)} of {len(changes)} month copies; the rest were already up to date or had no source data.',
+        'dry_run': dry_run,
+        'changes': changes
+    })
 
 # --- Error Handlers ---
 @app.errorhandler(404)
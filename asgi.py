@@ -0,0 +1,392 @@
+"""
+Async (ASGI) serving mode.
+
+    uvicorn asgi:app --workers 2
+
+Under `gunicorn app:app` every request holds a worker thread while it waits
+on its round-trips to Turso, so a worker serves one request at a time. Here
+the read-only endpoints the dashboard polls (/api/report_data, /api/expenses,
+/api/weekly_budget and /api/changes) are coroutines over libsql_client's async client:
+while one waits on the database the worker serves the others, so a single
+worker keeps hundreds of them in flight. They reuse app.py's statements,
+payload builders, dashboard cache and request metrics.
+
+Every other route runs the Flask app unchanged on a thread pool
+(ASGI_SYNC_THREADS per worker), as does any request the async handlers cannot
+answer on their own: one without a valid session cookie (login redirects,
+remember-me logins) or a weekly budget that must be recomputed first.
+"""
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+
+import libsql_client
+from itsdangerous import BadSignature
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_cookie, parse_etags, remove_entity_headers
+
+from app import (
+    CHANGE_FEED_MAX_ROWS, DATABASE, DbWrapper, app as flask_app, bind_libsql_params, budget_data_statements,
+    build_budget_data, build_month_delta, change_feed_args, change_feed_payload, change_feed_plan,
+    change_log_statements, expense_list_args, expense_list_payload, expense_list_statements, get_dashboard_cache,
+    month_delta_statements, prepare_libsql_sql, report_data_etag, report_data_is_current,
+    report_data_version_statement, request_metrics, server_timing, simulated_latency_profile,
+    weekly_budget_payload, weekly_budget_rows_are_stale, weekly_budget_rows_etag, weekly_budget_rows_statement,
+    weekly_budget_version_etag, weekly_budget_version_statement, with_etag,
+)
+from simulated_libsql import AsyncSimulatedLibsqlClient
+
+RESPONSE_QUEUE_SIZE = 16  # Chunks of a streamed sync response buffered ahead of a slow client
+
+
+# --- Async Database Access ---
+
+class AsyncDbWrapper(DbWrapper):
+    """DbWrapper over an async libSQL client: execute, execute_batch and fetchall_batch are coroutines."""
+
+    def __init__(self, client, metrics=None):
+        super().__init__(client, is_libsql=True, metrics=metrics)
+
+    async def execute(self, sql, params=()):
+        self.round_trips += 1
+        started = time.perf_counter()
+        result_set = await self._conn.execute(prepare_libsql_sql(sql), bind_libsql_params(params) if params else None)
+        self._observe('execute', [sql], started, len(result_set.rows))
+        return result_set
+
+    async def execute_batch(self, sqls):
+        """Executes multiple SQL statements atomically in a single round-trip."""
+        statements = [self._split_statement(sql) for sql in sqls]
+        if not statements:
+            return []
+        self.round_trips += 1
+        started = time.perf_counter()
+        results = await self._conn.batch([
+            (prepare_libsql_sql(sql), bind_libsql_params(params)) for sql, params in statements
+        ])
+        self._observe('batch', [sql for sql, _ in statements], started)
+        return results
+
+    async def fetchall_batch(self, sqls):
+        """Runs several read queries in one round-trip and returns each one's rows as a list of dicts."""
+        statements = [self._split_statement(sql) for sql in sqls]
+        self.round_trips += 1
+        started = time.perf_counter()
+        result_sets = await self._conn.batch([
+            (prepare_libsql_sql(sql), bind_libsql_params(params)) for sql, params in statements
+        ])
+        rows = [self._rows(result_set) for result_set in result_sets]
+        self._observe('read_batch', [sql for sql, _ in statements], started, sum(len(r) for r in rows))
+        return rows
+
+    def close(self):
+        """The client is shared by every request of the worker; nothing to release."""
+
+
+_async_client = None
+_async_client_pid = None
+
+
+def _build_async_client():
+    db_url = os.environ.get('TURSO_DATABASE_URL')
+    auth_token = os.environ.get('TURSO_AUTH_TOKEN')
+    if db_url and auth_token:
+        return libsql_client.create_client(url=db_url.replace('libsql://', 'https://'), auth_token=auth_token)
+    profile = simulated_latency_profile()
+    if profile is not None:
+        return AsyncSimulatedLibsqlClient(DATABASE, profile)
+    # Local SQLite through libsql_client's file mode, so both modes run the same statements.
+    return libsql_client.create_client(url=f'file:{os.path.abspath(DATABASE)}')
+
+
+def get_async_client():
+    """The worker's async client; one serves every concurrent request of its event loop."""
+    global _async_client, _async_client_pid
+    if _async_client is None or _async_client_pid != os.getpid():
+        _async_client = _build_async_client()
+        _async_client_pid = os.getpid()
+    return _async_client
+
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None and _async_client_pid == os.getpid():
+        await _async_client.close()
+    _async_client = None
+
+# --- End Async Database Access ---
+
+
+# --- Async Endpoints ---
+# Each returns (status, payload, etag), or None to hand the request to the
+# Flask app. A 304 has no payload; etag may be None.
+
+async def report_data(db, user_id, args, if_none_match):
+    active_month = args.get('month_select')
+    if not active_month:
+        return 400, {'status': 'error', 'message': 'Month parameter is required.'}, None
+    version_row = db.fetchone(await db.execute(*report_data_version_statement(user_id, active_month)))
+    etag = report_data_etag(user_id, active_month, version_row)
+    if if_none_match.contains_weak(etag):
+        return 304, None, etag
+    dashboard_cache = get_dashboard_cache()
+    version, data = dashboard_cache.lookup(user_id, active_month)
+    if data is None or not report_data_is_current(data, version_row):
+        data = build_budget_data(active_month, *await db.fetchall_batch(budget_data_statements(user_id, active_month)))
+        dashboard_cache.save(user_id, active_month, version, data)
+    return 200, data, etag if report_data_is_current(data, version_row) else None
+
+
+async def expenses(db, user_id, args, if_none_match):
+    try:
+        active_month, search_term, limit, after = expense_list_args(args)
+    except ValueError as e:
+        return 400, {'status': 'error', 'message': str(e)}, None
+    results = await db.fetchall_batch(expense_list_statements(user_id, active_month, search_term, limit, after))
+    return 200, expense_list_payload(results, search_term, limit), None
+
+
+async def weekly_budget(db, user_id, args, if_none_match):
+    month = args.get('month')
+    if not month:
+        return 400, {'status': 'error', 'message': 'Month parameter required'}, None
+    if if_none_match:
+        version_row = db.fetchone(await db.execute(*weekly_budget_version_statement(user_id, month)))
+        etag = weekly_budget_version_etag(user_id, month, version_row)
+        if etag is not None and if_none_match.contains_weak(etag):
+            return 304, None, etag
+    rows = db.fetchall(await db.execute(*weekly_budget_rows_statement(user_id, month)))
+    if weekly_budget_rows_are_stale(rows):
+        return None  # Recomputing writes the month's rows; the sync endpoint does that.
+    return 200, weekly_budget_payload(rows), weekly_budget_rows_etag(user_id, month, rows)
+
+
+async def changes(db, user_id, args, if_none_match):
+    try:
+        month, since = change_feed_args(args)
+    except ValueError as e:
+        return 400, {'status': 'error', 'message': str(e)}, None
+    version, changed = change_feed_plan(
+        since, *await db.fetchall_batch(change_log_statements(user_id, month, since, CHANGE_FEED_MAX_ROWS + 1)))
+    delta = changed
+    if changed:
+        results = await db.fetchall_batch(month_delta_statements(user_id, month, **changed))
+        delta = build_month_delta(month, results, **changed)
+    return 200, change_feed_payload(version, delta), None
+
+
+ASYNC_ROUTES = {
+    '/api/report_data': report_data,
+    '/api/expenses': expenses,
+    '/api/weekly_budget': weekly_budget,
+    '/api/changes': changes,
+}
+
+
+def session_user_id(headers):
+    """Id of the user logged in by the request's Flask session cookie, or None."""
+    cookies = '; '.join(value.decode('latin-1') for name, value in headers if name == b'cookie')
+    value = parse_cookie(cookies).get(flask_app.config['SESSION_COOKIE_NAME']) if cookies else None
+    if not value:
+        return None
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    try:
+        session = serializer.loads(value, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+        return int(session['_user_id'])
+    except (BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+# --- End Async Endpoints ---
+
+
+# --- WSGI Bridge ---
+
+def wsgi_environ(scope, body):
+    """The WSGI environ of an ASGI http request whose body has been read into `body`."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{name}'
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+class WsgiBridge:
+    """Serves ASGI http requests with a WSGI app on a thread pool, streaming each response back."""
+
+    def __init__(self, wsgi_app, max_workers=4):
+        self.wsgi_app = wsgi_app
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='wsgi-bridge')
+
+    async def __call__(self, scope, receive, send):
+        body = io.BytesIO()
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.write(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        body.seek(0)
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=RESPONSE_QUEUE_SIZE)
+        abandoned = threading.Event()
+
+        def put(item):
+            # Blocks the pool thread while the queue is full, so a slow client slows the response down.
+            if not abandoned.is_set():
+                asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        loop.run_in_executor(self._executor, self._run, wsgi_environ(scope, body), put, abandoned)
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == 'start':
+                    await send({'type': 'http.response.start', 'status': value[0], 'headers': value[1]})
+                elif kind == 'body':
+                    await send({'type': 'http.response.body', 'body': value, 'more_body': True})
+                elif kind == 'error':
+                    raise value
+                else:
+                    await send({'type': 'http.response.body', 'body': b''})
+                    return
+        finally:
+            # Frees the pool thread if the client went away mid-response.
+            abandoned.set()
+            while not queue.empty():
+                queue.get_nowait()
+
+    def _run(self, environ, put, abandoned):
+        response_start = []
+        started = False
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and started:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response_start[:] = [(
+                int(status.split(' ', 1)[0]),
+                [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            )]
+
+        iterable = None
+        try:
+            iterable = self.wsgi_app(environ, start_response)
+            for chunk in iterable:
+                if abandoned.is_set():
+                    break
+                if not chunk:
+                    continue
+                if not started:
+                    put(('start', response_start[0]))
+                    started = True
+                put(('body', chunk))
+            if not started:
+                put(('start', response_start[0]))
+            put(('end', None))
+        except Exception as error:
+            put(('error', error))
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+# --- End WSGI Bridge ---
+
+
+class BudgetPlannerAsgi:
+    """Routes the async endpoints to their coroutines and everything else through the WSGI bridge."""
+
+    def __init__(self, wsgi_app, sync_threads=4):
+        self.bridge = WsgiBridge(wsgi_app, max_workers=sync_threads)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        handler = ASYNC_ROUTES.get(scope['path']) if scope['method'] == 'GET' else None
+        if handler is not None:
+            user_id = session_user_id(scope['headers'])
+            if user_id is not None and await self._serve(handler, user_id, scope, send):
+                return
+        await self.bridge(scope, receive, send)
+
+    async def _serve(self, handler, user_id, scope, send):
+        started = time.perf_counter()
+        db = AsyncDbWrapper(get_async_client(), metrics=request_metrics)
+        args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        if_none_match = parse_etags(
+            ', '.join(value.decode('latin-1') for name, value in scope['headers'] if name == b'if-none-match') or None
+        )
+        try:
+            result = await handler(db, user_id, args, if_none_match)
+        except Exception as e:
+            flask_app.logger.error(f"Error serving {scope['path']}: {e}")
+            result = 500, {'status': 'error', 'message': 'An internal error occurred.'}, None
+        if result is None:
+            return False
+
+        status, payload, etag = result
+        if payload is None:
+            response = flask_app.response_class(status=304)
+            remove_entity_headers(response.headers)  # as werkzeug does for a WSGI 304
+        else:
+            response = flask_app.json.response(payload)
+        if etag is not None:
+            with_etag(response, etag)
+        seconds = time.perf_counter() - started
+        request_metrics.observe_request('GET', scope['path'], status, seconds, db_seconds=db.query_seconds,
+                                        round_trips=db.round_trips, rows=db.rows_returned)
+        headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.headers.items()]
+        headers.append((b'server-timing',
+                        server_timing(seconds, db.query_seconds, db.round_trips, db.rows_returned).encode('latin-1')))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+        return True
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await close_async_client()
+                self.bridge.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+app = BudgetPlannerAsgi(flask_app, sync_threads=int(os.environ.get('ASGI_SYNC_THREADS', 4)))
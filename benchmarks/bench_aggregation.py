@@ -0,0 +1,222 @@
+"""
+Benchmark the SQL aggregation in aggregation.py against the Python loops it replaced,
+and check both produce the same totals.
+
+Seeds a throwaway SQLite database with one user and --expenses expenses (default
+100k) spread over --months months, then for every month times:
+
+  dashboard  month totals, per-category and per-payment-method spend
+  report     per-category actuals for the CSV report (expenses by date)
+  weekly     spend per week of the budget cycle
+
+Usage:
+    python benchmarks/bench_aggregation.py [--expenses 100000] [--months 12] [--repeat 3]
+
+Exits 1 if any total differs from the reference implementation by a cent or more.
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CATEGORIES = ['Groceries', 'Dining', 'Transport', 'Utilities', 'Shopping', 'Health', 'Travel', 'Fuel']
+PAYMENT_TYPES = ['Card', 'CARD', 'cash', 'UPI', None]
+
+
+def seed(path, expense_count, month_count, rng):
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (username, password_hash, created_at) VALUES ('bench', 'x', '2024-01-01')")
+    user_id = conn.execute("SELECT id FROM users WHERE username = 'bench'").fetchone()[0]
+
+    first_day = date(2024, 1, 1)
+    months = [f'{2024 + m // 12}-{m % 12 + 1:02d}' for m in range(month_count)]
+    span_days = (date(2024 + month_count // 12, month_count % 12 + 1, 1) - first_day).days
+
+    rows = []
+    for i in range(expense_count):
+        expense_date = first_day + timedelta(days=rng.randrange(span_days))
+        rows.append((
+            user_id, expense_date.strftime('%Y-%m'), expense_date.isoformat(),
+            rng.choice(CATEGORIES), f'expense {i}', rng.randrange(1, 500000) / 100, rng.choice(PAYMENT_TYPES)
+        ))
+    conn.executemany(
+        'INSERT INTO expenses (user_id, month, date, category, description, amount, payment_type) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        rows
+    )
+    for month in months:
+        conn.executemany('INSERT INTO income (user_id, month, description, amount) VALUES (?, ?, ?, ?)',
+                         [(user_id, month, 'Salary', 85000.0), (user_id, month, 'Interest', 412.37)])
+        conn.execute('INSERT INTO emis (user_id, month, loan_name, emi_amount) VALUES (?, ?, ?, ?)',
+                     (user_id, month, 'Car', 12499.99))
+        conn.executemany('INSERT INTO budgets (user_id, month, category, amount) VALUES (?, ?, ?, ?)',
+                         [(user_id, month, category, 20000.0) for category in CATEGORIES[:6]])
+    conn.commit()
+    conn.close()
+    return user_id, months
+
+
+# --- Reference implementations: the Python loops the aggregation module replaced ---
+
+def reference_dashboard(db, user_id, month):
+    expenses = db.fetchall(db.execute('SELECT * FROM expenses WHERE month = ? AND user_id = ? ORDER BY date DESC', (month, user_id)))
+    income = db.fetchall(db.execute('SELECT * FROM income WHERE month = ? AND user_id = ?', (month, user_id)))
+    emis = db.fetchall(db.execute('SELECT * FROM emis WHERE month = ? AND user_id = ?', (month, user_id)))
+    budget_list = db.fetchall(db.execute('SELECT category, amount FROM budgets WHERE month = ? AND user_id = ?', (month, user_id)))
+
+    category_totals = {}
+    for expense in expenses:
+        category_totals[expense['category']] = category_totals.get(expense['category'], 0) + expense['amount']
+    payment_totals = {}
+    for expense in expenses:
+        raw = str(expense['payment_type'] or 'Unknown').strip() or 'Unknown'
+        method = raw[0].upper() + raw[1:].lower()
+        payment_totals[method] = payment_totals.get(method, 0) + expense['amount']
+    return {
+        'total_income': sum(i['amount'] for i in income),
+        'total_expenses': sum(e['amount'] for e in expenses),
+        'total_emi': sum(e['emi_amount'] for e in emis),
+        'total_budget': sum(b['amount'] for b in budget_list),
+        'expense_count': len(expenses),
+        'category_totals': category_totals,
+        'payment_type_totals': payment_totals,
+    }
+
+
+def reference_report(db, user_id, month):
+    expenses = db.fetchall(db.execute('SELECT * FROM expenses WHERE strftime("%Y-%m", date) = ? AND user_id = ?', (month, user_id)))
+    budget = {row['category']: row['amount'] for row in db.fetchall(
+        db.execute('SELECT category, amount FROM budgets WHERE month = ? AND user_id = ?', (month, user_id)))}
+    actuals = {category: sum(e['amount'] for e in expenses if e['category'] == category) for category in budget}
+    return {'total_expenses': sum(e['amount'] for e in expenses), 'actuals': actuals}
+
+
+def reference_weekly(db, user_id, weeks):
+    expenses = db.fetchall(db.execute(
+        'SELECT date, amount FROM expenses WHERE user_id = ? AND date BETWEEN ? AND ?',
+        (user_id, weeks[0][1], weeks[-1][2])
+    ))
+    return [sum(e['amount'] for e in expenses if start <= e['date'] <= end) for _, start, end in weeks]
+
+
+# --- SQL aggregation ---
+
+def aggregated_dashboard(db, user_id, month):
+    import aggregation
+    totals_rows, category_rows, payment_rows = db.fetchall_batch([
+        aggregation.month_totals_statement(user_id, month),
+        aggregation.category_totals_statement(user_id, month),
+        aggregation.payment_type_totals_statement(user_id, month),
+    ])
+    totals = aggregation.month_totals_from_rows(totals_rows)
+    return {
+        'total_income': totals.total_income,
+        'total_expenses': totals.total_expenses,
+        'total_emi': totals.total_emi,
+        'total_budget': totals.total_budget,
+        'expense_count': totals.expense_count,
+        'category_totals': {row.category: row.total for row in aggregation.category_totals_from_rows(category_rows)},
+        'payment_type_totals': aggregation.payment_type_totals_from_rows(payment_rows),
+    }
+
+
+def aggregated_report(db, user_id, month):
+    import aggregation
+    totals_rows, category_rows, budget_rows = db.fetchall_batch([
+        aggregation.month_totals_statement(user_id, month, expenses_by_date=True),
+        aggregation.category_totals_statement(user_id, month, expenses_by_date=True),
+        ('SELECT category, amount FROM budgets WHERE month = ? AND user_id = ?', (month, user_id)),
+    ])
+    spent = {row.category: row.total for row in aggregation.category_totals_from_rows(category_rows)}
+    return {
+        'total_expenses': aggregation.month_totals_from_rows(totals_rows).total_expenses,
+        'actuals': {row['category']: spent.get(row['category'], 0) for row in budget_rows},
+    }
+
+
+def aggregated_weekly(db, user_id, weeks):
+    import app
+    return app.get_weekly_spent_totals(db, user_id, weeks)
+
+
+def cents(value):
+    """Totals compared to the cent; float sums in a different order may differ in the last bits."""
+    if isinstance(value, dict):
+        return {key: cents(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [cents(item) for item in value]
+    return round(value, 2)
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--expenses', type=int, default=100000)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-aggregation-')
+    os.chdir(workdir)  # app.py keeps its SQLite database in the working directory
+    os.environ.pop('TURSO_DATABASE_URL', None)
+    import app
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+    with app.app.app_context():
+        app.apply_schema_compat_migrations(app.get_db())
+
+    started = time.perf_counter()
+    user_id, months = seed(os.path.join(workdir, app.DATABASE), args.expenses, args.months, random.Random(args.seed))
+    print(f'Seeded {args.expenses} expenses over {len(months)} months in {time.perf_counter() - started:.1f}s ({workdir})')
+
+    conn = sqlite3.connect(os.path.join(workdir, app.DATABASE))
+    conn.row_factory = sqlite3.Row
+    db = app.DbWrapper(conn, False)
+
+    timings = {name: [0.0, 0.0] for name in ('dashboard', 'report', 'weekly')}
+    mismatches = []
+    for month in months:
+        weeks = app.get_week_boundaries(month, db, user_id)
+        cases = {
+            'dashboard': (lambda: reference_dashboard(db, user_id, month), lambda: aggregated_dashboard(db, user_id, month)),
+            'report': (lambda: reference_report(db, user_id, month), lambda: aggregated_report(db, user_id, month)),
+            'weekly': (lambda: reference_weekly(db, user_id, weeks), lambda: aggregated_weekly(db, user_id, weeks)),
+        }
+        for name, (reference_fn, aggregated_fn) in cases.items():
+            expected, reference_time = timed(reference_fn, args.repeat)
+            actual, aggregated_time = timed(aggregated_fn, args.repeat)
+            timings[name][0] += reference_time
+            timings[name][1] += aggregated_time
+            if cents(expected) != cents(actual):
+                mismatches.append((month, name, expected, actual))
+
+    print(f"{'aggregate':<10} {'python loops':>14} {'sql':>10} {'speedup':>8}")
+    for name, (reference_time, aggregated_time) in timings.items():
+        print(f'{name:<10} {reference_time * 1000:>12.1f}ms {aggregated_time * 1000:>8.1f}ms {reference_time / aggregated_time:>7.1f}x')
+
+    for month, name, expected, actual in mismatches:
+        print(f'MISMATCH {name} {month}:\n  python: {expected}\n  sql:    {actual}')
+    if mismatches:
+        sys.exit(1)
+    print(f'All totals match across {len(months)} months.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Sync (gunicorn app:app) versus async (uvicorn asgi:app) serving, over a
+simulated remote database.
+
+Seeds a throwaway database (see load_test.py), then for each mode starts a
+server with --workers workers on it, with SIMULATED_DB_LATENCY_MS set so every
+round-trip costs what it would against Turso, and the dashboard cache disabled
+so every request reaches the database. --concurrency clients, each logged in
+as one of the seeded users, send --requests requests per scenario:
+
+  report_data    GET /api/report_data (one batched round-trip)
+  expenses       GET /api/expenses (one round-trip)
+
+Prints throughput and latency percentiles per mode and scenario. Needs gunicorn
+and uvicorn installed; the client side uses aiohttp, which libsql_client
+already depends on.
+
+Usage:
+    python benchmarks/bench_async_mode.py [--workers 2] [--concurrency 64] [--requests 500]
+                                          [--latency-ms 20] [--modes sync async]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from load_test import PASSWORD, free_port, percentile, seed  # noqa: E402
+
+SCENARIOS = {
+    'report_data': '/api/report_data?month_select={month}',
+    'expenses': '/api/expenses?month_select={month}',
+}
+
+
+def server_command(mode, workers, port, workdir):
+    if mode == 'sync':
+        return [sys.executable, '-m', 'gunicorn', 'app:app', '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+                '--chdir', workdir, '--pythonpath', ROOT, '--timeout', '120']
+    return [sys.executable, '-m', 'uvicorn', 'asgi:app', '--workers', str(workers), '--port', str(port),
+            '--app-dir', ROOT, '--log-level', 'warning']
+
+
+async def wait_until_up(base_url, process, log_path, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f'Server exited with code {process.returncode}; see {log_path}')
+            try:
+                async with session.get(f'{base_url}/health') as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f'Server did not answer /health within {timeout}s; see {log_path}')
+
+
+async def logged_in_session(base_url, username):
+    # unsafe=True keeps cookies set by a bare IP address host.
+    session = aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True))
+    async with session.post(f'{base_url}/login', data={'username': username, 'password': PASSWORD}) as response:
+        if str(response.url).rstrip('/').endswith('/login'):
+            raise RuntimeError(f'Could not log in as {username}')
+    return session
+
+
+async def run_scenario(base_url, sessions, months, path_template, request_count, concurrency):
+    latencies = []
+    errors = 0
+    next_request = iter(range(request_count))
+
+    async def client(index):
+        nonlocal errors
+        session = sessions[index % len(sessions)]
+        rng = random.Random(index)
+        for _ in next_request:
+            started = time.perf_counter()
+            async with session.get(base_url + path_template.format(month=rng.choice(months))) as response:
+                await response.read()
+                if response.status != 200:
+                    errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(concurrency)))
+    seconds = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / seconds, percentile(latencies, 50), percentile(latencies, 95), errors
+
+
+async def run_mode(mode, args, workdir, usernames, months):
+    port = free_port()
+    log_path = os.path.join(workdir, f'{mode}.log')
+    env = {key: value for key, value in os.environ.items() if not key.startswith('TURSO_')}
+    env.update(SIMULATED_DB_LATENCY_MS=str(args.latency_ms), DASHBOARD_CACHE_TTL='0')
+    with open(log_path, 'w') as log_file:
+        process = subprocess.Popen(server_command(mode, args.workers, port, workdir), cwd=workdir, env=env,
+                                   stdout=log_file, stderr=subprocess.STDOUT)
+    base_url = f'http://127.0.0.1:{port}'
+    sessions = []
+    try:
+        await wait_until_up(base_url, process, log_path)
+        sessions = [await logged_in_session(base_url, username) for username in usernames]
+        for scenario, path_template in SCENARIOS.items():
+            throughput, p50, p95, errors = await run_scenario(base_url, sessions, months, path_template,
+                                                              args.requests, args.concurrency)
+            print(f'{mode:<6} {scenario:<12} {throughput:>8.1f} {p50:>9.1f} {p95:>9.1f} {errors:>7}')
+    finally:
+        for session in sessions:
+            await session.close()
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2, help='server worker processes in both modes')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=500, help='requests per scenario')
+    parser.add_argument('--latency-ms', type=float, default=20, help='simulated database round-trip')
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--months', type=int, default=3)
+    parser.add_argument('--expenses-per-month', type=int, default=200)
+    parser.add_argument('--modes', nargs='+', choices=['sync', 'async'], default=['sync', 'async'])
+    args = parser.parse_args()
+
+    os.environ.pop('TURSO_DATABASE_URL', None)
+    os.environ.pop('SIMULATED_DB_LATENCY_MS', None)
+    workdir = tempfile.mkdtemp(prefix='bench-async-')
+    os.chdir(workdir)  # app.py keeps its SQLite database in the working directory
+    import app
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+    usernames, months = seed(os.path.join(workdir, app.DATABASE), args.users, args.months,
+                             args.expenses_per_month, random.Random(1))
+
+    print(f'{args.workers} workers, {args.concurrency} concurrent clients, {args.latency_ms:g}ms per round-trip '
+          f'({workdir})', file=sys.stderr)
+    print(f"{'mode':<6} {'scenario':<12} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    for mode in args.modes:
+        asyncio.run(run_mode(mode, args, workdir, usernames, months))
+
+
+if __name__ == '__main__':
+    main()
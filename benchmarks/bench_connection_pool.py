@@ -0,0 +1,98 @@
+"""
+Benchmark of pooled database connections against a connection per request.
+
+Runs --requests request-shaped units of work (an app context that checks a
+connection out with get_db(), runs --queries small queries and gives it back
+on teardown) twice: once through the app's ConnectionPool as configured, and
+once with DB_POOL_MAX_IDLE=0, which closes every connection on release so each
+request opens its own, the way the app worked before connections were pooled.
+
+Against Turso (TURSO_DATABASE_URL and TURSO_AUTH_TOKEN set) the connect cost
+is the real one: a new HTTPS client and its TLS handshake. Locally it runs on a
+throwaway SQLite database, where connecting is nearly free, so --connect-ms
+adds a stand-in delay to every new connection.
+
+Usage:
+    python benchmarks/bench_connection_pool.py [--requests 200] [--queries 3] [--connect-ms 50]
+"""
+import argparse
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(percent / 100 * len(sorted_values)) - 1))]
+
+
+def build_pool(app, max_idle, connect_seconds):
+    """The app's pool as configured, with max_idle and connect_seconds of extra delay per new connection."""
+    if max_idle is None:
+        os.environ.pop('DB_POOL_MAX_IDLE', None)
+    else:
+        os.environ['DB_POOL_MAX_IDLE'] = str(max_idle)
+    pool = app._build_connection_pool()
+    if connect_seconds:
+        factory = pool._factory
+
+        def slow_factory():
+            time.sleep(connect_seconds)
+            return factory()
+
+        pool._factory = slow_factory
+    return pool
+
+
+def run(app, pool, requests, queries):
+    """Latencies in milliseconds of `requests` units of work on pool, and the connections it opened."""
+    app._connection_pool = pool
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        with app.app.app_context():
+            db = app.get_db()
+            for _ in range(queries):
+                db.fetchone(db.execute('SELECT COUNT(*) AS count FROM users'))
+        latencies.append((time.perf_counter() - started) * 1000)
+    pool.close_all()
+    return sorted(latencies), pool.metrics()['created']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=3, help='queries per request')
+    parser.add_argument('--connect-ms', type=float, default=50,
+                        help='stand-in cost of opening a connection, added on top of the real one')
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix='bench-connection-pool-'))  # app.py keeps its SQLite database in the working directory
+    import app
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+
+    backend = 'Turso' if os.environ.get('TURSO_DATABASE_URL') else 'SQLite'
+    print(f'{args.requests} requests of {args.queries} queries on {backend}, '
+          f'+{args.connect_ms:g}ms per new connection')
+    print(f"{'mode':<14} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'connections':>11}")
+    results = {}
+    for mode, max_idle in [('per-request', 0), ('pooled', None)]:
+        pool = build_pool(app, max_idle, args.connect_ms / 1000)
+        latencies, created = run(app, pool, args.requests, args.queries)
+        results[mode] = sum(latencies) / len(latencies)
+        print(f'{mode:<14} {results[mode]:>8.2f} {percentile(latencies, 50):>8.2f} '
+              f'{percentile(latencies, 95):>8.2f} {created:>11}')
+    print(f"Pooling saves {results['per-request'] - results['pooled']:.2f}ms per request.")
+
+
+if __name__ == '__main__':
+    main()
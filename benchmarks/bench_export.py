@@ -0,0 +1,158 @@
+"""
+Export --rows synthetic expenses (default 1M) through the streaming report exports
+and check memory stays flat.
+
+The database is seeded once; every export then runs in a fresh child process so
+its peak RSS (VmHWM) can be measured on its own. The growth over the child's RSS
+before exporting must stay under --max-rss-growth-mb for every shape and format.
+
+Usage:
+    python benchmarks/bench_export.py [--rows 1000000] [--months 24] [--max-rss-growth-mb 64]
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CATEGORIES = ['Groceries', 'Dining', 'Transport', 'Utilities', 'Shopping', 'Health', 'Travel', 'Fuel']
+PAYMENT_TYPES = ['Card', 'Cash', 'UPI']
+CASES = [
+    ('ledger', 'csv'),
+    ('ledger', 'xlsx'),
+    ('budget_vs_actual', 'csv'),
+    ('category_pivot', 'xlsx'),
+]
+
+
+def read_status_kb(field):
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def months_between(first_day, month_count):
+    return [f'{first_day.year + (first_day.month - 1 + m) // 12}-{(first_day.month - 1 + m) % 12 + 1:02d}'
+            for m in range(month_count)]
+
+
+def seed(workdir, row_count, month_count, rng):
+    os.chdir(workdir)  # app.py keeps its SQLite database in the working directory
+    import app
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+    with app.app.app_context():
+        app.apply_schema_compat_migrations(app.get_db())
+
+    conn = sqlite3.connect(app.DATABASE)
+    conn.execute("INSERT INTO users (username, password_hash, created_at) VALUES ('bench', 'x', '2024-01-01')")
+    user_id = conn.execute("SELECT id FROM users WHERE username = 'bench'").fetchone()[0]
+    first_day = date(2024, 1, 1)
+    months = months_between(first_day, month_count)
+    span_days = (date.fromisoformat(f'{months[-1]}-28') - first_day).days
+
+    def expense_rows():
+        for i in range(row_count):
+            expense_date = first_day + timedelta(days=rng.randrange(span_days))
+            yield (user_id, expense_date.strftime('%Y-%m'), expense_date.isoformat(), rng.choice(CATEGORIES),
+                   f'Synthetic expense {i}', rng.randrange(1, 500000) / 100, rng.choice(PAYMENT_TYPES))
+
+    conn.executemany(
+        'INSERT INTO expenses (user_id, month, date, category, description, amount, payment_type) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        expense_rows()
+    )
+    conn.executemany('INSERT INTO budgets (user_id, month, category, amount) VALUES (?, ?, ?, ?)',
+                     [(user_id, month, category, 20000.0) for month in months for category in CATEGORIES])
+    conn.commit()
+    conn.close()
+    return user_id, months
+
+
+def run_export(workdir, user_id, shape, export_format, start_month, end_month):
+    """Child process: stream one export to /dev/null and report bytes, rows and memory."""
+    os.chdir(workdir)
+    import app
+    from exports import build_export
+    app.app.logger.setLevel(logging.ERROR)
+
+    conn = sqlite3.connect(app.DATABASE)
+    conn.row_factory = sqlite3.Row
+    db = app.DbWrapper(conn, False)
+    baseline_kb = read_status_kb('VmRSS')
+
+    started = time.perf_counter()
+    export = build_export(db, user_id, shape, start_month, end_month, export_format)
+    size = 0
+    newlines = 0
+    with open(os.devnull, 'wb') as sink:
+        for chunk in export.chunks:
+            size += len(chunk)
+            newlines += chunk.count(b'\n')
+            sink.write(chunk)
+    print(json.dumps({
+        'seconds': time.perf_counter() - started,
+        'bytes': size,
+        'csv_rows': newlines - 1 if export_format == 'csv' else None,
+        'baseline_mb': baseline_kb / 1024,
+        'peak_mb': read_status_kb('VmHWM') / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--max-rss-growth-mb', type=float, default=64)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--child', nargs=6, metavar=('WORKDIR', 'USER_ID', 'SHAPE', 'FORMAT', 'START', 'END'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        workdir, user_id, shape, export_format, start_month, end_month = args.child
+        run_export(workdir, int(user_id), shape, export_format, start_month, end_month)
+        return
+
+    os.environ.pop('TURSO_DATABASE_URL', None)
+    workdir = tempfile.mkdtemp(prefix='bench-export-')
+    started = time.perf_counter()
+    user_id, months = seed(workdir, args.rows, args.months, random.Random(args.seed))
+    print(f'Seeded {args.rows} expenses over {len(months)} months in {time.perf_counter() - started:.1f}s ({workdir})')
+
+    print(f"{'shape':<18} {'format':<6} {'seconds':>8} {'MB out':>8} {'RSS before':>11} {'peak':>8} {'growth':>8}")
+    failures = []
+    for shape, export_format in CASES:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', workdir, str(user_id), shape, export_format,
+             months[0], months[-1]],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        growth = result['peak_mb'] - result['baseline_mb']
+        print(f"{shape:<18} {export_format:<6} {result['seconds']:>8.1f} {result['bytes'] / 1e6:>8.1f} "
+              f"{result['baseline_mb']:>9.1f}MB {result['peak_mb']:>6.1f}MB {growth:>6.1f}MB")
+        if growth > args.max_rss_growth_mb:
+            failures.append(f'{shape}/{export_format} grew RSS by {growth:.1f}MB')
+        if shape == 'ledger' and result['csv_rows'] is not None and result['csv_rows'] != args.rows:
+            failures.append(f"ledger/csv wrote {result['csv_rows']} rows, expected {args.rows}")
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    if failures:
+        sys.exit(1)
+    print(f'All exports stayed within {args.max_rss_growth_mb:.0f}MB of extra RSS.')
+
+
+if __name__ == '__main__':
+    main()
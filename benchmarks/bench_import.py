@@ -0,0 +1,121 @@
+"""
+Import a synthetic --rows CSV statement (default 100k) through POST /api/import_expenses.
+
+Runs a dry run, the real import, and a re-import of the same file. The re-import
+must skip every row as a duplicate. Also imports an OFX file of the same transactions
+into a fresh user. Prints wall time and rows/second for each run, and peak RSS.
+
+Usage:
+    python benchmarks/bench_import.py [--rows 100000] [--error-rate 0.01]
+"""
+import argparse
+import io
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CATEGORIES = ['Groceries', 'Dining', 'Transport', 'Utilities', 'Shopping', 'Health', 'Travel', 'Fuel']
+PAYMENT_TYPES = ['Card', 'Cash', 'UPI']
+
+
+def read_status_kb(field):
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def synthetic_transactions(row_count, error_rate, rng):
+    first_day = date(2024, 1, 1)
+    for i in range(row_count):
+        expense_date = first_day + timedelta(days=rng.randrange(730))
+        amount = f'{rng.randrange(1, 500000) / 100:.2f}' if rng.random() >= error_rate else 'n/a'
+        yield expense_date, f'Synthetic expense {i}', amount, rng.choice(CATEGORIES), rng.choice(PAYMENT_TYPES)
+
+
+def build_csv(transactions):
+    out = io.StringIO()
+    out.write('Date,Description,Amount,Category,Payment Type\n')
+    for expense_date, description, amount, category, payment_type in transactions:
+        out.write(f'{expense_date.strftime("%d/%m/%Y")},{description},{amount},{category},{payment_type}\n')
+    return out.getvalue().encode('utf-8')
+
+
+def build_ofx(transactions):
+    out = io.StringIO()
+    out.write('OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n')
+    for expense_date, description, amount, _, _ in transactions:
+        out.write(f'<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>{expense_date.strftime("%Y%m%d")}'
+                  f'<TRNAMT>-{amount}<NAME>{description}</STMTTRN>\n')
+    out.write('</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n')
+    return out.getvalue().encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ.pop('TURSO_DATABASE_URL', None)
+    os.chdir(tempfile.mkdtemp(prefix='bench-import-'))  # app.py keeps its SQLite database in the working directory
+    import app
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+    client = app.app.test_client()
+
+    transactions = list(synthetic_transactions(args.rows, args.error_rate, random.Random(args.seed)))
+    csv_bytes = build_csv(transactions)
+    ofx_bytes = build_ofx(transactions)
+    baseline_kb = read_status_kb('VmRSS')
+
+    def login(username):
+        client.post('/register', data={'username': username, 'password': 'Passw0rdX', 'confirmPassword': 'Passw0rdX'})
+        client.post('/login', data={'username': username, 'password': 'Passw0rdX'})
+
+    def run(label, payload, filename, **form):
+        started = time.perf_counter()
+        response = client.post('/api/import_expenses', data={'file': (io.BytesIO(payload), filename), **form},
+                               content_type='multipart/form-data')
+        seconds = time.perf_counter() - started
+        result = response.get_json()
+        print(f"{label:<12} {response.status_code:>6} {seconds:>8.2f} {result['total_rows'] / seconds:>9.0f} "
+              f"{result['imported']:>9} {result['duplicates']:>10} {result['error_count']:>7}")
+        return result
+
+    print(f'{args.rows} rows: CSV {len(csv_bytes) / 1e6:.1f}MB, OFX {len(ofx_bytes) / 1e6:.1f}MB')
+    print(f"{'run':<12} {'status':>6} {'seconds':>8} {'rows/s':>9} {'imported':>9} {'duplicates':>10} {'errors':>7}")
+    login('bench_csv')
+    dry_run = run('csv dry run', csv_bytes, 'statement.csv', dry_run='1')
+    imported = run('csv import', csv_bytes, 'statement.csv')
+    reimported = run('csv again', csv_bytes, 'statement.csv')
+    client.get('/logout')
+    login('bench_ofx')
+    ofx = run('ofx import', ofx_bytes, 'statement.ofx', default_category='Imported')
+
+    print(f"Peak RSS {read_status_kb('VmHWM') / 1024:.1f}MB (baseline with test files loaded {baseline_kb / 1024:.1f}MB)")
+    failures = []
+    if dry_run['imported'] != imported['imported']:
+        failures.append(f"dry run predicted {dry_run['imported']} rows, import added {imported['imported']}")
+    if reimported['imported'] != 0 or reimported['duplicates'] != imported['imported']:
+        failures.append(f"re-import added {reimported['imported']} rows instead of skipping all as duplicates")
+    if ofx['imported'] != imported['imported']:
+        failures.append(f"OFX import added {ofx['imported']} rows, CSV import {imported['imported']}")
+    for failure in failures:
+        print(f'FAIL {failure}')
+    if failures:
+        sys.exit(1)
+    print('Dry run, import, re-import and OFX import agree.')
+
+
+if __name__ == '__main__':
+    main()
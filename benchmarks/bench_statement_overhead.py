@@ -0,0 +1,111 @@
+"""
+Micro-benchmark of DbWrapper's per-call overhead.
+
+Times, per call:
+
+  prepare    building the libSQL SQL text of the app's hot-path queries: the
+             regex it used to run on every call versus the prepare_libsql_sql cache
+  bind       turning parameters into what libSQL receives: the removed fallback that
+             inlined each value into the SQL versus bind_libsql_params
+  sqlite     DbWrapper.execute + fetchall over --statements distinct statements,
+             with sqlite3's default statement cache (128) versus STATEMENT_CACHE_SIZE,
+             and the raw sqlite3 cursor for reference
+
+Usage:
+    python benchmarks/bench_statement_overhead.py [--calls 20000] [--statements 300]
+"""
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def per_call_us(fn, calls):
+    started = time.perf_counter()
+    for index in range(calls):
+        fn(index)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+# --- What DbWrapper did before: kept here as the reference being measured against ---
+
+def uncached_libsql_sql(sql):
+    return re.sub(r'\buser_id\b', '"user_id"', sql)
+
+
+def inlined_libsql_sql(sql, params):
+    rendered_sql = sql
+    for value in params:
+        if value is None:
+            replacement = 'NULL'
+        elif isinstance(value, (int, float)):
+            replacement = str(value)
+        else:
+            replacement = "'" + str(value).replace("'", "''") + "'"
+        rendered_sql = rendered_sql.replace('?', replacement, 1)
+    return rendered_sql
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--statements', type=int, default=300, help='distinct statements in the sqlite workload')
+    args = parser.parse_args()
+
+    os.environ.pop('TURSO_DATABASE_URL', None)
+    os.environ.pop('SIMULATED_DB_LATENCY_MS', None)
+    workdir = tempfile.mkdtemp(prefix='bench-statements-')
+    os.chdir(workdir)  # app.py keeps its SQLite database in the working directory
+    import app
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+
+    print(f"{'case':<44} {'before us':>10} {'after us':>10}")
+
+    hot_sql = [sql for sql, _ in app.HOT_PATH_QUERIES.values()]
+    before = per_call_us(lambda i: uncached_libsql_sql(hot_sql[i % len(hot_sql)]), args.calls)
+    after = per_call_us(lambda i: app.prepare_libsql_sql(hot_sql[i % len(hot_sql)]), args.calls)
+    print(f"{f'prepare, {len(hot_sql)} hot-path queries':<44} {before:>10.2f} {after:>10.2f}")
+
+    insert_sql = ('INSERT INTO expenses (user_id, month, date, category, description, amount, payment_type) '
+                  'VALUES (?, ?, ?, ?, ?, ?, ?)')
+    insert_params = (42, '2026-03', '2026-03-14', 'Groceries', "Baker's ? dozen", 12.5, 'Card')
+    before = per_call_us(lambda i: inlined_libsql_sql(insert_sql, insert_params), args.calls)
+    after = per_call_us(lambda i: app.bind_libsql_params(insert_params), args.calls)
+    print(f"{'bind, 7-parameter insert':<44} {before:>10.2f} {after:>10.2f}")
+    rendered = inlined_libsql_sql(insert_sql, insert_params)
+    if not rendered.endswith("12.5, 'Card')"):
+        # A '?' inside a value was taken for the next placeholder and every later value shifted.
+        print('           (the inlined SQL is also wrong: a ? inside a value swallowed the next parameter)')
+
+    statements = [
+        (f'SELECT id, amount FROM expenses WHERE user_id = ? AND month = ? AND amount > {index}', (1, '2026-03'))
+        for index in range(args.statements)
+    ]
+    path = os.path.join(workdir, app.DATABASE)
+
+    def wrapper(cached_statements):
+        conn = sqlite3.connect(path, cached_statements=cached_statements)
+        conn.row_factory = sqlite3.Row
+        return app.DbWrapper(conn, False)
+
+    def run_wrapper(db):
+        return lambda i: db.fetchall(db.execute(*statements[i % len(statements)]))
+
+    raw = sqlite3.connect(path)
+    raw_us = per_call_us(lambda i: raw.execute(*statements[i % len(statements)]).fetchall(), args.calls)
+    before = per_call_us(run_wrapper(wrapper(128)), args.calls)
+    after = per_call_us(run_wrapper(wrapper(app.STATEMENT_CACHE_SIZE)), args.calls)
+    print(f"{f'sqlite, {args.statements} statements, cache 128 -> {app.STATEMENT_CACHE_SIZE}':<44} {before:>10.2f} {after:>10.2f}")
+    print(f"{'sqlite, raw cursor, default cache (reference)':<44} {raw_us:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Regression check for conditional GETs of /api/report_data and /api/weekly_budget.
+
+Seeds a throwaway database (see load_test.py) and drives the app through the
+Flask test client. For each endpoint and a seeded month it checks that:
+
+  - the first GET returns 200 with a strong ETag
+  - repeating it with If-None-Match returns 304 with no body, after at most
+    one database round-trip (the version lookup; none for report data)
+  - a write to the month changes the ETag, and the next revalidation returns
+    200 with the new data
+  - a write to another month leaves the ETag (and the 304) alone
+  - another user sending the same ETag gets their own data
+
+It then plays two workers with their own in-memory dashboard caches
+(DASHBOARD_CACHE_BACKEND=memory): after worker A writes to the month, or
+fails to invalidate its cache, worker B must answer B's old ETag with 200 and
+the month's current data, not a 304 or its own cached snapshot.
+
+Runs against local SQLite, or the simulated libSQL backend when
+SIMULATED_DB_LATENCY_MS is set.
+
+Usage:
+    python benchmarks/check_conditional_get.py
+"""
+import logging
+import os
+import random
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from load_test import PASSWORD, seed  # noqa: E402
+
+# Database round-trips allowed for a 304, including loading the logged-in user.
+MAX_NOT_MODIFIED_ROUND_TRIPS = {'report_data': 1, 'weekly_budget': 2}
+ENDPOINTS = {
+    'report_data': '/api/report_data?month_select={month}',
+    'weekly_budget': '/api/weekly_budget?month={month}',
+}
+
+
+def main():
+    os.environ.pop('TURSO_DATABASE_URL', None)
+    workdir = tempfile.mkdtemp(prefix='check-conditional-get-')
+    os.chdir(workdir)  # app.py keeps its SQLite database in the working directory
+    os.environ['DASHBOARD_CACHE_PATH'] = os.path.join(workdir, 'cache.db')
+    import app
+    from flask import g
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+    usernames, months = seed(os.path.join(workdir, app.DATABASE), 2, 4, 100, random.Random(1))
+    month, other_month = months[1], months[3]
+
+    round_trips = []
+
+    @app.app.after_request
+    def record_round_trips(response):
+        db = getattr(g, '_database', None)
+        round_trips.append(db.round_trips if db is not None else 0)
+        return response
+
+    clients = []
+    for username in usernames:
+        client = app.app.test_client()
+        client.post('/login', data={'username': username, 'password': PASSWORD})
+        clients.append(client)
+    client, other_user = clients
+
+    failures = []
+    print(f"{'check':<58} {'status':>6} {'bytes':>7} {'round-trips':>11}")
+
+    def get(label, endpoint, etag=None, expected_status=200, user=None, target_month=month):
+        headers = {'If-None-Match': etag} if etag else {}
+        response = (user or client).get(ENDPOINTS[endpoint].format(month=target_month), headers=headers)
+        body = response.get_data()
+        ok = response.status_code == expected_status
+        if expected_status == 304:
+            ok = ok and not body and round_trips[-1] <= MAX_NOT_MODIFIED_ROUND_TRIPS[endpoint]
+        if expected_status == 200:
+            ok = ok and response.headers.get('ETag', '').startswith('"') and bool(body)
+        if not ok:
+            failures.append(f'{endpoint}: {label}')
+        print(f"{'ok' if ok else 'FAIL':<5}{endpoint + ': ' + label:<53} {response.status_code:>6} {len(body):>7} "
+              f"{round_trips[-1]:>11}")
+        return response
+
+    def expense_write(target_month, amount):
+        client.post('/api/add_expense', data={'month_select': target_month, 'date': f'{target_month}-10',
+                                              'category': 'Dining', 'description': 'conditional get check',
+                                              'amount': str(amount), 'payment_type': 'Card'})
+
+    for endpoint in ENDPOINTS:
+        etag = get('first load', endpoint).headers['ETag']
+        get('unchanged, revalidated', endpoint, etag, 304)
+        get('unchanged, weak validator', endpoint, f'W/{etag}', 304)
+        get('another user with the same ETag', endpoint, etag, 200, user=other_user)
+
+        if endpoint == 'weekly_budget':
+            client.post('/api/weekly_budget/set', json={'month': month, 'week_index': 0, 'base_budget': 123})
+        else:
+            expense_write(month, 250)
+        changed = get('after a write to the month', endpoint, etag, 200)
+        if changed.headers['ETag'] == etag:
+            failures.append(f'{endpoint}: ETag changed by a write')
+        etag = changed.headers['ETag']
+        get('revalidated again', endpoint, etag, 304)
+
+        # The weekly budget cycle of a month can reach into its neighbours, so skip one.
+        expense_write(other_month, 75)
+        get('after a write to another month', endpoint, etag, 304)
+
+    check_two_workers(app, client, month, failures)
+
+    if failures:
+        print(f"{len(failures)} check(s) failed: {'; '.join(failures)}", file=sys.stderr)
+        raise SystemExit(1)
+    print('Unchanged months are answered with a bodiless 304 after one version lookup.')
+
+
+def check_two_workers(app, client, month, failures):
+    caches = {name: app.DashboardCache(app.MemoryCacheStore()) for name in ('A', 'B', 'fresh')}
+    path = ENDPOINTS['report_data'].format(month=month)
+
+    def get(worker, etag=None):
+        app._dashboard_cache = caches[worker]
+        return client.get(path, headers={'If-None-Match': etag} if etag else {})
+
+    def write(worker, amount):
+        app._dashboard_cache = caches[worker]
+        client.post('/api/add_expense', data={'month_select': month, 'date': f'{month}-11', 'category': 'Travel',
+                                              'description': 'two workers', 'amount': str(amount),
+                                              'payment_type': 'Cash'})
+
+    def current(label, response):
+        # What a worker with an empty cache reads from the database.
+        caches['fresh'] = app.DashboardCache(app.MemoryCacheStore())
+        fresh = get('fresh')
+        data, expected = response.get_json() or {}, fresh.get_json()
+        for payload in (data, expected):
+            payload.pop('changes_version', None)
+        ok = response.status_code == 200 and data == expected and response.headers.get('ETag') == fresh.headers['ETag']
+        if not ok:
+            failures.append(f'two workers: {label}')
+        print(f"{'ok' if ok else 'FAIL':<5}{'two workers: ' + label:<53} {response.status_code:>6}")
+        return response.headers.get('ETag')
+
+    etag = get('B').headers['ETag']
+    write('A', 333)
+    etag = current("B after A's write", get('B', etag))
+    response = get('B', etag)
+    ok = response.status_code == 304
+    if not ok:
+        failures.append('two workers: B revalidated again')
+    print(f"{'ok' if ok else 'FAIL':<5}{'two workers: B revalidated again':<53} {response.status_code:>6}")
+
+    def failing_bump(keys):
+        raise RuntimeError('cache store unavailable')
+
+    caches['A'].store.bump_versions = failing_bump
+    write('A', 444)
+    current("B after A's failed invalidation", get('B', etag))
+    app._dashboard_cache = None
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""
+Correctness check for delta sync: mutation deltas and the /api/changes feed.
+
+Seeds a throwaway database (see load_test.py) and drives the app through the
+Flask test client, with the expense page large enough to hold a whole month.
+One session makes changes to a month and applies each response's delta to
+its copy of /api/report_data, the way script.js does; a second session of the
+same user only polls /api/changes. After every change it checks that:
+
+  - the writer's copy, with the delta applied, equals a fresh /api/report_data
+  - the response carries the writer's new changes_version, so its own poll
+    finds nothing
+  - the response is a fraction of the size of a full reload
+  - the other session's feed delta brings its copy to the same state, with
+    only the changed expenses in it
+  - polling again without changes answers "nothing changed" after one round-trip
+
+It also checks that writes to another month stay out of the month's feed, and
+that the feed answers "reset" when the log was pruned past the client's
+version or too much changed, and that a mutation response leaves out the
+version when the month changed elsewhere since the writer's version.
+
+Runs against local SQLite, or the simulated libSQL backend when
+SIMULATED_DB_LATENCY_MS is set.
+
+Usage:
+    python benchmarks/check_delta_sync.py
+"""
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from load_test import PASSWORD, seed  # noqa: E402
+
+# Database round-trips allowed for a poll that finds nothing, including loading the logged-in user.
+MAX_EMPTY_POLL_ROUND_TRIPS = 2
+# Keys of /api/report_data that depend on when it was loaded rather than on the month's data.
+VOLATILE_KEYS = ('changes_version', 'expenses_next_cursor')
+
+
+def expense_sort_key(expense):
+    return expense['date'], expense['id']
+
+
+def apply_delta(data, delta):
+    """What applyDelta in script.js does to flaskData, for a month loaded in one page."""
+    changed = delta.get('expenses') or {'upserted': [], 'deleted': []}
+    dropped = set(changed['deleted']) | {expense['id'] for expense in changed['upserted']}
+    expenses = [expense for expense in data['expenses'] if expense['id'] not in dropped] + changed['upserted']
+    data['expenses'] = sorted(expenses, key=expense_sort_key, reverse=True)
+    for key in ('income', 'emis'):
+        if key in delta:
+            data[key] = delta[key]
+    data.update(delta['summary'])
+
+
+def comparable(data):
+    return {key: value for key, value in data.items() if key not in VOLATILE_KEYS}
+
+
+def main():
+    os.environ.pop('TURSO_DATABASE_URL', None)
+    workdir = tempfile.mkdtemp(prefix='check-delta-sync-')
+    os.chdir(workdir)  # app.py keeps its SQLite database in the working directory
+    os.environ.update(EXPENSE_PAGE_SIZE='1000', DASHBOARD_CACHE_PATH=os.path.join(workdir, 'cache.db'))
+    import app
+    from flask import g
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+    database = os.path.join(workdir, app.DATABASE)
+    usernames, months = seed(database, 1, 3, 200, random.Random(1))
+    month, other_month = months[1], months[2]
+
+    round_trips = []
+
+    @app.app.after_request
+    def record_round_trips(response):
+        db = getattr(g, '_database', None)
+        round_trips.append(db.round_trips if db is not None else 0)
+        return response
+
+    writer, reader = app.app.test_client(), app.app.test_client()
+    for client in (writer, reader):
+        client.post('/login', data={'username': usernames[0], 'password': PASSWORD})
+
+    def report_data(client):
+        response = client.get(f'/api/report_data?month_select={month}')
+        return response.get_json(), len(response.get_data())
+
+    writer_data, full_size = report_data(writer)
+    reader_data, _ = report_data(reader)
+    reader_version = reader_data['changes_version']
+    writer_version = writer_data['changes_version']
+    failures = []
+    print(f'Full reload of {month}: {full_size} bytes')
+    print(f"{'check':<40} {'bytes':>7} {'round-trips':>11} {'feed rows':>9} {'feed bytes':>10}")
+
+    def report(ok, label, *columns):
+        if not ok:
+            failures.append(label)
+        print(f"{'ok' if ok else 'FAIL':<5}{label:<35}" + ''.join(columns))
+
+    def poll(label, expect_changes=True):
+        nonlocal reader_version
+        response = reader.get(f'/api/changes?month={month}&since={reader_version}')
+        payload = response.get_json()
+        if payload['status'] != 'success':
+            return None, payload, len(response.get_data())
+        reader_version = payload['version']
+        if payload['delta'] is not None:
+            apply_delta(reader_data, payload['delta'])
+        elif expect_changes:
+            failures.append(f'{label}: feed is empty')
+        return payload['delta'], payload, len(response.get_data())
+
+    def writer_poll_is_empty():
+        payload = writer.get(f'/api/changes?month={month}&since={writer_version}').get_json()
+        return payload['status'] == 'success' and payload['delta'] is None
+
+    def mutate(label, path, touched=(), **request_args):
+        nonlocal writer_version
+        response = writer.post(f'{path}?view_month={month}&since={writer_version}', **request_args)
+        trips = round_trips[-1]
+        payload = response.get_json()
+        delta = payload.get('delta')
+        ok = payload.get('status') == 'success' and delta is not None and delta['month'] == month \
+            and payload.get('version', 0) > writer_version
+        if ok:
+            writer_version = payload['version']
+            apply_delta(writer_data, delta)
+            ok = writer_poll_is_empty()
+            fresh, _ = report_data(writer)
+            ok = ok and comparable(writer_data) == comparable(fresh) and len(response.get_data()) < full_size / 5
+
+        feed_delta, _, feed_size = poll(label)
+        upserted = (feed_delta or {}).get('expenses', {'upserted': [], 'deleted': []})
+        feed_rows = len(upserted['upserted']) + len(upserted['deleted'])
+        feed_ok = comparable(reader_data) == comparable(writer_data) and feed_rows <= len(touched)
+        report(ok and feed_ok, label, f'{len(response.get_data()):>7} {trips:>11} {feed_rows:>9} {feed_size:>10}')
+
+    expense = {'month_select': month, 'date': f'{month}-12', 'category': 'Dining', 'description': 'delta sync',
+               'amount': '42.5', 'payment_type': 'Card'}
+    mutate('add expense', '/api/add_expense', touched=[0], data=expense)
+    added_id = max(expense['id'] for expense in writer_data['expenses'])
+    mutate('edit expense', f'/api/edit_item/{added_id}', touched=[added_id],
+           data={**expense, 'amount': '50', 'date': f'{month}-02'})
+    mutate('edit expense (JSON)', f'/api/edit_expense/{added_id}', touched=[added_id],
+           json={**expense, 'month': month, 'category': 'Travel'})
+    moved_id = next(expense['id'] for expense in writer_data['expenses'] if expense['id'] != added_id)
+    mutate('move expense to another month', f'/api/edit_item/{moved_id}', touched=[moved_id],
+           data={**expense, 'month_select': other_month, 'date': f'{other_month}-03'})
+    mutate('delete expense', f'/api/delete_expense/{added_id}', touched=[added_id], data={})
+    mutate('add income', '/api/add_income', data={'month_select': month, 'description': 'Bonus', 'amount': '500',
+                                                 'frequency': 'once'})
+    mutate('add recurring EMI', '/api/add_emi', data={'month_select': months[0], 'loan_name': 'Bike',
+                                                     'emi_amount': '900', 'frequency': 'monthly'})
+    mutate('set budget', '/api/set_budget', data={'month_select': month, 'category': 'Fuel', 'amount': '3000'})
+    budget_id = writer_data['budgets_list'][0]['id']
+    mutate('edit budget', f'/api/edit_budget/{budget_id}', json={'category': 'Rent', 'amount': 15000})
+    mutate('delete budget', f'/api/delete_budget/{budget_id}', data={})
+
+    delta, _, size = poll('unchanged', expect_changes=False)
+    report(delta is None and round_trips[-1] <= MAX_EMPTY_POLL_ROUND_TRIPS, 'poll without changes',
+           f'{size:>7} {round_trips[-1]:>11}')
+
+    writer.post('/api/add_expense', data={**expense, 'month_select': other_month, 'date': f'{other_month}-05'})
+    delta, _, size = poll('another month', expect_changes=False)
+    report(delta is None, 'write to another month', f'{size:>7} {round_trips[-1]:>11}')
+
+    # The reader changes the month; the writer's next response must not skip that change.
+    reader.post(f'/api/add_expense?view_month={month}&since={reader_version}', data=expense)
+    response = writer.post(f'/api/set_budget?view_month={month}&since={writer_version}',
+                           data={'month_select': month, 'category': 'Fuel', 'amount': '3100'})
+    payload = response.get_json()
+    report('delta' in payload and 'version' not in payload, 'concurrent write keeps the version',
+           f'{len(response.get_data()):>7} {round_trips[-1]:>11}')
+
+    conn = sqlite3.connect(database)
+    conn.executemany(
+        'INSERT INTO expenses (user_id, month, date, category, description, amount, payment_type) VALUES (1, ?, ?, ?, ?, ?, ?)',
+        [(month, f'{month}-20', 'Dining', f'bulk {i}', 1.0, 'Cash') for i in range(app.CHANGE_FEED_MAX_ROWS + 1)]
+    )
+    conn.commit()
+    _, payload, size = poll('too many changes')
+    report(payload['status'] == 'reset', 'too many changes resets', f'{size:>7} {round_trips[-1]:>11}')
+
+    conn.execute(f'DELETE FROM {app.CHANGE_LOG}')  # as if pruned
+    conn.commit()
+    conn.close()
+    _, payload, size = poll('pruned log')
+    report(payload['status'] == 'reset', 'pruned log resets', f'{size:>7} {round_trips[-1]:>11}')
+
+    if failures:
+        print(f"{len(failures)} check(s) failed: {'; '.join(failures)}", file=sys.stderr)
+        raise SystemExit(1)
+    print('Deltas reproduce a full reload of the month.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Correctness check for READ_REPLICA, with two local SQLite files.
+
+Runs the app on a throwaway primary (budget.db) with READ_REPLICA=1 and the
+worker's replica in the same directory. The background sync is slowed to once
+an hour and the check calls ReadReplica.sync() itself, so it controls exactly
+what the replica has seen. Two sessions of the same user take part: the
+writer makes the changes, the reader only reads. The check verifies that:
+
+  - the reader's GETs are served by the replica (no primary round-trips)
+  - the writer always reads its own writes, even before the replica syncs
+  - inserts, updates and deletes reach the reader after the next sync
+  - a replica whose log position was pruned away copies the primary again
+  - a replica older than READ_REPLICA_MAX_STALENESS is not read from
+  - the replica ends up with the same rows as the primary
+  - /metrics reports the replica's position, lag and counters
+
+Usage:
+    python benchmarks/check_read_replica.py
+"""
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from replica import REPLICATION_LOG  # noqa: E402
+
+MONTH = '2026-03'
+PASSWORD = 'Passw0rdX'
+
+
+def table_rows(path, tables):
+    conn = sqlite3.connect(path)
+    try:
+        return {table: sorted(conn.execute(f'SELECT rowid, * FROM {table}').fetchall()) for table in tables}
+    finally:
+        conn.close()
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix='check-read-replica-')
+    os.chdir(workdir)  # app.py keeps its SQLite database in the working directory
+    os.environ.pop('TURSO_DATABASE_URL', None)
+    os.environ.pop('SIMULATED_DB_LATENCY_MS', None)
+    os.environ.update(READ_REPLICA='1', READ_REPLICA_DIR=workdir, READ_REPLICA_SYNC_INTERVAL='3600',
+                      DASHBOARD_CACHE_TTL='0', RATE_LIMIT_PATH=os.path.join(workdir, 'ratelimit.db'))
+    import app
+    from flask import g
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+
+    round_trips = []
+
+    @app.app.after_request
+    def record_round_trips(response):
+        db = getattr(g, '_database', None)
+        round_trips.append(db.round_trips if db is not None else 0)
+        return response
+
+    writer = app.app.test_client()
+    reader = app.app.test_client()
+    writer.post('/register', data={'username': 'replica', 'password': PASSWORD, 'confirmPassword': PASSWORD})
+    for client in (writer, reader):
+        client.post('/login', data={'username': 'replica', 'password': PASSWORD})
+
+    replica = app.get_read_replica()
+    replica.sync()
+    failures = []
+
+    def descriptions(client):
+        response = client.get(f'/api/expenses?month_select={MONTH}')
+        return sorted(expense['description'] for expense in response.get_json()['expenses']), round_trips[-1]
+
+    def check(label, client, expected, local):
+        seen, trips = descriptions(client)
+        ok = seen == expected and (trips == 0) == local
+        if not ok:
+            failures.append(label)
+        source = 'replica' if trips == 0 else f'primary ({trips} round-trips)'
+        print(f"{'ok' if ok else 'FAIL':<5} {label:<48} {source:<26} {seen}")
+
+    def add(description):
+        writer.post('/api/add_expense', data={'month_select': MONTH, 'date': f'{MONTH}-05', 'category': 'Food',
+                                              'description': description, 'amount': '10', 'payment_type': 'Card'})
+
+    def expense_id(description):
+        conn = sqlite3.connect(os.path.join(workdir, app.DATABASE))
+        try:
+            return conn.execute('SELECT id FROM expenses WHERE description = ?', (description,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    # Both sessions logged in just now, so both read from the primary until the next sync.
+    replica.sync()
+    check('reader after sync', reader, [], local=True)
+
+    add('coffee')
+    check('writer sees its insert before the sync', writer, ['coffee'], local=False)
+    check('reader is behind until the sync', reader, [], local=True)
+    replica.sync()
+    check('reader sees the insert after the sync', reader, ['coffee'], local=True)
+    check('writer reads the replica again', writer, ['coffee'], local=True)
+
+    add('lunch')
+    writer.post(f"/api/edit_item/{expense_id('coffee')}", data={
+        'month_select': MONTH, 'date': f'{MONTH}-06', 'category': 'Food', 'description': 'espresso',
+        'amount': '4', 'payment_type': 'Card'})
+    writer.post(f"/api/delete_expense/{expense_id('lunch')}", data={})
+    check('writer sees its update and delete', writer, ['espresso'], local=False)
+    replica.sync()
+    check('reader sees the update and delete', reader, ['espresso'], local=True)
+
+    add('dinner')
+    conn = sqlite3.connect(os.path.join(workdir, app.DATABASE))
+    conn.execute(f'DELETE FROM {REPLICATION_LOG}')  # as if pruned by another worker
+    conn.commit()
+    conn.close()
+    full_syncs = replica.metrics()['full_syncs']
+    replica.sync()
+    copied = replica.metrics()['full_syncs'] == full_syncs + 1
+    if not copied:
+        failures.append('pruned log copies the primary again')
+    print(f"{'ok' if copied else 'FAIL':<5} {'pruned log copies the primary again':<48}")
+    check('reader sees the write behind the gap', reader, ['dinner', 'espresso'], local=True)
+
+    replica.max_staleness = 0
+    check('stale replica falls back to the primary', reader, ['dinner', 'espresso'], local=False)
+    replica.max_staleness = app.READ_REPLICA_MAX_STALENESS
+
+    tables = ['users', 'expenses', 'budgets', 'income', 'emis', 'weekly_budgets', 'weekly_budget_dirty']
+    same = table_rows(os.path.join(workdir, app.DATABASE), tables) == table_rows(replica.path, tables)
+    if not same:
+        failures.append('replica matches the primary')
+    print(f"{'ok' if same else 'FAIL':<5} {'replica matches the primary':<48}")
+
+    metrics = writer.get('/metrics?format=json').get_json().get('read_replica', {})
+    reported = metrics.get('position', 0) > 0 and metrics.get('replica_reads', 0) > 0 and metrics['lag_seconds'] >= 0
+    if not reported:
+        failures.append('/metrics reports the replica')
+    print(f"{'ok' if reported else 'FAIL':<5} {'/metrics reports the replica':<48} {metrics}")
+
+    if failures:
+        print(f"{len(failures)} check(s) failed: {', '.join(failures)}", file=sys.stderr)
+        raise SystemExit(1)
+    print('Read replica checks passed.')
+
+
+if __name__ == '__main__':
+    main()
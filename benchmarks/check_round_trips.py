@@ -0,0 +1,94 @@
+"""
+Regression check for the number of database round-trips per request.
+
+Drives the app through the Flask test client and reads DbWrapper.round_trips at
+the end of each request. Saving a budget grid must cost the same number of
+round-trips whatever its size, and every saved amount must read back exactly.
+
+Runs against a throwaway local SQLite database, or against libSQL when
+TURSO_DATABASE_URL is set (e.g. TURSO_DATABASE_URL=file:/tmp/rt.db TURSO_AUTH_TOKEN=x)
+or SIMULATED_DB_LATENCY_MS selects the simulated libSQL backend.
+
+Usage:
+    python benchmarks/check_round_trips.py
+"""
+import logging
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CATEGORIES = ['Groceries', 'Utilities', 'Transport', 'Entertainment', 'Healthcare', 'Shopping',
+              'Dining', 'Subscriptions', 'Education', 'Travel', 'Rent', 'Other']
+# Round-trips allowed for one budget save, including loading the logged-in user.
+MAX_BUDGET_SAVE_ROUND_TRIPS = 3
+
+
+def main():
+    os.chdir(tempfile.mkdtemp(prefix='check-round-trips-'))  # app.py keeps its SQLite database in the working directory
+    import app
+    from flask import g
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+
+    round_trips = []
+
+    @app.app.after_request
+    def record_round_trips(response):
+        db = getattr(g, '_database', None)
+        round_trips.append(db.round_trips if db is not None else 0)
+        return response
+
+    client = app.app.test_client()
+    client.post('/register', data={'username': 'roundtrips', 'password': 'Passw0rdX', 'confirmPassword': 'Passw0rdX'})
+    client.post('/login', data={'username': 'roundtrips', 'password': 'Passw0rdX'})
+
+    def budget_amounts(months):
+        with app.app.app_context():
+            db = app.get_db()
+            placeholders = ', '.join('?' for _ in months)
+            rows = db.fetchall(db.execute(
+                f'SELECT month, category, amount FROM budgets WHERE month IN ({placeholders})', months
+            ))
+        return {(row['month'], row['category']): row['amount'] for row in rows}
+
+    failures = []
+    print(f"{'request':<44} {'status':>6} {'round-trips':>11}")
+
+    def check(label, path, data, expected_grid):
+        response = client.post(path, data=data)
+        print(f'{label:<44} {response.status_code:>6} {round_trips[-1]:>11}')
+        if response.status_code != 200:
+            failures.append(f'{label}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}')
+        if round_trips[-1] > MAX_BUDGET_SAVE_ROUND_TRIPS:
+            failures.append(f'{label}: {round_trips[-1]} round-trips, expected at most {MAX_BUDGET_SAVE_ROUND_TRIPS}')
+        saved = budget_amounts(sorted({month for month, _ in expected_grid}))
+        wrong = {key: (amount, saved.get(key)) for key, amount in expected_grid.items() if saved.get(key) != amount}
+        if wrong:
+            failures.append(f'{label}: saved amounts differ (expected, actual): {wrong}')
+
+    def months_from(start_month, count):
+        year, month = map(int, start_month.split('-'))
+        return [f'{year + (month - 1 + i) // 12}-{(month - 1 + i) % 12 + 1:02d}' for i in range(count)]
+
+    check('set_budget, 1 category', '/api/set_budget',
+          {'month_select': '2026-01', 'category': 'Rent', 'amount': '900'},
+          {('2026-01', 'Rent'): 900.0})
+    for categories, horizon, amount in [(1, 1, 100.0), (12, 3, 250.5), (12, 12, 300.0), (12, 24, 125.25)]:
+        names = CATEGORIES[:categories]
+        check(f'set_budgets, {categories} categories x {horizon} months', '/api/set_budgets',
+              {'month_select': '2026-02', 'horizon_months': str(horizon),
+               'budget_category[]': names, 'budget_amount[]': [str(amount)] * categories},
+              {(month, name): amount for month in months_from('2026-02', horizon) for name in names})
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    if failures:
+        sys.exit(1)
+    print(f'Every budget save took at most {MAX_BUDGET_SAVE_ROUND_TRIPS} round-trips and read back exactly.')
+
+
+if __name__ == '__main__':
+    main()
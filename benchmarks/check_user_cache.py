@@ -0,0 +1,98 @@
+"""
+Regression check for the round-trips saved by the per-process user cache.
+
+Calls load_user (the Flask-Login user loader every authenticated request runs)
+in a request context and reads DbWrapper.round_trips afterwards. A cache miss
+must cost one round-trip and a hit none; invalidate_cached_user must make the
+next load a miss again. It then replays the same authenticated requests with
+the cache on and with USER_CACHE_TTL=0 and reports the round-trips the cache
+saves per request.
+
+Runs against a throwaway local SQLite database, or the simulated libSQL backend
+when SIMULATED_DB_LATENCY_MS is set.
+
+Usage:
+    python benchmarks/check_user_cache.py
+"""
+import logging
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REQUESTS = 20
+PATHS = ['/api/report_data?month_select=2026-01', '/api/weekly_budget?month=2026-01', '/api/changes?month=2026-01&since=0']
+
+
+def main():
+    os.environ.pop('TURSO_DATABASE_URL', None)
+    os.chdir(tempfile.mkdtemp(prefix='check-user-cache-'))  # app.py keeps its SQLite database in the working directory
+    import app
+    from flask import g
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+
+    round_trips = []
+
+    @app.app.after_request
+    def record_round_trips(response):
+        db = getattr(g, '_database', None)
+        round_trips.append(db.round_trips if db is not None else 0)
+        return response
+
+    client = app.app.test_client()
+    client.post('/register', data={'username': 'usercache', 'password': 'Passw0rdX', 'confirmPassword': 'Passw0rdX'})
+    client.post('/login', data={'username': 'usercache', 'password': 'Passw0rdX'})
+    with client.session_transaction() as session:
+        user_id = session['_user_id']
+
+    failures = []
+    print(f"{'load_user':<40} {'round-trips':>11}")
+
+    def load(label, expected):
+        with app.app.test_request_context('/'):
+            user = app.load_user(user_id)
+            db = getattr(g, '_database', None)
+            trips = db.round_trips if db is not None else 0
+        ok = user is not None and trips == expected
+        if not ok:
+            failures.append(f'{label}: {trips} round-trips, expected {expected}')
+        print(f"{'ok' if ok else 'FAIL':<5}{label:<35} {trips:>11}")
+
+    app.invalidate_cached_user(user_id)
+    load('miss', 1)
+    load('hit', 0)
+    load('hit again', 0)
+    app.invalidate_cached_user(user_id)
+    load('miss after invalidate_cached_user', 1)
+    load('hit after reload', 0)
+
+    def replay():
+        del round_trips[:]
+        for i in range(REQUESTS):
+            client.get(PATHS[i % len(PATHS)])
+        return sum(round_trips)
+
+    replay()  # warms the dashboard cache, so both runs below read the same data
+    cached = replay()
+    ttl, app.USER_CACHE_TTL = app.USER_CACHE_TTL, 0
+    app.invalidate_cached_user(user_id)
+    uncached = replay()
+    app.USER_CACHE_TTL = ttl
+    saved = (uncached - cached) / REQUESTS
+    print(f'{REQUESTS} authenticated requests: {uncached} round-trips without the cache, {cached} with it '
+          f'({saved:.2f} saved per request)')
+    if saved < 1:
+        failures.append(f'the cache saved {saved:.2f} round-trips per request, expected 1')
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    if failures:
+        sys.exit(1)
+    print('load_user answers cache hits without touching the database.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,435 @@
+"""
+Load test of the app's hot endpoints, with a comparison mode for regressions.
+
+`run` seeds a throwaway SQLite database with --users users, each with --months
+months of income, EMIs, budgets and --expenses-per-month expenses, then sends
+--requests requests to each scenario:
+
+  dashboard      GET  /
+  report_data    GET  /api/report_data
+  weekly_budget  GET  /api/weekly_budget
+  add_expense    POST /api/add_expense
+  copy_income    POST /api/copy_income_from_previous
+  copy_budget    POST /api/copy_budget_from_previous
+  copy_emi       POST /api/copy_emi_from_previous
+  mixed          80% dashboard / report / weekly reads, 20% expense adds
+
+Requests go through the Flask test client in this process, or, with
+--gunicorn-workers N, over HTTP to gunicorn serving the seeded database with N
+workers (gunicorn must be installed). --concurrency threads send them either way.
+--simulated-latency-ms serves the database through the simulated libSQL backend
+(simulated_libsql.py), so every round-trip costs what it would against Turso,
+and --simulated-connect-ms adds the cost of opening each new connection.
+--per-request-connections sets DB_POOL_MAX_IDLE=0, so every request opens and
+closes its own connection as before connections were pooled; run with and
+without it and `compare` the results to measure what pooling saves.
+For each scenario the result has throughput, latency percentiles and database
+round-trips and time per request, read from the Server-Timing header.
+
+`compare` reads two results files and flags scenarios whose p95 latency or
+database round-trips grew, or whose throughput fell, by more than --threshold.
+
+Usage:
+    python benchmarks/load_test.py run [--users 5] [--months 6] [--expenses-per-month 500]
+                                       [--requests 200] [--concurrency 1] [--gunicorn-workers 0]
+                                       [--simulated-latency-ms 0] [--simulated-connect-ms 0]
+                                       [--per-request-connections] [--output results.json]
+    python benchmarks/load_test.py compare baseline.json results.json [--threshold 0.25]
+
+`compare` exits 1 if any scenario regressed.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import re
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CATEGORIES = ['Groceries', 'Dining', 'Transport', 'Utilities', 'Shopping', 'Health', 'Travel', 'Fuel']
+PAYMENT_TYPES = ['Card', 'Cash', 'UPI']
+PASSWORD = 'Passw0rdX'
+FIRST_MONTH = (2025, 1)
+SCENARIOS = ['dashboard', 'report_data', 'weekly_budget', 'add_expense', 'copy_income', 'copy_budget', 'copy_emi', 'mixed']
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) round-trips')
+
+
+# --- Seeding ---
+
+def seed(path, user_count, month_count, expenses_per_month, rng):
+    """Fills the app's database at path; returns the usernames and months seeded."""
+    import bcrypt
+    # Cheap hashes keep logging in every client quick; login time is not what is measured here.
+    password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+    months = [f'{FIRST_MONTH[0] + (FIRST_MONTH[1] - 1 + m) // 12}-{(FIRST_MONTH[1] - 1 + m) % 12 + 1:02d}'
+              for m in range(month_count)]
+
+    conn = sqlite3.connect(path)
+    usernames = []
+    for index in range(user_count):
+        username = f'load{index}'
+        conn.execute('INSERT INTO users (username, password_hash, created_at) VALUES (?, ?, ?)',
+                     (username, password_hash, '2025-01-01'))
+        user_id = conn.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()[0]
+        usernames.append(username)
+        for month in months:
+            year, month_of_year = map(int, month.split('-'))
+            conn.executemany(
+                'INSERT INTO expenses (user_id, month, date, category, description, amount, payment_type) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(user_id, month, date(year, month_of_year, rng.randrange(1, 29)).isoformat(), rng.choice(CATEGORIES),
+                  f'expense {i}', rng.randrange(100, 500000) / 100, rng.choice(PAYMENT_TYPES))
+                 for i in range(expenses_per_month)]
+            )
+            conn.executemany('INSERT INTO income (user_id, month, description, amount) VALUES (?, ?, ?, ?)',
+                             [(user_id, month, 'Salary', 85000.0), (user_id, month, 'Interest', 412.37)])
+            conn.execute('INSERT INTO emis (user_id, month, loan_name, emi_amount) VALUES (?, ?, ?, ?)',
+                         (user_id, month, 'Car', 12499.99))
+            conn.executemany('INSERT INTO budgets (user_id, month, category, amount) VALUES (?, ?, ?, ?)',
+                             [(user_id, month, category, 20000.0) for category in CATEGORIES[:6]])
+    conn.commit()
+    conn.close()
+    return usernames, months
+
+
+# --- Workload ---
+
+def scenario_request(scenario, months, rng):
+    """(method, path, form, json) of one request of a scenario."""
+    month = rng.choice(months)
+    if scenario == 'mixed':
+        scenario = rng.choices(['dashboard', 'report_data', 'weekly_budget', 'add_expense'], weights=[4, 2, 2, 2])[0]
+    if scenario == 'dashboard':
+        return 'GET', f'/?month_select={month}', None, None
+    if scenario == 'report_data':
+        return 'GET', f'/api/report_data?month_select={month}', None, None
+    if scenario == 'weekly_budget':
+        return 'GET', f'/api/weekly_budget?month={month}', None, None
+    if scenario == 'add_expense':
+        return 'POST', '/api/add_expense', {
+            'month_select': month,
+            'date': f'{month}-{rng.randrange(1, 29):02d}',
+            'category': rng.choice(CATEGORIES),
+            'description': 'Load test expense',
+            'amount': f'{rng.randrange(100, 50000) / 100:.2f}',
+            'payment_type': rng.choice(PAYMENT_TYPES),
+        }, None
+    if scenario.startswith('copy_'):
+        # Never the first month, so the previous month always has data to copy.
+        return 'POST', f'/api/{scenario}_from_previous', None, {'current_month': rng.choice(months[1:])}
+    raise ValueError(f'Unknown scenario: {scenario}')
+
+
+class TestClientSession:
+    """One logged-in user on the Flask test client."""
+
+    def __init__(self, app_module, username):
+        self._client = app_module.app.test_client()
+        self._client.post('/login', data={'username': username, 'password': PASSWORD})
+
+    def send(self, method, path, form, json_body):
+        response = self._client.open(path, method=method, data=form, json=json_body)
+        return response.status_code, response.headers.get('Server-Timing', '')
+
+
+class HttpSession:
+    """One logged-in user talking HTTP to a running server."""
+
+    def __init__(self, base_url, username):
+        import requests
+        self._base_url = base_url
+        self._session = requests.Session()
+        response = self._session.post(f'{base_url}/login', data={'username': username, 'password': PASSWORD})
+        if response.url.rstrip('/').endswith('/login'):
+            raise RuntimeError(f'Could not log in as {username}')
+
+    def send(self, method, path, form, json_body):
+        response = self._session.request(method, f'{self._base_url}{path}', data=form, json=json_body,
+                                         allow_redirects=False)
+        return response.status_code, response.headers.get('Server-Timing', '')
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(percent / 100 * len(sorted_values)) - 1))]
+
+
+def run_scenario(scenario, session_for, usernames, months, request_count, concurrency, seed_value):
+    """Sends request_count requests from concurrency threads; returns the scenario's statistics."""
+    latencies = []
+    round_trips = []
+    db_ms = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(thread_index):
+        rng = random.Random(f'{seed_value}:{scenario}:{thread_index}')
+        sessions = {}
+        samples = []
+        for request_index in range(thread_index, request_count, concurrency):
+            username = usernames[request_index % len(usernames)]
+            if username not in sessions:
+                sessions[username] = session_for(username)
+            method, path, form, json_body = scenario_request(scenario, months, rng)
+            started = time.perf_counter()
+            status, server_timing = sessions[username].send(method, path, form, json_body)
+            samples.append((time.perf_counter() - started, status, path, server_timing))
+        with lock:
+            for seconds, status, path, server_timing in samples:
+                latencies.append(seconds * 1000)
+                match = SERVER_TIMING_DB.search(server_timing)
+                if match:
+                    db_ms.append(float(match.group(1)))
+                    round_trips.append(int(match.group(2)))
+                if status >= 400:
+                    errors.append(f'{status} {path}')
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:5],
+        'seconds': round(seconds, 3),
+        'throughput_rps': round(len(latencies) / seconds, 1) if seconds else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        'round_trips_per_request': round(sum(round_trips) / len(round_trips), 2) if round_trips else None,
+        'db_ms_per_request': round(sum(db_ms) / len(db_ms), 2) if db_ms else None,
+    }
+
+
+# --- gunicorn ---
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def start_gunicorn(workdir, workers, timeout=60):
+    import requests
+    port = free_port()
+    env = {key: value for key, value in os.environ.items() if not key.startswith('TURSO_')}
+    log_path = os.path.join(workdir, 'gunicorn.log')
+    with open(log_path, 'w') as log_file:
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'app:app', '--workers', str(workers),
+             '--bind', f'127.0.0.1:{port}', '--chdir', workdir, '--pythonpath', ROOT, '--timeout', '120'],
+            stdout=log_file, stderr=subprocess.STDOUT, env=env,
+        )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with code {process.returncode}; see {log_path}')
+        try:
+            if requests.get(f'{base_url}/health', timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f'gunicorn did not answer /health within {timeout}s; see {log_path}')
+
+
+def stop_gunicorn(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+# --- Commands ---
+
+def run(args):
+    os.environ.pop('TURSO_DATABASE_URL', None)
+    os.environ.pop('SIMULATED_DB_LATENCY_MS', None)
+    os.environ.pop('DB_POOL_MAX_IDLE', None)
+    # Read by app.py in this process and inherited by gunicorn.
+    if args.simulated_latency_ms:
+        os.environ['SIMULATED_DB_LATENCY_MS'] = str(args.simulated_latency_ms)
+        os.environ['SIMULATED_DB_JITTER_MS'] = str(args.simulated_jitter_ms)
+        os.environ['SIMULATED_DB_CONNECT_MS'] = str(args.simulated_connect_ms)
+    if args.per_request_connections:
+        os.environ['DB_POOL_MAX_IDLE'] = '0'
+    workdir = tempfile.mkdtemp(prefix='load-test-')
+    os.chdir(workdir)  # app.py keeps its SQLite database in the working directory
+    import app
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+
+    started = time.perf_counter()
+    usernames, months = seed(os.path.join(workdir, app.DATABASE), args.users, args.months,
+                             args.expenses_per_month, random.Random(args.seed))
+    print(f'Seeded {args.users} users x {args.months} months x {args.expenses_per_month} expenses '
+          f'in {time.perf_counter() - started:.1f}s ({workdir})', file=sys.stderr)
+
+    process = None
+    if args.gunicorn_workers:
+        process, base_url = start_gunicorn(workdir, args.gunicorn_workers)
+        session_for = lambda username: HttpSession(base_url, username)  # noqa: E731
+        mode = 'gunicorn'
+    else:
+        session_for = lambda username: TestClientSession(app, username)  # noqa: E731
+        mode = 'test-client'
+
+    results = {
+        'meta': {
+            'mode': mode,
+            'gunicorn_workers': args.gunicorn_workers,
+            'concurrency': args.concurrency,
+            'simulated_latency_ms': args.simulated_latency_ms,
+            'simulated_jitter_ms': args.simulated_jitter_ms,
+            'simulated_connect_ms': args.simulated_connect_ms,
+            'per_request_connections': args.per_request_connections,
+            'users': args.users,
+            'months': args.months,
+            'expenses_per_month': args.expenses_per_month,
+            'requests': args.requests,
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+        },
+        'scenarios': {},
+    }
+    try:
+        print(f"{'scenario':<14} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'trips':>6} {'db ms':>7} {'errors':>6}",
+              file=sys.stderr)
+        for scenario in args.scenarios:
+            stats = run_scenario(scenario, session_for, usernames, months, args.requests, args.concurrency, args.seed)
+            results['scenarios'][scenario] = stats
+            print(f"{scenario:<14} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} "
+                  f"{stats['p99_ms']:>8.2f} {stats['round_trips_per_request'] or 0:>6.1f} "
+                  f"{stats['db_ms_per_request'] or 0:>7.2f} {stats['errors']:>6}", file=sys.stderr)
+    finally:
+        if process is not None:
+            stop_gunicorn(process)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+        print(f'Results written to {args.output}', file=sys.stderr)
+    else:
+        print(output)
+    if any(stats['errors'] for stats in results['scenarios'].values()):
+        sys.exit(1)
+
+
+def regressions(baseline, current, threshold, min_ms):
+    """Human-readable regressions of current against baseline, per scenario present in both."""
+    found = []
+    for scenario, new in current['scenarios'].items():
+        old = baseline['scenarios'].get(scenario)
+        if old is None:
+            continue
+        if new['p95_ms'] > old['p95_ms'] * (1 + threshold) and new['p95_ms'] - old['p95_ms'] >= min_ms:
+            found.append(f"{scenario}: p95 {old['p95_ms']:.2f}ms -> {new['p95_ms']:.2f}ms")
+        if new['throughput_rps'] < old['throughput_rps'] * (1 - threshold):
+            found.append(f"{scenario}: throughput {old['throughput_rps']:.1f} -> {new['throughput_rps']:.1f} req/s")
+        old_trips, new_trips = old.get('round_trips_per_request'), new.get('round_trips_per_request')
+        if old_trips is not None and new_trips is not None and new_trips > old_trips + 0.01:
+            found.append(f'{scenario}: round-trips per request {old_trips} -> {new_trips}')
+        if new['errors'] > old['errors']:
+            found.append(f"{scenario}: errors {old['errors']} -> {new['errors']}")
+    return found
+
+
+def compare(args):
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(args.current) as current_file:
+        current = json.load(current_file)
+    differences = [
+        f"{key} {baseline['meta'].get(key)} vs {current['meta'].get(key)}"
+        for key in sorted(set(baseline['meta']) | set(current['meta']))
+        if key not in ('started_at', 'python') and baseline['meta'].get(key) != current['meta'].get(key)
+    ]
+    if differences:
+        print(f"Warning: the runs were configured differently ({'; '.join(differences)})")
+
+    print(f"{'scenario':<14} {'p95 ms':>17} {'req/s':>17} {'round-trips':>13}")
+    for scenario, new in current['scenarios'].items():
+        old = baseline['scenarios'].get(scenario)
+        if old is None:
+            print(f'{scenario:<14} (not in baseline)')
+            continue
+        print(f"{scenario:<14} {old['p95_ms']:>7.2f} -> {new['p95_ms']:<7.2f} "
+              f"{old['throughput_rps']:>7.1f} -> {new['throughput_rps']:<7.1f} "
+              f"{old.get('round_trips_per_request') or 0:>5.1f} -> {new.get('round_trips_per_request') or 0:<5.1f}")
+
+    found = regressions(baseline, current, args.threshold, args.min_ms)
+    for regression in found:
+        print(f'REGRESSION {regression}')
+    if found:
+        sys.exit(1)
+    print(f'No regressions beyond {args.threshold:.0%}.')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='seed a database and load-test it')
+    run_parser.add_argument('--users', type=int, default=5)
+    run_parser.add_argument('--months', type=int, default=6)
+    run_parser.add_argument('--expenses-per-month', type=int, default=500)
+    run_parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    run_parser.add_argument('--concurrency', type=int, default=1, help='threads sending requests')
+    run_parser.add_argument('--gunicorn-workers', type=int, default=0,
+                            help='serve through gunicorn with this many workers instead of the test client')
+    run_parser.add_argument('--simulated-latency-ms', type=float, default=0,
+                            help='serve the database through the simulated libSQL backend with this latency')
+    run_parser.add_argument('--simulated-jitter-ms', type=float, default=0)
+    run_parser.add_argument('--simulated-connect-ms', type=float, default=0,
+                            help='extra simulated latency of the first round-trip of each new connection')
+    run_parser.add_argument('--per-request-connections', action='store_true',
+                            help='open and close a connection per request instead of pooling them')
+    run_parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--output', help='write the JSON results here instead of stdout')
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser('compare', help='flag regressions between two results files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.25,
+                                help='relative change in p95 or throughput counted as a regression')
+    compare_parser.add_argument('--min-ms', type=float, default=2.0,
+                                help='ignore p95 increases smaller than this many milliseconds')
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    if args.command == 'run' and args.months < 2:
+        parser.error('--months must be at least 2 so the copy scenarios have a previous month')
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Dashboard latency while the login form is flooded with wrong passwords.
+
+Seeds a throwaway database (see load_test.py), gives every user a real bcrypt
+hash at --rounds, then measures GET / for one logged-in user three times:
+
+  idle          no other traffic
+  unprotected   while --flood-threads threads post wrong-password logins with
+                rate limiting off and one hashing thread per flood thread, so
+                every attempt runs bcrypt as soon as it arrives
+  protected     the same flood with the app's configured rate limits and
+                PasswordHasher pool (BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, ...)
+
+Flood logins come from --flood-ips client addresses and target the seeded
+usernames plus as many unknown ones. The outcome counts show how many attempts
+were turned away by the rate limiter (429) or the full hashing queue (503)
+instead of reaching bcrypt.
+
+Usage:
+    python benchmarks/login_flood.py [--rounds 12] [--flood-threads 16] [--flood-ips 4]
+                                     [--dashboard-requests 40]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from load_test import PASSWORD, TestClientSession, percentile, seed  # noqa: E402
+
+
+def measure_dashboard(session, months, request_count):
+    latencies = []
+    for index in range(request_count):
+        started = time.perf_counter()
+        status, _ = session.send('GET', f'/?month_select={months[index % len(months)]}', None, None)
+        if status != 200:
+            raise RuntimeError(f'Dashboard returned {status}')
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return latencies
+
+
+def flood(app_module, usernames, ip_count, thread_count, stop):
+    """Posts wrong-password logins from thread_count threads until stop is set; returns status counts."""
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def worker(thread_index):
+        rng = random.Random(thread_index)
+        client = app_module.app.test_client()
+        counts = Counter()
+        while not stop.is_set():
+            address_index = rng.randrange(ip_count)
+            address = f'10.0.{address_index // 250}.{address_index % 250 + 1}'
+            response = client.post('/login', data={'username': rng.choice(usernames), 'password': 'wrong-password'},
+                                   environ_base={'REMOTE_ADDR': address})
+            counts[response.status_code] += 1
+        with lock:
+            outcomes.update(counts)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def run_phase(name, app_module, session, months, usernames, args, flooding):
+    stop = threading.Event()
+    threads, outcomes = ([], Counter())
+    if flooding:
+        threads, outcomes = flood(app_module, usernames, args.flood_ips, args.flood_threads, stop)
+        time.sleep(0.5)  # let the flood build up before measuring
+    started = time.perf_counter()
+    latencies = measure_dashboard(session, months, args.dashboard_requests)
+    seconds = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+    attempts = sum(outcomes.values())
+    print(f"{name:<12} {percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f} {latencies[-1]:>8.1f} "
+          f"{attempts / seconds if flooding else 0:>10.1f} {outcomes.get(302, 0):>7} {outcomes.get(429, 0):>6} "
+          f"{outcomes.get(503, 0):>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt cost of the seeded password hashes')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--months', type=int, default=3)
+    parser.add_argument('--expenses-per-month', type=int, default=300)
+    parser.add_argument('--flood-threads', type=int, default=16)
+    parser.add_argument('--flood-ips', type=int, default=4, help='distinct client addresses the flood comes from')
+    parser.add_argument('--dashboard-requests', type=int, default=40)
+    args = parser.parse_args()
+
+    os.environ.pop('TURSO_DATABASE_URL', None)
+    os.environ.pop('SIMULATED_DB_LATENCY_MS', None)
+    workdir = tempfile.mkdtemp(prefix='login-flood-')
+    os.chdir(workdir)  # app.py keeps its SQLite database in the working directory
+    os.environ['RATE_LIMIT_PATH'] = os.path.join(workdir, 'ratelimit.db')
+    import bcrypt
+    import app
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+
+    path = os.path.join(workdir, app.DATABASE)
+    usernames, months = seed(path, args.users, args.months, args.expenses_per_month, random.Random(1))
+    password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(args.rounds)).decode('utf-8')
+    conn = app.sqlite3.connect(path)
+    conn.execute('UPDATE users SET password_hash = ?', (password_hash,))
+    conn.commit()
+    conn.close()
+    session = TestClientSession(app, usernames[0])
+    flood_usernames = usernames[1:] + [f'unknown{index}' for index in range(args.users)]
+
+    configured = app.password_hasher
+    limits = (app.LOGIN_ATTEMPTS_PER_IP, app.LOGIN_FAILURES_PER_USERNAME)
+    print(f'bcrypt cost {args.rounds}: {app.measure_cost(args.rounds) * 1000:.0f}ms per hash; '
+          f'{args.flood_threads} flood threads from {args.flood_ips} addresses', file=sys.stderr)
+    print(f"{'phase':<12} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'logins/s':>10} {'failed':>7} {'429':>6} {'503':>6}")
+    run_phase('idle', app, session, months, flood_usernames, args, flooding=False)
+
+    app.password_hasher = app.PasswordHasher(rounds=args.rounds, max_workers=args.flood_threads,
+                                             max_pending=args.flood_threads)
+    app.LOGIN_ATTEMPTS_PER_IP = app.LOGIN_FAILURES_PER_USERNAME = 10 ** 9
+    run_phase('unprotected', app, session, months, flood_usernames, args, flooding=True)
+
+    app.password_hasher = configured
+    app.LOGIN_ATTEMPTS_PER_IP, app.LOGIN_FAILURES_PER_USERNAME = limits
+    app.get_login_rate_limiter().prune()
+    run_phase('protected', app, session, months, flood_usernames, args, flooding=True)
+    print(f'hasher: {app.password_hasher.metrics()}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
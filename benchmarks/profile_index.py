@@ -0,0 +1,121 @@
+"""
+Per-query and total latency of the dashboard page, index(), on a simulated remote database.
+
+Seeds a throwaway database (see load_test.py) and serves it through the
+simulated libSQL backend (simulated_libsql.py), so every round-trip costs
+--latency-ms the way it would against Turso. It then reports:
+
+  - each query load_dashboard_data sends, run on its own: its latency and rows,
+    and their sum, which is what index() paid when it ran them one by one
+  - the same queries sent as the one batch load_dashboard_data sends
+  - GET / through the Flask test client with a cold and a warm dashboard cache,
+    and without month_select (which adds the smart-default month lookup): total
+    latency, database time and round-trips from the Server-Timing header
+
+Each figure is the median of --repeat runs.
+
+Usage:
+    python benchmarks/profile_index.py [--latency-ms 20] [--jitter-ms 0] [--expenses-per-month 500] [--repeat 5]
+"""
+import argparse
+import logging
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from load_test import PASSWORD, SERVER_TIMING_DB, seed  # noqa: E402
+
+SERVER_TIMING_APP = re.compile(r'app;dur=([\d.]+)')
+
+
+def statement_label(statement):
+    """The first words of a statement's SQL, to tell the queries apart in the report."""
+    sql = statement[0] if isinstance(statement, tuple) else statement
+    return ' '.join(sql.split())[:48]
+
+
+def timed(function, repeat):
+    """(median milliseconds, last result) of repeat calls of function."""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency-ms', type=float, default=20, help='simulated latency of every round-trip')
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--months', type=int, default=3)
+    parser.add_argument('--expenses-per-month', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5, help='runs of each measurement; the median is reported')
+    args = parser.parse_args()
+
+    os.environ.pop('TURSO_DATABASE_URL', None)
+    os.environ['SIMULATED_DB_LATENCY_MS'] = str(args.latency_ms)
+    os.environ['SIMULATED_DB_JITTER_MS'] = str(args.jitter_ms)
+    workdir = tempfile.mkdtemp(prefix='profile-index-')
+    os.chdir(workdir)  # app.py keeps its SQLite database in the working directory
+    import app
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+    usernames, months = seed(os.path.join(workdir, app.DATABASE), 1, args.months, args.expenses_per_month,
+                             random.Random(1))
+    month = months[-1]
+
+    client = app.app.test_client()
+    client.post('/login', data={'username': usernames[0], 'password': PASSWORD})
+    with client.session_transaction() as session:
+        user_id = int(session['_user_id'])
+
+    print(f'index() for {month} ({args.expenses_per_month} expenses), '
+          f'simulated latency {args.latency_ms:g}ms ± {args.jitter_ms:g}ms, median of {args.repeat}')
+    print(f"{'query':<50} {'ms':>8} {'rows':>6}")
+    with app.app.app_context():
+        db = app.get_db()
+        statements = [app.available_months_statement(user_id), app.category_options_statement(user_id, month)]
+        statements += app.budget_data_statements(user_id, month)
+        sequential_ms = 0.0
+        for statement in statements:
+            sql, params = db._split_statement(statement)
+            ms, rows = timed(lambda: db.fetchall(db.execute(sql, params)), args.repeat)
+            sequential_ms += ms
+            print(f'{statement_label(statement):<50} {ms:>8.1f} {len(rows):>6}')
+        batch_ms, _ = timed(lambda: db.fetchall_batch(statements), args.repeat)
+    print(f"{f'sum of {len(statements)} round-trips':<50} {sequential_ms:>8.1f}")
+    print(f"{'one batch (1 round-trip)':<50} {batch_ms:>8.1f}")
+
+    def get_index(path, cold):
+        if cold:
+            app.invalidate_budget_data(user_id, [month])
+        response = client.get(path)
+        if response.status_code != 200:
+            raise SystemExit(f'GET {path} answered {response.status_code}')
+        return response.headers.get('Server-Timing', '')
+
+    print()
+    print(f"{'GET /':<50} {'ms':>8} {'db ms':>8} {'trips':>6}")
+    for label, path, cold in [('cold cache', f'/?month_select={month}', True),
+                              ('warm cache', f'/?month_select={month}', False),
+                              ('no month_select, warm', '/', False)]:
+        get_index(path, cold)  # warms the statement text and, for the warm runs, the cache
+        timings = [get_index(path, cold) for _ in range(args.repeat)]
+        total_ms = statistics.median(float(SERVER_TIMING_APP.search(timing).group(1)) for timing in timings)
+        db_matches = [SERVER_TIMING_DB.search(timing) for timing in timings]
+        db_ms = statistics.median(float(match.group(1)) for match in db_matches)
+        trips = statistics.median(int(match.group(2)) for match in db_matches)
+        print(f'{label:<50} {total_ms:>8.1f} {db_ms:>8.1f} {trips:>6g}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,336 @@
+"""
+Bulk expense import from CSV or OFX bank statements.
+
+Files are parsed as streams and imported in chunks: each chunk is validated,
+checked for duplicates with one batch of indexed lookups, and inserted in one
+DbWrapper.execute_batch transaction, so memory stays flat however long the file.
+
+A row is a duplicate when an expense with the same (date, amount, description)
+existed before the import started. Matching is count-aware: if the database
+holds one such expense and the file two, the second is imported, so repeated
+identical transactions (two coffees on the same day) survive re-imports.
+"""
+import csv
+import io
+import math
+import re
+from datetime import date, datetime
+
+from schedules import MONTH_PATTERN
+
+IMPORT_CHUNK_SIZE = 2000  # Rows per transaction; each commit is an fsync locally and a round-trip on Turso
+LOOKUP_BATCH_SIZE = 250  # 3 parameters per key keeps each duplicate lookup under SQLite's 999 limit
+MAX_REPORTED_ERRORS = 1000
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d')
+
+# Accepted CSV header names (lower-cased) for each expense field.
+CSV_COLUMNS = {
+    'date': ('date', 'transaction date', 'txn date', 'value date'),
+    'description': ('description', 'narration', 'details', 'memo', 'name'),
+    'amount': ('amount', 'debit', 'withdrawal', 'withdrawal amount'),
+    'category': ('category',),
+    'payment_type': ('payment_type', 'payment type', 'payment method', 'method'),
+    'month': ('month',),
+}
+REQUIRED_CSV_FIELDS = ('date', 'description', 'amount')
+
+
+class ImportFileError(ValueError):
+    """
+    The file cannot be imported (unknown format, missing columns, unreadable
+    content). If it is raised part-way through, summary counts what was
+    committed before it.
+    """
+
+    summary = None
+
+
+class ImportAborted(Exception):
+    """A chunk failed to insert; summary counts what was committed before it."""
+
+    def __init__(self, summary, error):
+        super().__init__(str(error))
+        self.summary = summary
+
+
+# --- Parsers: yield (row_number, {field: raw value}) ---
+
+def parse_csv_rows(stream):
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+    reader = csv.reader(text)
+    try:
+        yield from _csv_rows(reader)
+    except (csv.Error, UnicodeDecodeError) as error:
+        raise ImportFileError(f'Could not read the CSV file at line {reader.line_num}: {error}.') from error
+
+
+def _csv_rows(reader):
+    header = next(reader, None)
+    if header is None:
+        raise ImportFileError('The file is empty.')
+
+    positions = {}
+    normalized_header = [column.strip().lower() for column in header]
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in normalized_header:
+                positions[field] = normalized_header.index(alias)
+                break
+    missing = [field for field in REQUIRED_CSV_FIELDS if field not in positions]
+    if missing:
+        raise ImportFileError(f"CSV is missing required column(s): {', '.join(missing)}.")
+
+    for row_number, values in enumerate(reader, start=2):  # Row 1 is the header
+        if not any(value.strip() for value in values):
+            continue
+        yield row_number, {
+            field: values[position].strip() if position < len(values) else ''
+            for field, position in positions.items()
+        }
+
+
+_OFX_TOKEN = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def parse_ofx_rows(stream, read_size=64 * 1024):
+    """
+    Statement transactions (<STMTTRN>) from an OFX file, SGML or XML flavoured.
+    Debits become expenses; credits are reported as row errors.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8', errors='replace')
+    try:
+        yield from _ofx_rows(text, read_size)
+    except UnicodeDecodeError as error:
+        raise ImportFileError(f'Could not read the OFX file: {error}.') from error
+
+
+def _ofx_rows(text, read_size):
+    buffer = ''
+    transaction = None
+    row_number = 0
+    while True:
+        chunk = text.read(read_size)
+        buffer += chunk
+        # A tag's value runs to the next '<', so only text before the last '<' is complete.
+        cut = len(buffer) if not chunk else buffer.rfind('<')
+        if cut > 0:
+            for closing, tag, value in _OFX_TOKEN.findall(buffer[:cut]):
+                tag = tag.upper()
+                if tag == 'STMTTRN':
+                    if not closing:
+                        transaction = {}
+                    elif transaction is not None:
+                        row_number += 1
+                        yield row_number, _ofx_transaction_row(transaction)
+                        transaction = None
+                elif transaction is not None and not closing:
+                    transaction[tag] = value.strip()
+            buffer = buffer[cut:]
+        if not chunk:
+            return
+
+
+def _ofx_transaction_row(transaction):
+    amount = transaction.get('TRNAMT', '')
+    try:
+        if float(amount) < 0:
+            amount = amount.strip().lstrip('-')
+        else:
+            amount = 'credit'
+    except ValueError:
+        pass
+    posted = transaction.get('DTPOSTED', '')
+    return {
+        'date': f'{posted[0:4]}-{posted[4:6]}-{posted[6:8]}' if len(posted) >= 8 else posted,
+        'description': transaction.get('NAME') or transaction.get('MEMO', ''),
+        'amount': amount,
+    }
+
+
+PARSERS = {'csv': parse_csv_rows, 'ofx': parse_ofx_rows}
+
+
+def detect_format(filename, requested_format=None):
+    if requested_format:
+        if requested_format not in PARSERS:
+            raise ImportFileError(f"Unknown import format: {requested_format!r}. Use csv or ofx.")
+        return requested_format
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    if extension in ('ofx', 'qfx'):
+        return 'ofx'
+    if extension in ('csv', 'txt'):
+        return 'csv'
+    raise ImportFileError('Could not tell the file format from its name; pass format=csv or format=ofx.')
+
+
+# --- Validation ---
+
+_ISO_DATE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
+_DAY_FIRST_DATE = re.compile(r'^(\d{1,2})[/-](\d{1,2})[/-](\d{4})$')
+
+
+def _parse_date(value):
+    # Fast paths for the common formats; strptime is slow enough to dominate large imports.
+    match = _ISO_DATE.match(value)
+    if match:
+        year, month, day = match.groups()
+    else:
+        match = _DAY_FIRST_DATE.match(value)
+        if match:
+            day, month, year = match.groups()
+    if match:
+        try:
+            return date(int(year), int(month), int(day)).isoformat()
+        except ValueError:
+            return None
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def validate_expense_row(raw, default_category=None, default_payment_type=None):
+    """Returns (expense, errors): an expenses row ready to insert, or None and what is wrong."""
+    errors = []
+
+    expense_date = _parse_date(raw.get('date', ''))
+    if expense_date is None:
+        errors.append(f"Invalid date {raw.get('date', '')!r}; use YYYY-MM-DD or DD/MM/YYYY.")
+
+    amount = None
+    raw_amount = raw.get('amount', '')
+    if raw_amount == 'credit':
+        errors.append('Credit transaction; only debits are imported as expenses.')
+    else:
+        try:
+            amount = float(re.sub(r'[₹$,\s]', '', raw_amount))
+        except ValueError:
+            pass
+        if amount is None or not math.isfinite(amount) or amount <= 0:
+            errors.append(f'Invalid amount {raw_amount!r}; use a positive number.')
+
+    description = raw.get('description', '')
+    if not description:
+        errors.append('Description is required.')
+
+    category = raw.get('category') or default_category
+    if not category:
+        errors.append('Category is required (add a category column or choose a default category).')
+
+    month = raw.get('month') or (expense_date[:7] if expense_date else None)
+    if month and not MONTH_PATTERN.match(month):
+        errors.append(f'Invalid month {month!r}; use YYYY-MM.')
+
+    if errors:
+        return None, errors
+    return {
+        'date': expense_date,
+        'month': month,
+        'category': category,
+        'description': description,
+        'amount': amount,
+        'payment_type': raw.get('payment_type') or default_payment_type or None,
+    }, []
+
+
+# --- Import ---
+
+def duplicate_lookup_statement(user_id, keys, max_existing_id):
+    values = ', '.join('(?, ?, ?)' for _ in keys)
+    return (f'''
+        SELECT k.column1 as date, k.column2 as amount, k.column3 as description, COUNT(e.id) as count
+        FROM (VALUES {values}) k
+        JOIN expenses e ON e.user_id = ? AND e.date = k.column1 AND e.amount = k.column2
+                       AND e.description = k.column3 AND e.id <= ?
+        GROUP BY k.column1, k.column2, k.column3
+    ''', (*[value for key in keys for value in key], user_id, max_existing_id))
+
+
+def import_expenses(db, user_id, rows, dry_run=False, default_category=None, default_payment_type=None,
+                    extra_statements=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Validates, dedupes and (unless dry_run) inserts parsed rows in chunked transactions.
+    extra_statements(expenses) may add statements to each chunk's transaction.
+    Returns a summary dict with a per-row error report (capped at MAX_REPORTED_ERRORS).
+    """
+    max_id_row = db.fetchone(db.execute('SELECT COALESCE(MAX(id), 0) as max_id FROM expenses'))
+    max_existing_id = max_id_row['max_id'] if max_id_row else 0
+
+    summary = {
+        'dry_run': dry_run,
+        'total_rows': 0,
+        'valid_rows': 0,
+        'duplicates': 0,
+        'imported': 0,
+        'error_count': 0,
+        'errors': [],
+        'months': set(),
+    }
+    # Occurrences so far in this file of keys that already existed before the import.
+    seen_existing = {}
+
+    def flush(chunk):
+        keys = list(dict.fromkeys((expense['date'], expense['amount'], expense['description']) for expense in chunk))
+        lookups = [
+            duplicate_lookup_statement(user_id, keys[start:start + LOOKUP_BATCH_SIZE], max_existing_id)
+            for start in range(0, len(keys), LOOKUP_BATCH_SIZE)
+        ]
+        existing = {
+            (row['date'], row['amount'], row['description']): row['count']
+            for rows in db.fetchall_batch(lookups) for row in rows
+        }
+        new_expenses = []
+        for expense in chunk:
+            key = (expense['date'], expense['amount'], expense['description'])
+            if key in existing:
+                seen_existing[key] = seen_existing.get(key, 0) + 1
+                if seen_existing[key] <= existing[key]:
+                    summary['duplicates'] += 1
+                    continue
+            new_expenses.append(expense)
+        if not new_expenses:
+            return
+        if not dry_run:
+            statements = [(
+                '''INSERT INTO expenses (user_id, month, date, category, description, amount, payment_type)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                (user_id, e['month'], e['date'], e['category'], e['description'], e['amount'], e['payment_type'])
+            ) for e in new_expenses]
+            if extra_statements:
+                statements.extend(extra_statements(new_expenses))
+            try:
+                db.execute_batch(statements)
+            except Exception as error:
+                raise ImportAborted(finish(), error) from error
+        summary['imported'] += len(new_expenses)
+        summary['months'].update(expense['month'] for expense in new_expenses)
+
+    def finish():
+        summary['months'] = sorted(summary['months'])
+        summary['errors_truncated'] = summary['error_count'] > len(summary['errors'])
+        return summary
+
+    chunk = []
+    try:
+        for row_number, raw in rows:
+            summary['total_rows'] += 1
+            expense, errors = validate_expense_row(raw, default_category, default_payment_type)
+            if errors:
+                summary['error_count'] += 1
+                if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                    summary['errors'].append({'row': row_number, 'errors': errors})
+                continue
+            summary['valid_rows'] += 1
+            chunk.append(expense)
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+    except ImportFileError as error:
+        error.summary = finish()
+        raise
+    return finish()
@@ -0,0 +1,328 @@
+"""
+Streaming report exports.
+
+A report is a header plus a generator of rows, read from the database in chunks,
+and a writer turns it into CSV or Excel (.xlsx) bytes as it goes. Nothing holds
+the whole report in memory, so exporting years of expenses costs the same memory
+as exporting a month.
+"""
+import csv
+import re
+import zipfile
+from typing import Iterator, NamedTuple
+from xml.sax.saxutils import escape
+
+from aggregation import month_date_range, monthly_category_totals_from_rows, monthly_category_totals_statement
+from schedules import month_range
+
+EXPORT_CHUNK_SIZE = 5000
+MAX_EXPORT_MONTHS = 120
+# Months of budgets / totals fetched per batch by the budget-vs-actual report.
+MONTHS_PER_BATCH = 12
+# Bytes of output collected before a chunk is handed to the response.
+FLUSH_BYTES = 64 * 1024
+XLSX_MAX_ROWS = 1048576
+
+
+class Export(NamedTuple):
+    filename: str
+    mimetype: str
+    chunks: Iterator[bytes]
+
+
+def _money(value):
+    return round(float(value or 0), 2)
+
+
+# --- Report shapes ---
+
+def budget_vs_actual_report(db, user_id, months):
+    """
+    Budgeted and actual spend per category for each month, with a total row per
+    month. Categories with spending but no budget are listed with a budget of 0.
+    """
+    header = ['Month', 'Category', 'Budgeted Amount', 'Actual Amount', 'Difference']
+
+    def rows():
+        for batch_start in range(0, len(months), MONTHS_PER_BATCH):
+            batch = months[batch_start:batch_start + MONTHS_PER_BATCH]
+            budget_rows, spent_rows = db.fetchall_batch([
+                ('SELECT month, category, amount FROM budgets WHERE user_id = ? AND month BETWEEN ? AND ? ORDER BY month, category',
+                 (user_id, batch[0], batch[-1])),
+                monthly_category_totals_statement(user_id, batch[0], batch[-1]),
+            ])
+            budgets = {}
+            for row in budget_rows:
+                budgets.setdefault(row['month'], {})[row['category']] = row['amount']
+            spent = {}
+            for row in monthly_category_totals_from_rows(spent_rows):
+                spent.setdefault(row.month, {})[row.category] = row.total
+
+            for month in batch:
+                month_budget = budgets.get(month, {})
+                month_spent = spent.get(month, {})
+                for category in sorted(set(month_budget) | set(month_spent)):
+                    budgeted = month_budget.get(category, 0)
+                    actual = month_spent.get(category, 0)
+                    yield [month, category, _money(budgeted), _money(actual), _money(budgeted - actual)]
+                total_budget = sum(month_budget.values())
+                total_actual = sum(month_spent.values())
+                yield [month, 'Total', _money(total_budget), _money(total_actual), _money(total_budget - total_actual)]
+
+    return header, rows()
+
+
+def ledger_chunk_statement(user_id, after, end_date):
+    """The next EXPORT_CHUNK_SIZE expenses after the (date, id) cursor `after`, up to end_date."""
+    # The range starts at the cursor's date so SQLite seeks straight to it in the
+    # index instead of skipping every row already exported.
+    return (
+        '''SELECT id, date, month, category, description, payment_type, amount
+           FROM expenses
+           WHERE user_id = ? AND date >= ? AND date <= ? AND (date, id) > (?, ?)
+           ORDER BY date, id
+           LIMIT ?''',
+        (user_id, after[0], end_date, *after, EXPORT_CHUNK_SIZE)
+    )
+
+
+def ledger_report(db, user_id, months):
+    """Every expense dated within the months, oldest first, read in keyset-paginated chunks."""
+    header = ['Date', 'Month', 'Category', 'Description', 'Payment Type', 'Amount']
+    start_date, end_date = month_date_range(months[0])[0], month_date_range(months[-1])[1]
+
+    def rows():
+        after = (start_date, 0)
+        while True:
+            chunk = db.fetchall(db.execute(*ledger_chunk_statement(user_id, after, end_date)))
+            for row in chunk:
+                yield [row['date'], row['month'], row['category'], row['description'], row['payment_type'], row['amount']]
+            if len(chunk) < EXPORT_CHUNK_SIZE:
+                return
+            after = (chunk[-1]['date'], chunk[-1]['id'])
+
+    return header, rows()
+
+
+def category_pivot_report(db, user_id, months):
+    """Spend per category (rows) and month (columns), with totals."""
+    header = ['Category', *months, 'Total']
+
+    def rows():
+        spent = {}
+        for row in monthly_category_totals_from_rows(db.fetchall(db.execute(
+                *monthly_category_totals_statement(user_id, months[0], months[-1])))):
+            spent.setdefault(row.category, {})[row.month] = row.total
+        month_totals = dict.fromkeys(months, 0)
+        for category in sorted(spent):
+            values = [spent[category].get(month, 0) for month in months]
+            for month, value in zip(months, values):
+                month_totals[month] += value
+            yield [category, *map(_money, values), _money(sum(values))]
+        yield ['Total', *map(_money, month_totals.values()), _money(sum(month_totals.values()))]
+
+    return header, rows()
+
+
+REPORT_SHAPES = {
+    'budget_vs_actual': ('Budget vs Actual', budget_vs_actual_report),
+    'ledger': ('Ledger', ledger_report),
+    'category_pivot': ('Category Pivot', category_pivot_report),
+}
+
+
+# --- Writers ---
+
+class _Echo:
+    """File-like object whose write() returns what it was given, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+# Spreadsheet apps evaluate a CSV cell starting with one of these as a formula.
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    """Text cells that would open as a formula (e.g. a description '=HYPERLINK(...)') get a leading quote."""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(_Echo())
+    # The BOM makes Excel open the file as UTF-8 (descriptions may contain ₹ and other non-ASCII text).
+    pending = ['\ufeff', writer.writerow(header)]
+    size = 0
+    for row in rows:
+        line = writer.writerow([_csv_cell(value) for value in row])
+        pending.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield ''.join(pending).encode('utf-8')
+            pending, size = [], 0
+    yield ''.join(pending).encode('utf-8')
+
+
+class _ChunkSink:
+    """Write-only, unseekable file for zipfile; collects output until drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+_XML_INVALID_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value!r}</v></c>'
+    text = escape(_XML_INVALID_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def _xlsx_package_parts(sheet_names):
+    sheet_numbers = range(1, len(sheet_names) + 1)
+    content_types = (
+        f'{_XML_HEADER}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        + ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for n in sheet_numbers
+        )
+        + '</Types>'
+    )
+    package_rels = (
+        f'{_XML_HEADER}<Relationships xmlns="{_PKG_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    )
+    workbook = (
+        f'{_XML_HEADER}<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>'
+        + ''.join(
+            f'<sheet name="{escape(name)}" sheetId="{n}" r:id="rId{n}"/>'
+            for n, name in zip(sheet_numbers, sheet_names)
+        )
+        + '</sheets></workbook>'
+    )
+    workbook_rels = (
+        f'{_XML_HEADER}<Relationships xmlns="{_PKG_REL_NS}">'
+        + ''.join(
+            f'<Relationship Id="rId{n}" Type="{_REL_NS}/worksheet" Target="worksheets/sheet{n}.xml"/>'
+            for n in sheet_numbers
+        )
+        + '</Relationships>'
+    )
+    return [
+        ('[Content_Types].xml', content_types),
+        ('_rels/.rels', package_rels),
+        ('xl/workbook.xml', workbook),
+        ('xl/_rels/workbook.xml.rels', workbook_rels),
+    ]
+
+
+def stream_xlsx(header, rows, title):
+    """
+    Writes a minimal Office Open XML workbook straight into a streamed zip. Rows beyond
+    Excel's sheet limit continue on further sheets; the workbook part listing the
+    sheets is written last, once their number is known.
+    """
+    sink = _ChunkSink()
+    sheet_names = []
+    rows = iter(rows)
+    exhausted = False
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        while not exhausted:
+            sheet_names.append(title if not sheet_names else f'{title} ({len(sheet_names) + 1})')
+            with archive.open(f'xl/worksheets/sheet{len(sheet_names)}.xml', 'w', force_zip64=True) as sheet:
+                sheet.write(f'{_XML_HEADER}<worksheet xmlns="{_MAIN_NS}"><sheetData>'.encode('utf-8'))
+                pending = [_xlsx_row(header)]
+                size = 0
+                row_count = 1
+                exhausted = True
+                for row in rows:
+                    line = _xlsx_row(row)
+                    pending.append(line)
+                    size += len(line)
+                    row_count += 1
+                    if size >= FLUSH_BYTES:
+                        sheet.write(''.join(pending).encode('utf-8'))
+                        pending, size = [], 0
+                        data = sink.drain()
+                        if data:
+                            yield data
+                    if row_count == XLSX_MAX_ROWS:
+                        exhausted = False
+                        break
+                pending.append('</sheetData></worksheet>')
+                sheet.write(''.join(pending).encode('utf-8'))
+            if not exhausted:
+                # Only start another sheet if there is another row to put on it.
+                next_row = next(rows, None)
+                if next_row is None:
+                    exhausted = True
+                else:
+                    rows = _prepend(next_row, rows)
+            yield sink.drain()
+        for name, content in _xlsx_package_parts(sheet_names):
+            archive.writestr(name, content)
+    yield sink.drain()
+
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', lambda header, rows, title: stream_csv(header, rows)),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', stream_xlsx),
+}
+
+
+def build_export(db, user_id, shape, start_month, end_month, export_format='csv'):
+    """
+    Prepares a streamed export of one report shape over a range of months.
+    Raises ValueError for an unknown shape or format or a bad month range.
+    """
+    if shape not in REPORT_SHAPES:
+        raise ValueError(f"Unknown report shape: {shape!r}. Use one of: {', '.join(REPORT_SHAPES)}.")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format!r}. Use one of: {', '.join(EXPORT_FORMATS)}.")
+    months = month_range(start_month, end_month, MAX_EXPORT_MONTHS)
+
+    title, report = REPORT_SHAPES[shape]
+    mimetype, writer = EXPORT_FORMATS[export_format]
+    header, rows = report(db, user_id, months)
+
+    period = months[0] if len(months) == 1 else f'{months[0]}_to_{months[-1]}'
+    name = 'budget_report' if shape == 'budget_vs_actual' else f'budget_report_{shape}'
+    return Export(f'{name}_{period}.{export_format}', mimetype, writer(header, rows, title))
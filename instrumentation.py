@@ -0,0 +1,244 @@
+"""
+Request and database instrumentation.
+
+DbWrapper reports every statement, batch and fetch it runs, and the request
+hooks in app.py report each request's wall time together with the database
+time, round-trips and rows it used. RequestMetrics aggregates both per worker
+process and renders them in the Prometheus text format for /metrics.
+
+Statements are grouped by their normalized SQL: literals and placeholder
+lists are collapsed, so `IN (?, ?, ?)` and `IN (?, ?)` count as one statement.
+Anything slower than the slow-query threshold is logged with its normalized
+SQL and kept in a short in-memory log.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the round-trips-per-request histogram buckets.
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+MAX_STATEMENT_SHAPES = 500  # Distinct normalized statements tracked before the rest are pooled as 'other'
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_REPEATED_LISTS = re.compile(r'\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+')
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    """SQL with literals replaced by ? and placeholder lists collapsed, on a single line."""
+    normalized = _STRING_LITERAL.sub('?', sql)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _WHITESPACE.sub(' ', normalized).strip().rstrip(';').rstrip()
+    normalized = _PLACEHOLDER_LIST.sub('(?, ...)', normalized)
+    return _REPEATED_LISTS.sub('(?, ...), ...', normalized)
+
+
+def statement_fingerprint(normalized_sql):
+    """Short stable id of a normalized statement, for log lines and dashboards."""
+    return hashlib.sha1(normalized_sql.encode('utf-8')).hexdigest()[:12]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class RequestMetrics:
+    """Thread-safe per-process aggregates of request and query timings."""
+
+    def __init__(self, slow_query_seconds=0.1, slow_query_log_size=50, logger=None, prefix='budget'):
+        self.slow_query_seconds = slow_query_seconds
+        self.logger = logger
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._requests = {}  # (method, route, status) -> count
+        self._request_durations = {}  # (method, route) -> Histogram
+        self._request_round_trips = {}  # (method, route) -> Histogram
+        self._request_db = {}  # (method, route) -> [db seconds, rows returned]
+        self._query_durations = {}  # operation -> Histogram
+        self._statements = {}  # normalized sql -> [calls, seconds, max seconds, rows]
+        self._slow_queries = deque(maxlen=slow_query_log_size)
+        self._slow_query_count = 0
+
+    # --- Recording ---
+
+    def statement_key(self, sqls):
+        """Normalized text identifying one statement or a batch of them."""
+        return '; '.join(dict.fromkeys(normalize_sql(sql) for sql in sqls))
+
+    def observe_query(self, operation, key, seconds, rows=0):
+        """Records one statement or batch (operation: execute, batch, read_batch or replica) taking `seconds`."""
+        slow = seconds >= self.slow_query_seconds
+        with self._lock:
+            histogram = self._query_durations.get(operation)
+            if histogram is None:
+                histogram = self._query_durations[operation] = Histogram(DURATION_BUCKETS)
+            histogram.observe(seconds)
+            stats = self._statement_stats(key)
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+            stats[3] += rows
+            if slow:
+                self._slow_query_count += 1
+                self._slow_queries.append({
+                    'at': time.time(),
+                    'operation': operation,
+                    'ms': round(seconds * 1000, 1),
+                    'fingerprint': statement_fingerprint(key),
+                    'sql': key,
+                })
+        if slow and self.logger is not None:
+            self.logger.warning(
+                f'Slow query ({seconds * 1000:.0f}ms, {operation}, {statement_fingerprint(key)}): {key}'
+            )
+
+    def observe_rows(self, key, rows):
+        """Adds rows fetched after a statement ran (sqlite cursors are read lazily)."""
+        with self._lock:
+            self._statement_stats(key)[3] += rows
+
+    def _statement_stats(self, key):
+        stats = self._statements.get(key)
+        if stats is None:
+            if len(self._statements) >= MAX_STATEMENT_SHAPES:
+                key = 'other'
+                stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = [0, 0.0, 0.0, 0]
+        return stats
+
+    def observe_request(self, method, route, status, seconds, db_seconds=0.0, round_trips=0, rows=0):
+        with self._lock:
+            request_key = (method, route, str(status))
+            self._requests[request_key] = self._requests.get(request_key, 0) + 1
+            route_key = (method, route)
+            duration = self._request_durations.get(route_key)
+            if duration is None:
+                duration = self._request_durations[route_key] = Histogram(DURATION_BUCKETS)
+                self._request_round_trips[route_key] = Histogram(ROUND_TRIP_BUCKETS)
+                self._request_db[route_key] = [0.0, 0]
+            duration.observe(seconds)
+            self._request_round_trips[route_key].observe(round_trips)
+            self._request_db[route_key][0] += db_seconds
+            self._request_db[route_key][1] += rows
+
+    # --- Reporting ---
+
+    def summary(self, top=10, slow=10):
+        """Short JSON-friendly overview: the statements with most total time and the latest slow queries."""
+        with self._lock:
+            statements = sorted(self._statements.items(), key=lambda item: item[1][1], reverse=True)[:top]
+            slow_queries = list(self._slow_queries)[-slow:]
+            slow_query_count = self._slow_query_count
+            requests = sum(self._requests.values())
+        return {
+            'requests': requests,
+            'slow_query_ms': self.slow_query_seconds * 1000,
+            'slow_queries_total': slow_query_count,
+            'top_statements': [{
+                'fingerprint': statement_fingerprint(sql),
+                'sql': sql,
+                'calls': calls,
+                'total_ms': round(seconds * 1000, 1),
+                'max_ms': round(max_seconds * 1000, 1),
+                'rows': rows,
+            } for sql, (calls, seconds, max_seconds, rows) in statements],
+            'recent_slow_queries': slow_queries,
+        }
+
+    def render_prometheus(self, gauges=None):
+        """
+        Metrics in the Prometheus text exposition format. gauges maps a subsystem
+        name to a dict of numeric values (e.g. the connection pool's metrics()).
+        """
+        p = self.prefix
+        lines = []
+
+        def family(name, metric_type, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+
+        def histogram(name, labels, value):
+            cumulative = 0
+            for bound, count in zip(value.buckets, value.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{_label_text(labels + [("le", _format_number(bound))])} {cumulative}')
+            lines.append(f'{name}_bucket{_label_text(labels + [("le", "+Inf")])} {value.count}')
+            lines.append(f'{name}_sum{_label_text(labels)} {_format_number(value.sum)}')
+            lines.append(f'{name}_count{_label_text(labels)} {value.count}')
+
+        with self._lock:
+            family(f'{p}_http_requests_total', 'counter', 'HTTP requests by route and status.')
+            for (method, route, status), count in sorted(self._requests.items()):
+                labels = [('method', method), ('route', route), ('status', status)]
+                lines.append(f'{p}_http_requests_total{_label_text(labels)} {count}')
+
+            family(f'{p}_http_request_duration_seconds', 'histogram', 'Wall time of a request until its response is returned.')
+            for (method, route), value in sorted(self._request_durations.items()):
+                histogram(f'{p}_http_request_duration_seconds', [('method', method), ('route', route)], value)
+
+            family(f'{p}_http_request_db_round_trips', 'histogram', 'Database round-trips per request.')
+            for (method, route), value in sorted(self._request_round_trips.items()):
+                histogram(f'{p}_http_request_db_round_trips', [('method', method), ('route', route)], value)
+
+            family(f'{p}_http_request_db_seconds_total', 'counter', 'Time requests spent waiting on the database.')
+            for (method, route), (db_seconds, _) in sorted(self._request_db.items()):
+                lines.append(f'{p}_http_request_db_seconds_total{_label_text([("method", method), ("route", route)])} '
+                             f'{_format_number(db_seconds)}')
+
+            family(f'{p}_http_request_db_rows_total', 'counter', 'Rows requests read from the database.')
+            for (method, route), (_, rows) in sorted(self._request_db.items()):
+                lines.append(f'{p}_http_request_db_rows_total{_label_text([("method", method), ("route", route)])} {rows}')
+
+            family(f'{p}_db_query_duration_seconds', 'histogram', 'Latency of database statements and batches.')
+            for operation, value in sorted(self._query_durations.items()):
+                histogram(f'{p}_db_query_duration_seconds', [('operation', operation)], value)
+
+            family(f'{p}_db_slow_queries_total', 'counter', 'Statements slower than the slow-query threshold.')
+            lines.append(f'{p}_db_slow_queries_total {self._slow_query_count}')
+
+        family(f'{p}_process_start_time_seconds', 'gauge', 'Start time of this worker process since the epoch.')
+        lines.append(f'{p}_process_start_time_seconds {_format_number(self._started)}')
+        for subsystem, values in sorted((gauges or {}).items()):
+            for name, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                metric = f'{p}_{subsystem}_{name}'
+                family(metric, 'gauge', f'{subsystem} {name.replace("_", " ")}.')
+                lines.append(f'{metric} {_format_number(value)}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,208 @@
+"""
+Password hashing and login rate limiting.
+
+bcrypt is deliberately slow (about 250ms at cost 12), so unbounded hashing in
+request threads lets a burst of logins take every CPU the dashboard needs.
+PasswordHasher runs every hash and check on a small thread pool (bcrypt
+releases the GIL while it works) and refuses new work once max_pending
+operations are queued, so a flood fails fast with PasswordHasherBusy instead
+of stacking up. Stored hashes made with a different cost are upgraded on the
+next successful login.
+
+LoginRateLimiter counts attempts per key (client IP, username) in fixed
+windows, in a SQLite file shared by every worker on the host, so limited
+requests are turned away before any hashing happens.
+"""
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import bcrypt
+
+RATE_LIMIT_PRUNE_EVERY = 500  # Attempts between sweeps of expired rate-limit windows
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Too many password operations are queued; the request should be retried shortly."""
+
+
+class PasswordHasher:
+    def __init__(self, rounds=12, max_workers=2, max_pending=8, timeout=10.0):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self._dummy_hash = None
+        self._stats = {'hashes': 0, 'checks': 0, 'rehashes': 0, 'rejected': 0, 'timeouts': 0, 'seconds': 0.0}
+
+    def _get_executor_locked(self):
+        # Pool threads do not survive a fork into a gunicorn worker.
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='password-hasher')
+            self._pid = os.getpid()
+            self._pending = 0
+        return self._executor
+
+    def _timed(self, name, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._stats[name] += 1
+                self._stats['seconds'] += elapsed
+
+    def _finished(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, name, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats['rejected'] += 1
+                raise PasswordHasherBusy('Too many password checks in progress.')
+            executor = self._get_executor_locked()
+            self._pending += 1
+        future = executor.submit(self._timed, name, fn, *args)
+        future.add_done_callback(self._finished)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise PasswordHasherBusy('Password check timed out.')
+
+    def hash(self, password):
+        return self._run('hashes', self._hash, password)
+
+    def _hash(self, password):
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.rounds)).decode('utf-8')
+
+    def verify(self, password, stored_hash):
+        if stored_hash is None:
+            return False
+        hash_bytes = stored_hash.encode('utf-8') if isinstance(stored_hash, str) else stored_hash
+        return self._run('checks', bcrypt.checkpw, password.encode('utf-8'), hash_bytes)
+
+    def verify_dummy(self, password):
+        """Spends a check's worth of time for an unknown user, so response times do not reveal which usernames exist."""
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hash('dummy password')
+        self.verify(password, self._dummy_hash)
+        return False
+
+    def needs_rehash(self, stored_hash):
+        """True when stored_hash was made with a different cost than the configured one."""
+        try:
+            return int(stored_hash.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return False
+
+    def rehash(self, password):
+        with self._lock:
+            self._stats['rehashes'] += 1
+        return self.hash(password)
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._stats)
+            metrics['pending'] = max(0, self._pending)
+        operations = metrics['hashes'] + metrics['checks']
+        metrics['avg_ms'] = round(metrics.pop('seconds') / operations * 1000, 1) if operations else 0.0
+        metrics.update({'rounds': self.rounds, 'max_workers': self.max_workers, 'max_pending': self.max_pending})
+        return metrics
+
+
+def measure_cost(rounds, repeat=3):
+    """Seconds one bcrypt hash takes at the given cost on this machine (best of repeat)."""
+    salt = bcrypt.gensalt(rounds)
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        bcrypt.hashpw(b'measure-password-cost', salt)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class LoginRateLimiter:
+    """Fixed-window attempt counters shared by every worker on the host through a local SQLite file."""
+
+    def __init__(self, path, window_seconds=900):
+        self.path = path
+        self.window_seconds = window_seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {'limited': 0, 'errors': 0}
+        self._hits = 0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY,
+                window_start REAL NOT NULL,
+                count INTEGER NOT NULL
+            )''')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _retry_after(self, window_start, count, limit, now):
+        if count <= limit:
+            return 0
+        with self._lock:
+            self._stats['limited'] += 1
+        return max(1, int(window_start + self.window_seconds - now))
+
+    def hit(self, key, limit):
+        """Counts an attempt; returns 0 if it is within limit, else seconds until the window resets."""
+        now = time.time()
+        expired_before = now - self.window_seconds
+        with self._lock:
+            self._hits += 1
+            prune = self._hits % RATE_LIMIT_PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+        row = self._connect().execute(
+            '''INSERT INTO rate_limits (key, window_start, count) VALUES (?, ?, 1)
+               ON CONFLICT(key) DO UPDATE SET
+                   count = CASE WHEN window_start <= ? THEN 1 ELSE count + 1 END,
+                   window_start = CASE WHEN window_start <= ? THEN excluded.window_start ELSE window_start END
+               RETURNING window_start, count''',
+            (key, now, expired_before, expired_before)
+        ).fetchone()
+        return self._retry_after(row[0], row[1], limit, now)
+
+    def check(self, key, limit):
+        """Like hit, without counting: whether key has already used up its attempts."""
+        now = time.time()
+        row = self._connect().execute(
+            'SELECT window_start, count FROM rate_limits WHERE key = ? AND window_start > ?',
+            (key, now - self.window_seconds)
+        ).fetchone()
+        # Reaching the limit blocks the next attempt, which hit would count as limit + 1.
+        return self._retry_after(row[0], row[1] + 1, limit, now) if row else 0
+
+    def reset(self, key):
+        self._connect().execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+    def prune(self):
+        self._connect().execute('DELETE FROM rate_limits WHERE window_start <= ?', (time.time() - self.window_seconds,))
+
+    def record_error(self):
+        with self._lock:
+            self._stats['errors'] += 1
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,170 @@
+"""
+Background PDF rendering for monthly reports.
+
+WeasyPrint takes seconds per report, so PDFs are rendered by a small process pool
+instead of the request thread. Jobs live entirely on disk, so any gunicorn worker
+can answer status and download requests for a job another worker started:
+
+    <directory>/<user_id>/<job_id>.json   job state (queued, running, done, failed)
+    <directory>/<user_id>/<job_id>.pdf    the rendered report, once done
+
+A job id is the month plus a digest of the exact data the report shows, which
+makes the disk a cache: asking again for a month whose data has not changed
+finds the finished PDF and never renders it twice.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+JOB_ID_PATTERN = re.compile(r'^\d{4}-\d{2}-[0-9a-f]{16}$')
+
+
+def report_data_version(data):
+    """Digest of the data a report renders; changes whenever any of it does."""
+    canonical = json.dumps(data, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def _write_json(path, value):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as tmp_file:
+        json.dump(value, tmp_file)
+    os.replace(tmp_path, path)
+
+
+def render_pdf(html, pdf_path, meta_path, meta):
+    """Runs in a pool process: renders html to pdf_path and records the outcome in meta_path."""
+    _write_json(meta_path, {**meta, 'state': 'running', 'updated_at': time.time()})
+    try:
+        from weasyprint import HTML  # Heavy import, only ever needed in the pool processes
+
+        tmp_path = f'{pdf_path}.{os.getpid()}.tmp'
+        HTML(string=html).write_pdf(tmp_path)
+        os.replace(tmp_path, pdf_path)
+        _write_json(meta_path, {**meta, 'state': 'done', 'updated_at': time.time()})
+    except Exception as error:
+        _write_json(meta_path, {**meta, 'state': 'failed', 'error': str(error), 'updated_at': time.time()})
+        raise
+
+
+class ReportJobStore:
+    def __init__(self, directory, max_workers=1, job_timeout=300, logger=None):
+        self.directory = directory
+        self.max_workers = max_workers
+        self.job_timeout = job_timeout
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._stats = {'enqueued': 0, 'cache_hits': 0, 'already_running': 0, 'failed': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _paths(self, user_id, job_id):
+        user_directory = os.path.join(self.directory, str(int(user_id)))
+        return os.path.join(user_directory, f'{job_id}.pdf'), os.path.join(user_directory, f'{job_id}.json')
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # spawn, not fork: the web process runs database client threads that a forked child would inherit.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    @staticmethod
+    def job_id(month, data_version):
+        return f'{month}-{data_version}'
+
+    def status(self, user_id, job_id):
+        """The job's state as a dict, or None if the user has no such job."""
+        if not JOB_ID_PATTERN.match(job_id or ''):
+            return None
+        pdf_path, meta_path = self._paths(user_id, job_id)
+        try:
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if meta['state'] in ('queued', 'running') and time.time() - meta['updated_at'] > self.job_timeout:
+            # The process rendering it died or was restarted; enqueueing again will retry.
+            meta = {**meta, 'state': 'failed', 'error': 'Report rendering timed out.'}
+        if meta['state'] == 'done' and not os.path.exists(pdf_path):
+            return None
+        return meta
+
+    def pdf_path(self, user_id, job_id):
+        """Path of the finished PDF, or None if the job is not done."""
+        meta = self.status(user_id, job_id)
+        if meta is None or meta['state'] != 'done':
+            return None
+        return self._paths(user_id, job_id)[0]
+
+    def enqueue(self, user_id, month, data_version, render_html):
+        """
+        Starts rendering the report unless an up-to-date PDF or a live job for the same
+        data already exists. render_html() builds the report HTML and is only called
+        when a render is actually needed. Returns the job's status dict.
+        """
+        job_id = self.job_id(month, data_version)
+        existing = self.status(user_id, job_id)
+        if existing is not None and existing['state'] == 'done':
+            self._count('cache_hits')
+            return existing
+        if existing is not None and existing['state'] in ('queued', 'running'):
+            self._count('already_running')
+            return existing
+
+        pdf_path, meta_path = self._paths(user_id, job_id)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        self._remove_stale_versions(user_id, month, job_id)
+
+        meta = {'job_id': job_id, 'month': month, 'state': 'queued', 'created_at': time.time(), 'updated_at': time.time()}
+        _write_json(meta_path, meta)
+        future = self._get_executor().submit(render_pdf, render_html(), pdf_path, meta_path, meta)
+        future.add_done_callback(lambda done: self._on_done(done, meta_path, meta))
+        self._count('enqueued')
+        return meta
+
+    def _on_done(self, future, meta_path, meta):
+        error = future.exception()
+        if error is None:
+            return
+        self._count('failed')
+        if self.logger:
+            self.logger.error(f"PDF report job {meta['job_id']} failed: {error}")
+        # render_pdf records its own failures; this covers the pool process dying outright.
+        try:
+            with open(meta_path) as meta_file:
+                if json.load(meta_file).get('state') == 'failed':
+                    return
+        except (FileNotFoundError, ValueError):
+            pass
+        _write_json(meta_path, {**meta, 'state': 'failed', 'error': str(error), 'updated_at': time.time()})
+
+    def _remove_stale_versions(self, user_id, month, current_job_id):
+        """Reports for older data of the same month can never be served again."""
+        user_directory = os.path.dirname(self._paths(user_id, current_job_id)[0])
+        for name in os.listdir(user_directory):
+            job_id = name.split('.', 1)[0]
+            if job_id.startswith(f'{month}-') and job_id != current_job_id and JOB_ID_PATTERN.match(job_id):
+                status = self.status(user_id, job_id)
+                if status is None or status['state'] not in ('queued', 'running'):
+                    try:
+                        os.remove(os.path.join(user_directory, name))
+                    except FileNotFoundError:
+                        pass
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,300 @@
+"""
+Local read replica of the primary database.
+
+Every query of the sync app is a round-trip to the primary (Turso). With a
+ReadReplica each worker process also keeps a copy of the primary in a local
+SQLite file: GET requests read from it in microseconds while writes, and
+every query of other requests, still go to the primary.
+
+The primary records which rows change: triggers on every table append
+(table, rowid) to replication_log (see replication_log_statements). A
+background thread polls the log every sync interval, fetches the current
+version of the changed rows in one batch and applies them locally in one
+transaction, so a sync costs one round-trip when nothing changed and two when
+something did. A replica that starts empty, finds the log pruned past its
+position, or meets a table or column it does not know copies the whole
+database again.
+
+can_serve decides whether a read may use the replica: only once it has synced
+since the caller's read_after time (for read-your-writes, the time of the
+caller's last write) and no longer than max_staleness ago.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+REPLICATION_LOG = 'replication_log'
+ROWID_COLUMN = '__replica_rowid'
+LOG_BATCH_SIZE = 1000  # Log entries read per sync round-trip
+ROWS_PER_FETCH = 500  # Rowids per IN (...) when fetching changed rows
+LOG_RETENTION = 50000  # Log entries kept on the primary for replicas that fall behind
+PRUNE_EVERY = 100  # Syncs between prunes of the primary's log
+
+
+class ReplicaResyncNeeded(Exception):
+    """The replica cannot apply the log incrementally and must copy the primary again."""
+
+
+def replicated_tables_statement():
+    return (
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND name != ?",
+        (REPLICATION_LOG,)
+    )
+
+
+def replication_log_statements(tables):
+    """The log table and the triggers recording every row change of `tables` in it."""
+    statements = [f'''CREATE TABLE IF NOT EXISTS {REPLICATION_LOG} (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL
+    )''']
+    for table in tables:
+        log = f"INSERT INTO {REPLICATION_LOG} (table_name, row_id)"
+        statements += [
+            f'''CREATE TRIGGER IF NOT EXISTS {REPLICATION_LOG}_{table}_insert AFTER INSERT ON {table}
+                BEGIN {log} VALUES ('{table}', NEW.rowid); END''',
+            f'''CREATE TRIGGER IF NOT EXISTS {REPLICATION_LOG}_{table}_update AFTER UPDATE ON {table}
+                BEGIN
+                    {log} SELECT '{table}', OLD.rowid WHERE OLD.rowid != NEW.rowid;
+                    {log} VALUES ('{table}', NEW.rowid);
+                END''',
+            f'''CREATE TRIGGER IF NOT EXISTS {REPLICATION_LOG}_{table}_delete AFTER DELETE ON {table}
+                BEGIN {log} VALUES ('{table}', OLD.rowid); END''',
+        ]
+    return statements
+
+
+def drop_replication_log_statements(tables):
+    statements = []
+    for table in tables:
+        statements += [f'DROP TRIGGER IF EXISTS {REPLICATION_LOG}_{table}_{event}' for event in ('insert', 'update', 'delete')]
+    return statements + [f'DROP TABLE IF EXISTS {REPLICATION_LOG}']
+
+
+class ReadReplica:
+    """
+    A worker's local copy of the primary. open_primary() must return a context
+    manager yielding a DbWrapper over the primary.
+    """
+
+    def __init__(self, path, open_primary, sync_interval=2.0, max_staleness=30.0, logger=None):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.max_staleness = max_staleness
+        self.logger = logger
+        self._open_primary = open_primary
+        self._local = threading.local()
+        self._sync_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._writer = None
+        self._tables = set()
+        self._syncs_since_prune = 0
+        self._last_sync_seconds = 0.0
+        self.position = 0  # seq of the last log entry applied
+        self.synced_at = None  # wall time the last complete sync started; the replica holds every write before it
+        self._stats = {
+            'syncs': 0, 'full_syncs': 0, 'changes_applied': 0, 'errors': 0,
+            'replica_reads': 0, 'stale_fallbacks': 0, 'read_your_writes_fallbacks': 0,
+        }
+
+    # --- Sync ---
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='read-replica-sync', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception as error:
+                self._count('errors')
+                if self.logger is not None:
+                    self.logger.warning(f"Read replica sync failed: {error}")
+            self._stop.wait(self.sync_interval)
+
+    def sync(self):
+        """Brings the replica up to date with the primary; returns the number of log entries applied."""
+        with self._sync_lock:
+            sync_started_at = time.time()
+            started = time.perf_counter()
+            with self._open_primary() as primary:
+                if self.synced_at is None:
+                    applied = self._full_sync(primary)
+                else:
+                    try:
+                        applied = self._sync_changes(primary)
+                    except ReplicaResyncNeeded as reason:
+                        if self.logger is not None:
+                            self.logger.info(f"Read replica copying the primary again: {reason}")
+                        applied = self._full_sync(primary)
+                self._maybe_prune(primary)
+            self.synced_at = sync_started_at
+            self._last_sync_seconds = time.perf_counter() - started
+            self._count('syncs')
+            self._count('changes_applied', applied)
+            return applied
+
+    def _writer_connection(self):
+        if self._writer is None:
+            self._writer = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self._writer.execute('PRAGMA journal_mode=WAL')
+        return self._writer
+
+    def _full_sync(self, primary):
+        # The log position is read before the rows, so writes racing the copy are applied again by the next sync.
+        position_rows, schema_rows, table_rows = primary.fetchall_batch([
+            ('SELECT COALESCE(MAX(seq), 0) AS position FROM sqlite_sequence WHERE name = ?', (REPLICATION_LOG,)),
+            (f"""SELECT type, name, sql FROM sqlite_master
+                 WHERE type IN ('table', 'index') AND sql IS NOT NULL
+                   AND name NOT LIKE 'sqlite_%' AND tbl_name != ?
+                 ORDER BY type = 'index', name""", (REPLICATION_LOG,)),
+            replicated_tables_statement(),
+        ])
+        tables = [row['name'] for row in table_rows]
+        data = primary.fetchall_batch([f'SELECT rowid AS {ROWID_COLUMN}, * FROM {table}' for table in tables])
+
+        conn = self._writer_connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            local_tables = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            )]
+            for table in local_tables:
+                conn.execute(f'DROP TABLE IF EXISTS {table}')
+            for row in schema_rows:
+                conn.execute(row['sql'])
+            for table, rows in zip(tables, data):
+                self._upsert(conn, table, rows)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._tables = set(tables)
+        self.position = position_rows[0]['position']
+        self._count('full_syncs')
+        return sum(len(rows) for rows in data)
+
+    def _sync_changes(self, primary):
+        applied = 0
+        while True:
+            log_rows, bounds = primary.fetchall_batch([
+                (f'SELECT seq, table_name, row_id FROM {REPLICATION_LOG} WHERE seq > ? ORDER BY seq LIMIT ?',
+                 (self.position, LOG_BATCH_SIZE)),
+                (f"""SELECT (SELECT MIN(seq) FROM {REPLICATION_LOG}) AS first_seq,
+                            (SELECT seq FROM sqlite_sequence WHERE name = ?) AS last_seq""", (REPLICATION_LOG,)),
+            ])
+            # last_seq (the AUTOINCREMENT high-water mark) also reveals entries pruned from an emptied log.
+            first_seq, last_seq = bounds[0]['first_seq'], bounds[0]['last_seq'] or 0
+            if (first_seq if first_seq is not None else last_seq + 1) > self.position + 1:
+                raise ReplicaResyncNeeded(f'log pruned past position {self.position}')
+            if not log_rows:
+                return applied
+
+            changed = {}
+            for row in log_rows:
+                if row['table_name'] not in self._tables:
+                    raise ReplicaResyncNeeded(f"new table {row['table_name']}")
+                changed.setdefault(row['table_name'], {})[row['row_id']] = None
+            fetches = []
+            for table, rowids in changed.items():
+                rowids = list(rowids)
+                for start in range(0, len(rowids), ROWS_PER_FETCH):
+                    fetches.append((table, rowids[start:start + ROWS_PER_FETCH]))
+            results = primary.fetchall_batch([
+                (f"SELECT rowid AS {ROWID_COLUMN}, * FROM {table} WHERE rowid IN ({', '.join('?' for _ in rowids)})",
+                 rowids)
+                for table, rowids in fetches
+            ])
+
+            conn = self._writer_connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for (table, rowids), rows in zip(fetches, results):
+                    present = {row[ROWID_COLUMN] for row in rows}
+                    conn.executemany(f'DELETE FROM {table} WHERE rowid = ?',
+                                     [(rowid,) for rowid in rowids if rowid not in present])
+                    self._upsert(conn, table, rows)
+                conn.execute('COMMIT')
+            except sqlite3.OperationalError as error:
+                conn.execute('ROLLBACK')
+                raise ReplicaResyncNeeded(str(error))  # e.g. a column added by a migration
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            self.position = log_rows[-1]['seq']
+            applied += len(log_rows)
+            if len(log_rows) < LOG_BATCH_SIZE:
+                return applied
+
+    @staticmethod
+    def _upsert(conn, table, rows):
+        if not rows:
+            return
+        columns = list(rows[0])
+        names = ', '.join('rowid' if column == ROWID_COLUMN else f'"{column}"' for column in columns)
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {table} ({names}) VALUES ({', '.join('?' for _ in columns)})",
+            [tuple(row[column] for column in columns) for row in rows]
+        )
+
+    def _maybe_prune(self, primary):
+        self._syncs_since_prune += 1
+        if self._syncs_since_prune < PRUNE_EVERY:
+            return
+        self._syncs_since_prune = 0
+        # Other workers' replicas that are further behind notice the gap and copy the primary again.
+        primary.execute_batch([(
+            f'DELETE FROM {REPLICATION_LOG} WHERE seq <= (SELECT MAX(seq) FROM {REPLICATION_LOG}) - ?',
+            (LOG_RETENTION,)
+        )])
+
+    # --- Reads ---
+
+    def can_serve(self, read_after=0.0):
+        """Whether the replica may answer a read that must see every write made before read_after."""
+        synced_at = self.synced_at
+        if synced_at is None or time.time() - synced_at > self.max_staleness:
+            self._count('stale_fallbacks')
+            return False
+        if synced_at < read_after:
+            self._count('read_your_writes_fallbacks')
+            return False
+        self._count('replica_reads')
+        return True
+
+    def connection(self):
+        """This thread's read connection to the replica file."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # --- Metrics ---
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def metrics(self):
+        with self._stats_lock:
+            metrics = dict(self._stats)
+        synced_at = self.synced_at
+        metrics.update({
+            'position': self.position,
+            'lag_seconds': round(time.time() - synced_at, 3) if synced_at is not None else -1,
+            'last_sync_ms': round(self._last_sync_seconds * 1000, 1),
+            'sync_interval_seconds': self.sync_interval,
+            'max_staleness_seconds': self.max_staleness,
+        })
+        return metrics
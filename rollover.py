@@ -0,0 +1,142 @@
+"""
+Month rollover: copies a month's income, EMIs and budgets onto other months.
+
+A rollover reads every source and target month it touches in one batch, works
+out per (table, target month) what the copy would add, remove or change, and
+then replaces only the target months that actually differ, each with a
+DELETE plus a single INSERT ... SELECT, all in one DbWrapper.execute_batch
+transaction. Either every target month is rolled over or none is.
+"""
+from collections import Counter
+from datetime import datetime
+from typing import NamedTuple
+
+from dateutil.relativedelta import relativedelta
+
+from schedules import month_range
+
+
+class RolloverTable(NamedTuple):
+    name: str
+    key: str  # Column identifying an entry, used to report a changed amount rather than a remove + add
+    value: str
+
+
+ROLLOVER_TABLES = {
+    'income': RolloverTable('income', 'description', 'amount'),
+    'emis': RolloverTable('emis', 'loan_name', 'emi_amount'),
+    'budgets': RolloverTable('budgets', 'category', 'amount'),
+}
+
+
+def month_pairs(source_start, source_end, target_start, target_end):
+    """
+    (source, target) month pairs. One source month is copied onto every target month;
+    a source range is copied month by month onto a target range of the same length.
+    Raises ValueError for invalid or overlapping ranges.
+    """
+    sources = month_range(source_start, source_end)
+    targets = month_range(target_start, target_end)
+    if len(sources) == 1:
+        pairs = [(sources[0], target) for target in targets]
+    elif len(sources) == len(targets):
+        pairs = list(zip(sources, targets))
+    else:
+        raise ValueError(f'A range of {len(sources)} source months needs {len(sources)} target months, not {len(targets)}.')
+    if set(sources) & set(targets):
+        raise ValueError('Source and target months must not overlap.')
+    return pairs
+
+
+def previous_month_pair(month):
+    """The pair copying the month before `month` onto it. Raises ValueError for an invalid month."""
+    month = month_range(month, month)[0]
+    previous_month = (datetime.strptime(month, '%Y-%m') - relativedelta(months=1)).strftime('%Y-%m')
+    return previous_month, month
+
+
+def _read_statement(user_id, table, months):
+    placeholders = ', '.join('?' for _ in months)
+    return (
+        f'SELECT month, {table.key}, {table.value} FROM {table.name} WHERE user_id = ? AND month IN ({placeholders})',
+        (user_id, *months)
+    )
+
+
+def _write_statements(user_id, table, source_month, target_month):
+    return [
+        (f'DELETE FROM {table.name} WHERE user_id = ? AND month = ?', (user_id, target_month)),
+        (f'''INSERT INTO {table.name} (user_id, month, {table.key}, {table.value})
+             SELECT user_id, ?, {table.key}, {table.value} FROM {table.name}
+             WHERE user_id = ? AND month = ?
+             ORDER BY id''', (target_month, user_id, source_month)),
+    ]
+
+
+def _diff(table, source_rows, target_rows):
+    source = Counter((row[table.key], row[table.value]) for row in source_rows)
+    target = Counter((row[table.key], row[table.value]) for row in target_rows)
+    added = source - target
+    removed = target - source
+
+    changed = []
+    # A key present once on each side with different values is a changed amount.
+    added_keys = Counter(key for key, _ in added.elements())
+    removed_keys = Counter(key for key, _ in removed.elements())
+    for key in sorted(k for k in added_keys if added_keys[k] == 1 and removed_keys.get(k) == 1):
+        old_value = next(value for k, value in removed if k == key)
+        new_value = next(value for k, value in added if k == key)
+        changed.append({table.key: key, 'from': old_value, 'to': new_value})
+        del added[(key, new_value)]
+        del removed[(key, old_value)]
+
+    def entries(counter):
+        return [{table.key: key, table.value: value} for key, value in sorted(counter.elements(), key=str)]
+
+    return {'added': entries(added), 'removed': entries(removed), 'changed': changed}
+
+
+def run_rollover(db, user_id, table_names, pairs, dry_run=False, extra_statements=None):
+    """
+    Rolls the given tables over every (source, target) pair. extra_statements(changes)
+    may add statements to the write transaction. Returns a list of per (table, pair)
+    changes, each with the source row count, whether it was applied, and its diff.
+    Pairs whose source month is empty are reported but leave the target untouched.
+    """
+    tables = [ROLLOVER_TABLES[name] for name in table_names]
+    months = sorted({month for pair in pairs for month in pair})
+    results = db.fetchall_batch([_read_statement(user_id, table, months) for table in tables])
+
+    changes = []
+    for table, rows in zip(tables, results):
+        rows_by_month = {}
+        for row in rows:
+            rows_by_month.setdefault(row['month'], []).append(row)
+        for source_month, target_month in pairs:
+            source_rows = rows_by_month.get(source_month, [])
+            diff = _diff(table, source_rows, rows_by_month.get(target_month, []))
+            changes.append({
+                'table': table.name,
+                'source_month': source_month,
+                'target_month': target_month,
+                'source_count': len(source_rows),
+                'applied': False,
+                **diff,
+            })
+
+    to_apply = [
+        change for change in changes
+        if change['source_count'] and (change['added'] or change['removed'] or change['changed'])
+    ]
+    if not dry_run and to_apply:
+        statements = [
+            statement for change in to_apply
+            for statement in _write_statements(user_id, ROLLOVER_TABLES[change['table']],
+                                               change['source_month'], change['target_month'])
+        ]
+        if extra_statements:
+            statements.extend(extra_statements(to_apply))
+        db.execute_batch(statements)
+        for change in to_apply:
+            change['applied'] = True
+    return changes
@@ -0,0 +1,133 @@
+"""
+Recurring income and EMIs.
+
+A schedule is a single row describing a series: what, how much, from which month,
+until which month (or open-ended) and how many months apart. Its occurrences are
+never stored; each statement below expands them into a month's income / EMI rows
+and totals at read time, next to the one-off rows of the income and emis tables.
+Editing or ending a series is therefore one UPDATE however many months it spans.
+"""
+import re
+from typing import NamedTuple
+
+MONTH_PATTERN = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
+# Frequency name -> months between occurrences.
+FREQUENCIES = {'monthly': 1, 'quarterly': 3, 'half-yearly': 6, 'yearly': 12}
+
+
+class ScheduleKind(NamedTuple):
+    table: str  # Table holding the kind's one-off rows
+    label: str  # Column the schedule's label is reported as
+    amount: str  # Column the schedule's amount is reported as
+
+
+SCHEDULE_KINDS = {
+    'income': ScheduleKind('income', 'description', 'amount'),
+    'emi': ScheduleKind('emis', 'loan_name', 'emi_amount'),
+}
+
+
+def month_number(month):
+    """Months since year 0 of a 'YYYY-MM' month, so that differences count months."""
+    year, month_of_year = map(int, month.split('-'))
+    return year * 12 + month_of_year
+
+
+def add_months(month, count):
+    number = month_number(month) - 1 + count
+    return f'{number // 12}-{number % 12 + 1:02d}'
+
+
+def month_range(start_month, end_month, max_months=120):
+    """Every 'YYYY-MM' from start_month to end_month inclusive. Raises ValueError for bad ranges."""
+    for month in (start_month, end_month):
+        if not MONTH_PATTERN.match(month or ''):
+            raise ValueError(f'Invalid month: {month!r}. Use YYYY-MM.')
+    count = month_number(end_month) - month_number(start_month) + 1
+    if count < 1:
+        raise ValueError('The start month must not be after the end month.')
+    if count > max_months:
+        raise ValueError(f'A range can cover at most {max_months} months.')
+    return [add_months(start_month, offset) for offset in range(count)]
+
+
+_START_MONTH_NUMBER_SQL = '(CAST(substr(s.start_month, 1, 4) AS INTEGER) * 12 + CAST(substr(s.start_month, 6, 2) AS INTEGER))'
+
+
+def occurrence_filter(user_id, kind, month):
+    """WHERE clause (on alias s) and params selecting the schedules with an occurrence in `month`."""
+    return (
+        f'''s.user_id = ? AND s.kind = ? AND s.start_month <= ?
+            AND (s.end_month IS NULL OR s.end_month >= ?)
+            AND (? - {_START_MONTH_NUMBER_SQL}) % s.interval_months = 0''',
+        (user_id, kind, month, month, month_number(month))
+    )
+
+
+def month_rows_statement(user_id, kind, month):
+    """
+    The month's income or EMI rows: recurring occurrences first, then one-off rows
+    newest first. Occurrences carry their schedule_id (None on one-off rows) and
+    the schedule's id as their id.
+    """
+    spec = SCHEDULE_KINDS[kind]
+    schedule_filter, schedule_params = occurrence_filter(user_id, kind, month)
+    return (f'''
+        SELECT id, user_id, month, {spec.label}, {spec.amount},
+               NULL as schedule_id, NULL as start_month, NULL as end_month, NULL as interval_months
+        FROM {spec.table}
+        WHERE month = ? AND user_id = ?
+        UNION ALL
+        SELECT s.id, s.user_id, ? as month, s.label as {spec.label}, s.amount as {spec.amount},
+               s.id as schedule_id, s.start_month, s.end_month, s.interval_months
+        FROM schedules s
+        WHERE {schedule_filter}
+        ORDER BY schedule_id DESC, id DESC
+    ''', (month, user_id, month, *schedule_params))
+
+
+def occurrence_total_sql(user_id, kind, month):
+    """Scalar subquery summing the month's occurrences, for adding to a one-off total."""
+    schedule_filter, schedule_params = occurrence_filter(user_id, kind, month)
+    return f'(SELECT COALESCE(SUM(s.amount), 0) FROM schedules s WHERE {schedule_filter})', schedule_params
+
+
+def schedule_fields(form, start_month):
+    """
+    Validated (start_month, end_month, interval_months) from a request's
+    frequency / end_month / occurrences fields. No end month and no occurrence
+    count makes an open-ended series. Raises ValueError.
+    """
+    frequency = (form.get('frequency') or 'monthly').strip().lower()
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Unknown frequency: {frequency!r}. Use {', '.join(FREQUENCIES)} or once.")
+    interval_months = FREQUENCIES[frequency]
+    if not MONTH_PATTERN.match(start_month or ''):
+        raise ValueError(f'Invalid month: {start_month!r}. Use YYYY-MM.')
+
+    end_month = (form.get('end_month') or '').strip() or None
+    occurrences = (form.get('occurrences') or '').strip()
+    if end_month and occurrences:
+        raise ValueError('Give either end_month or occurrences, not both.')
+    if occurrences:
+        count = int(occurrences)
+        if count < 1:
+            raise ValueError('occurrences must be at least 1.')
+        end_month = add_months(start_month, (count - 1) * interval_months)
+    if end_month is not None:
+        if not MONTH_PATTERN.match(end_month):
+            raise ValueError(f'Invalid end month: {end_month!r}. Use YYYY-MM.')
+        if end_month < start_month:
+            raise ValueError('The end month must not be before the start month.')
+    return start_month, end_month, interval_months
+
+
+def describe_schedule(start_month, end_month, interval_months):
+    """Human-readable span of a series, e.g. 'every month from 2026-01 to 2026-03'."""
+    every = {1: 'every month', 3: 'every quarter', 6: 'every six months', 12: 'every year'}.get(
+        interval_months, f'every {interval_months} months'
+    )
+    if end_month is None:
+        return f'{every} from {start_month}'
+    return f'{every} from {start_month} to {end_month}'
@@ -0,0 +1,139 @@
+"""
+A stand-in for a remote libSQL database, for measuring round-trips offline.
+
+In production every DbWrapper.execute and batch is an HTTPS round-trip to Turso,
+but locally the app falls back to sqlite3, where a query costs microseconds and
+N+1 patterns go unnoticed. SimulatedLibsqlClient opens the local database file
+through libsql_client's own `file:` mode, so DbWrapper takes exactly the code
+path it takes against Turso, and sleeps a configurable latency (plus jitter)
+before every request it forwards, plus a one-off connect delay before a
+client's first request (the TLS handshake of a new HTTPS client). A
+LatencyProfile shared by all clients of a process counts those requests and
+connects and the delay they added.
+AsyncSimulatedLibsqlClient does the same over the async client for asgi.py,
+awaiting the delay instead of blocking on it.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+
+import libsql_client
+
+
+class LatencyProfile:
+    """
+    Per-request delay of the simulated database: latency ± uniform jitter, never
+    below zero, and connect_seconds before each new client's first request.
+    """
+
+    def __init__(self, latency_seconds, jitter_seconds=0.0, seed=None, sleep=time.sleep, connect_seconds=0.0):
+        self.latency_seconds = latency_seconds
+        self.jitter_seconds = jitter_seconds
+        self.connect_seconds = connect_seconds
+        self._sleep = sleep
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'statements': 0, 'connects': 0, 'simulated_seconds': 0.0}
+
+    def _next_delay(self, statements):
+        with self._lock:
+            seconds = self.latency_seconds
+            if self.jitter_seconds:
+                seconds = max(0.0, seconds + self._rng.uniform(-self.jitter_seconds, self.jitter_seconds))
+            self._stats['requests'] += 1
+            self._stats['statements'] += statements
+            self._stats['simulated_seconds'] += seconds
+        return seconds
+
+    def _next_connect(self):
+        with self._lock:
+            self._stats['connects'] += 1
+            self._stats['simulated_seconds'] += self.connect_seconds
+        return self.connect_seconds
+
+    def delay(self, statements=1):
+        """Waits out one round-trip carrying `statements` statements."""
+        self._sleep(self._next_delay(statements))
+
+    async def delay_async(self, statements=1):
+        await asyncio.sleep(self._next_delay(statements))
+
+    def connect(self):
+        """Waits out opening a new client's connection."""
+        self._sleep(self._next_connect())
+
+    async def connect_async(self):
+        await asyncio.sleep(self._next_connect())
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._stats)
+        metrics['simulated_seconds'] = round(metrics['simulated_seconds'], 3)
+        metrics['latency_ms'] = self.latency_seconds * 1000
+        metrics['jitter_ms'] = self.jitter_seconds * 1000
+        metrics['connect_ms'] = self.connect_seconds * 1000
+        return metrics
+
+
+class SimulatedLibsqlClient:
+    """The parts of libsql_client's sync client DbWrapper uses, over a local file, one delay per request."""
+
+    def __init__(self, path, profile):
+        self._client = libsql_client.create_client_sync(url=f'file:{os.path.abspath(path)}')
+        self._profile = profile
+        self._connected = False
+
+    @property
+    def closed(self):
+        return self._client.closed
+
+    def _delay(self, statements=1):
+        if not self._connected:
+            self._connected = True
+            self._profile.connect()
+        self._profile.delay(statements)
+
+    def execute(self, stmt, args=None):
+        self._delay()
+        return self._client.execute(stmt, args)
+
+    def batch(self, stmts):
+        stmts = list(stmts)
+        self._delay(len(stmts))
+        return self._client.batch(stmts)
+
+    def close(self):
+        self._client.close()
+
+
+class AsyncSimulatedLibsqlClient:
+    """SimulatedLibsqlClient over libsql_client's async client."""
+
+    def __init__(self, path, profile):
+        self._client = libsql_client.create_client(url=f'file:{os.path.abspath(path)}')
+        self._profile = profile
+        self._connected = False
+
+    @property
+    def closed(self):
+        return self._client.closed
+
+    async def _delay(self, statements=1):
+        if not self._connected:
+            self._connected = True
+            await self._profile.connect_async()
+        await self._profile.delay_async(statements)
+
+    async def execute(self, stmt, args=None):
+        await self._delay()
+        return await self._client.execute(stmt, args)
+
+    async def batch(self, stmts):
+        stmts = list(stmts)
+        await self._delay(len(stmts))
+        return await self._client.batch(stmts)
+
+    async def close(self):
+        await self._client.close()
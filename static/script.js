@@ -25,6 +25,10 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
     let expenses = flaskData.expenses || [];
+    // Expenses arrive a page at a time; the cursor fetches the next page from /api/expenses.
+    let expensesNextCursor = flaskData.expenses_next_cursor || null;
+    let expenseSearchTerm = '';
+    let expenseSearchTimer = null;
     let activeBudgetEditId = null;
     let activeInlineEdit = null;
 
@@ -229,8 +233,9 @@ document.addEventListener('DOMContentLoaded', function () {
         }
 
         // Payment Method Totals (dynamic, public-friendly)
-        const paymentTotals = {};
-        (data.expenses || []).forEach(exp => {
+        // The server sends totals for the whole month; only the first page of expenses is loaded here.
+        const paymentTotals = { ...(data.payment_type_totals || {}) };
+        (data.payment_type_totals ? [] : (data.expenses || [])).forEach(exp => {
             const raw = (exp.payment_type || 'Unknown').toString().trim() || 'Unknown';
             // Normalise to Title Case so 'CASH', 'cash', 'Cash' all merge into 'Cash'
             const method = raw.charAt(0).toUpperCase() + raw.slice(1).toLowerCase();
@@ -505,7 +510,7 @@ document.addEventListener('DOMContentLoaded', function () {
                 }
 
                 try {
-                    const response = await fetch(`/api/edit_budget/${record.id}`, {
+                    const response = await fetch(withViewMonth(`/api/edit_budget/${record.id}`), {
                         method: 'POST',
                         headers: { 'Content-Type': 'application/json' },
                         body: JSON.stringify({ category, amount })
@@ -515,7 +520,7 @@ document.addEventListener('DOMContentLoaded', function () {
                     if (result.status === 'success') {
                         syncBudgetRecord(result.budget);
                         activeBudgetEditId = null;
-                        await refreshDashboardData(flaskData.active_month);
+                        await applyMutationResult(result);
                         showToast('success', 'Updated!', 'Budget item has been updated successfully.');
                     } else {
                         showToast('error', 'Update Failed', result.message || 'Failed to update budget item.');
@@ -560,6 +565,15 @@ document.addEventListener('DOMContentLoaded', function () {
         li.appendChild(createItemActions('budget', record, listElement));
     }
 
+    // Recurring income / EMI occurrences share their schedule's id, so key them apart from one-off rows.
+    function inlineEditKey(record) {
+        return record.schedule_id ? `schedule-${record.schedule_id}` : record.id;
+    }
+
+    function recurringBadge(record) {
+        return record.schedule_id ? ' <i class="fas fa-redo-alt recurring-badge" title="Recurring"></i>' : '';
+    }
+
     function renderInlineRecordEditor(li, itemType, record) {
         li.classList.add('budget-inline-editing');
 
@@ -619,7 +633,8 @@ document.addEventListener('DOMContentLoaded', function () {
             }
 
             try {
-                const response = await fetch(`/api/edit_${itemType}/${record.id}`, {
+                const editUrl = record.schedule_id ? `/api/edit_schedule/${record.schedule_id}` : `/api/edit_${itemType}/${record.id}`;
+                const response = await fetch(withViewMonth(editUrl), {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8' },
                     body: payload.toString()
@@ -628,8 +643,8 @@ document.addEventListener('DOMContentLoaded', function () {
 
                 if (result.status === 'success') {
                     activeInlineEdit = null;
-                    await refreshDashboardData(flaskData.active_month);
-                    showToast('success', 'Updated!', `${itemType.toUpperCase()} item has been updated successfully.`);
+                    await applyMutationResult(result);
+                    showToast('success', 'Updated!', record.schedule_id ? (result.message || 'Recurring entry updated.') : `${itemType.toUpperCase()} item has been updated successfully.`);
                 } else {
                     showToast('error', 'Update Failed', result.message || `Failed to update ${itemType} item.`);
                 }
@@ -666,6 +681,30 @@ document.addEventListener('DOMContentLoaded', function () {
         }, 0);
     }
 
+    async function stopRecurringRecord(itemType, record) {
+        const label = itemType === 'income' ? 'income' : 'EMI';
+        if (!confirm(`Stop this recurring ${label} from ${flaskData.active_month}? Earlier months keep it.`)) return;
+        try {
+            const payload = new URLSearchParams({ from_month: flaskData.active_month });
+            const response = await fetch(withViewMonth(`/api/delete_schedule/${record.schedule_id}`), {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8' },
+                body: payload.toString()
+            });
+            const result = await response.json();
+            if (result.status === 'success') {
+                activeInlineEdit = null;
+                await applyMutationResult(result);
+                showToast('success', 'Stopped', result.message);
+            } else {
+                showToast('error', 'Delete Failed', result.message || `Failed to stop the recurring ${label}.`);
+            }
+        } catch (error) {
+            console.error(`Failed to stop recurring ${itemType}:`, error);
+            showToast('error', 'Network Error', `An error occurred while stopping the recurring ${label}. Please try again.`);
+        }
+    }
+
     function createItemActions(itemType, record, listElement = null) {
         const actionsDiv = document.createElement('div');
         actionsDiv.className = 'item-actions';
@@ -688,10 +727,10 @@ document.addEventListener('DOMContentLoaded', function () {
             deleteButton.onclick = async () => {
                 if (confirm(`Are you sure you want to delete this budget item?`)) {
                     try {
-                        const response = await fetch(`/api/delete_budget/${record.id}`, { method: 'POST' });
+                        const response = await fetch(withViewMonth(`/api/delete_budget/${record.id}`), { method: 'POST' });
                         const result = await response.json();
                         if (result.status === 'success') {
-                            await refreshDashboardData(flaskData.active_month);
+                            await applyMutationResult(result);
                             showToast('success', 'Deleted!', 'Budget item has been deleted successfully.');
                         } else {
                             showToast('error', 'Delete Failed', result.message || 'Failed to delete budget item.');
@@ -714,7 +753,7 @@ document.addEventListener('DOMContentLoaded', function () {
             editButton.innerHTML = '<i class="fas fa-edit"></i>';
             editButton.onclick = () => {
                 activeBudgetEditId = null;
-                activeInlineEdit = { type: itemType, id: record.id };
+                activeInlineEdit = { type: itemType, id: inlineEditKey(record) };
                 renderAllLists(expenses);
             };
 
@@ -722,13 +761,17 @@ document.addEventListener('DOMContentLoaded', function () {
             deleteButton.className = 'delete-btn';
             deleteButton.innerHTML = '<i class="fas fa-trash"></i>';
             deleteButton.onclick = async () => {
+                if (record.schedule_id) {
+                    await stopRecurringRecord(itemType, record);
+                    return;
+                }
                 if (confirm(`Are you sure you want to delete this ${itemType} item?`)) {
                     try {
-                        const response = await fetch(`/api/delete_${itemType}/${record.id}`, { method: 'POST' });
+                        const response = await fetch(withViewMonth(`/api/delete_${itemType}/${record.id}`), { method: 'POST' });
                         const result = await response.json();
                         if (result.status === 'success') {
                             activeInlineEdit = null;
-                            await refreshDashboardData(flaskData.active_month);
+                            await applyMutationResult(result);
                             showToast('success', 'Deleted!', `${itemType.charAt(0).toUpperCase() + itemType.slice(1)} item has been deleted successfully.`);
                         } else {
                             showToast('error', 'Delete Failed', result.message || `Failed to delete ${itemType} item.`);
@@ -758,10 +801,10 @@ document.addEventListener('DOMContentLoaded', function () {
             deleteButton.onclick = async () => {
                 if (confirm(`Are you sure you want to delete this expense?`)) {
                     try {
-                        const response = await fetch(`/api/delete_expense/${record.id}`, { method: 'POST' });
+                        const response = await fetch(withViewMonth(`/api/delete_expense/${record.id}`), { method: 'POST' });
                         const result = await response.json();
                         if (result.status === 'success') {
-                            await refreshDashboardData(flaskData.active_month);
+                            await applyMutationResult(result);
                             showToast('success', 'Deleted!', 'Expense has been deleted successfully.');
                         } else {
                             showToast('error', 'Delete Failed', result.message || 'Failed to delete expense.');
@@ -789,10 +832,10 @@ document.addEventListener('DOMContentLoaded', function () {
         deleteButton.onclick = async () => {
             if (confirm(`Are you sure you want to delete this ${itemType} item?`)) {
                 try {
-                    const response = await fetch(`/api/delete_${itemType}/${record.id}`, { method: 'POST' });
+                    const response = await fetch(withViewMonth(`/api/delete_${itemType}/${record.id}`), { method: 'POST' });
                     const result = await response.json();
                     if (result.status === 'success') {
-                        await refreshDashboardData(flaskData.active_month);
+                        await applyMutationResult(result);
                         showToast('success', 'Deleted!', `${itemType.charAt(0).toUpperCase() + itemType.slice(1)} item has been deleted successfully.`);
                     } else {
                         showToast('error', 'Delete Failed', result.message || `Failed to delete ${itemType} item.`);
@@ -829,7 +872,7 @@ document.addEventListener('DOMContentLoaded', function () {
                 return;
             }
 
-            if ((itemType === 'income' || itemType === 'emi') && activeInlineEdit && activeInlineEdit.type === itemType && activeInlineEdit.id === record.id) {
+            if ((itemType === 'income' || itemType === 'emi') && activeInlineEdit && activeInlineEdit.type === itemType && activeInlineEdit.id === inlineEditKey(record)) {
                 renderInlineRecordEditor(li, itemType, record);
                 listElement.appendChild(li);
                 return;
@@ -1004,6 +1047,7 @@ document.addEventListener('DOMContentLoaded', function () {
                 descSpan.style.lineHeight = '1.3';
                 descSpan.style.wordWrap = 'break-word';
                 descSpan.textContent = record.description || '(No description)';
+                if (record.schedule_id) descSpan.insertAdjacentHTML('beforeend', recurringBadge(record));
                 leftSide.appendChild(descSpan);
 
                 // Date info
@@ -1085,6 +1129,7 @@ document.addEventListener('DOMContentLoaded', function () {
                 loanSpan.style.lineHeight = '1.3';
                 loanSpan.style.wordWrap = 'break-word';
                 loanSpan.textContent = record.loan_name || '(No name)';
+                if (record.schedule_id) loanSpan.insertAdjacentHTML('beforeend', recurringBadge(record));
                 leftSide.appendChild(loanSpan);
 
                 // Due date info
@@ -1147,12 +1192,13 @@ document.addEventListener('DOMContentLoaded', function () {
             const paymentType = r.payment_type ? `<span class=\"item-payment-type\" style=\"margin-left:8px;\">[${r.payment_type}]</span>` : '';
             return `${r.date} - ${r.category} - ${r.description}${paymentType}: <b>₹${parseFloat(r.amount).toFixed(2)}</b>`;
         };
-        const incomeContent = r => `${r.description}: <b>₹${parseFloat(r.amount).toFixed(2)}</b>`;
-        const emiContent = r => `${r.loan_name}: <b>₹${parseFloat(r.emi_amount).toFixed(2)}</b>`;
+        const incomeContent = r => `${r.description}${recurringBadge(r)}: <b>₹${parseFloat(r.amount).toFixed(2)}</b>`;
+        const emiContent = r => `${r.loan_name}${recurringBadge(r)}: <b>₹${parseFloat(r.emi_amount).toFixed(2)}</b>`;
         const budgetContent = r => `${r.category}: <b>₹${parseFloat(r.amount).toFixed(2)}</b>`;
+        const noExpensesMessage = expenseSearchTerm ? 'No matching expense records.' : 'No expense records for this month.';
 
         // Desktop Lists
-        renderList(document.querySelector('#expenseSectionContentDesktop .expenseList'), expenseData, 'expense', 'No expense records for this month.', expenseContent);
+        renderList(document.querySelector('#expenseSectionContentDesktop .expenseList'), expenseData, 'expense', noExpensesMessage, expenseContent);
         renderList(document.querySelector('#incomeSectionContentDesktop .incomeList'), flaskData.income, 'income', 'No income records for this month.', incomeContent);
         renderList(document.querySelector('#emiSectionContentDesktop .emiList'), flaskData.emis, 'emi', 'No EMI records for this month.', emiContent);
         renderList(document.querySelector('#budgetSectionContentDesktop .budgetList'), flaskData.budgets_list, 'budget', 'No budget records for this month.', budgetContent);
@@ -1162,10 +1208,69 @@ document.addEventListener('DOMContentLoaded', function () {
         const mobileIncomeList = document.querySelector('#income-content-mobile .incomeList');
         const mobileEmiList = document.querySelector('#emi-content-mobile .emiList');
         const mobileBudgetList = document.querySelector('#budget-content-mobile .budgetList');
-        renderList(mobileExpenseList, expenseData, 'expense', 'No expense records for this month.', expenseContent);
+        renderList(mobileExpenseList, expenseData, 'expense', noExpensesMessage, expenseContent);
         renderList(mobileIncomeList, flaskData.income, 'income', 'No income records for this month.', incomeContent);
         renderList(mobileEmiList, flaskData.emis, 'emi', 'No EMI records for this month.', emiContent);
         renderList(mobileBudgetList, flaskData.budgets_list, 'budget', 'No budget records for this month.', budgetContent);
+
+        renderExpenseLoadMore(document.querySelector('#expenseSectionContentDesktop .expenseList'));
+        renderExpenseLoadMore(mobileExpenseList);
+    }
+
+    function renderExpenseLoadMore(listElement) {
+        if (!listElement) return;
+        let button = listElement.nextElementSibling;
+        if (!button || !button.classList.contains('load-more-expenses')) {
+            button = document.createElement('button');
+            button.type = 'button';
+            button.className = 'load-more-expenses';
+            button.addEventListener('click', loadMoreExpenses);
+            listElement.after(button);
+        }
+        button.style.display = expensesNextCursor ? '' : 'none';
+        button.disabled = false;
+        button.textContent = 'Load more expenses';
+    }
+
+    async function fetchExpensePage(cursor) {
+        const params = new URLSearchParams({ month_select: flaskData.active_month });
+        if (cursor) params.set('cursor', cursor);
+        if (expenseSearchTerm) params.set('q', expenseSearchTerm);
+        const response = await fetch(`/api/expenses?${params.toString()}`);
+        if (!response.ok) throw new Error(`API error: ${response.status}`);
+        return response.json();
+    }
+
+    async function loadMoreExpenses(event) {
+        if (!expensesNextCursor) return;
+        event.currentTarget.disabled = true;
+        event.currentTarget.textContent = 'Loading...';
+        try {
+            const page = await fetchExpensePage(expensesNextCursor);
+            expenses = expenses.concat(page.expenses || []);
+            expensesNextCursor = page.next_cursor || null;
+        } catch (error) {
+            console.error('Failed to load more expenses:', error);
+            showToast('error', 'Network Error', 'Could not load more expenses. Please try again.');
+        }
+        renderAllLists(expenses);
+    }
+
+    async function searchExpenses(searchTerm) {
+        expenseSearchTerm = searchTerm;
+        try {
+            const page = await fetchExpensePage(null);
+            if (searchTerm !== expenseSearchTerm) return; // A newer search has started
+            expenses = page.expenses || [];
+            expensesNextCursor = page.next_cursor || null;
+            renderAllLists(expenses);
+            document.querySelectorAll('.searchTotal').forEach(searchTotalEl => {
+                searchTotalEl.textContent = searchTerm ? `Total: ₹${parseFloat(page.matching_total || 0).toFixed(2)}` : '';
+            });
+        } catch (error) {
+            console.error('Failed to search expenses:', error);
+            showToast('error', 'Network Error', 'Could not search expenses. Please try again.');
+        }
     }
 
 
@@ -1191,6 +1296,8 @@ document.addEventListener('DOMContentLoaded', function () {
             flaskData = data; // Update global data object
             flaskData.active_month = monthToRefresh; // Ensure active_month is set to the requested month
             expenses = data.expenses || [];
+            expensesNextCursor = data.expenses_next_cursor || null;
+            expenseSearchTerm = '';
             // Ensure income and emis are always arrays for mobile/desktop lists
             flaskData.income = data.income || [];
             flaskData.emis = data.emis || [];
@@ -1226,10 +1333,131 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     }
 
+    // --- DELTA SYNC ---
+    // Mutation endpoints called with view_month answer with a delta of that month
+    // (changed expenses, income / EMI lists, the month summary), and
+    // /api/changes returns the delta of writes made elsewhere since
+    // flaskData.changes_version. Applying one replaces a full refreshDashboardData.
+    function withViewMonth(url) {
+        const params = new URLSearchParams({ view_month: flaskData.active_month });
+        if (flaskData.changes_version != null) params.set('since', flaskData.changes_version);
+        return `${url}${url.includes('?') ? '&' : '?'}${params.toString()}`;
+    }
+
+    function compareExpenses(a, b) {
+        // Newest first, the order of /api/report_data and /api/expenses.
+        if (a.date !== b.date) return a.date < b.date ? 1 : -1;
+        return b.id - a.id;
+    }
+
+    function applyExpenseChanges(changes) {
+        const dropped = new Set([...(changes.deleted || []), ...(changes.upserted || []).map(expense => expense.id)]);
+        const lastLoaded = expenses[expenses.length - 1];
+        // Rows that sort after the last loaded expense arrive with a later page.
+        const inLoadedRange = expense => !expensesNextCursor || !lastLoaded || compareExpenses(expense, lastLoaded) <= 0;
+        expenses = expenses.filter(expense => !dropped.has(expense.id))
+            .concat((changes.upserted || []).filter(inLoadedRange))
+            .sort(compareExpenses);
+    }
+
+    async function applyDelta(delta) {
+        if (!delta || delta.month !== flaskData.active_month) return;
+        if (delta.expenses && !expenseSearchTerm) applyExpenseChanges(delta.expenses);
+        if (delta.income) flaskData.income = delta.income;
+        if (delta.emis) flaskData.emis = delta.emis;
+        Object.assign(flaskData, delta.summary);
+        flaskData.expenses = expenses;
+
+        renderAllDashboards();
+        renderAllLists(expenses);
+        updateBudgetForms(flaskData.budget || {});
+        if (delta.expenses && expenseSearchTerm) await searchExpenses(expenseSearchTerm);
+        if (delta.weekly_budgets_stale) await loadWeeklyBudgets(flaskData.active_month);
+    }
+
+    // Applies a mutation's delta, or reloads `month` when the response has none for it.
+    // The response's version, when present, moves the change feed past this write.
+    async function applyMutationResult(result, month = flaskData.active_month) {
+        if (result.delta && result.delta.month === month && month === flaskData.active_month) {
+            if (result.version != null) flaskData.changes_version = result.version;
+            await applyDelta(result.delta);
+        } else {
+            await refreshDashboardData(month);
+        }
+    }
+
+    let changesPoll = null;
+
+    // Picks up writes made in other tabs or on other devices.
+    function pollChanges() {
+        if (changesPoll || document.hidden || flaskData.changes_version == null || !flaskData.active_month) return;
+        const month = flaskData.active_month;
+        const params = new URLSearchParams({ month, since: flaskData.changes_version });
+        changesPoll = fetch(`/api/changes?${params.toString()}`)
+            .then(response => {
+                if (!response.ok) throw new Error(`API error: ${response.status}`);
+                return response.json();
+            })
+            .then(async result => {
+                if (month !== flaskData.active_month) return; // The month changed meanwhile
+                if (result.status === 'reset') {
+                    await refreshDashboardData(month);
+                } else if (result.status === 'success') {
+                    flaskData.changes_version = result.version;
+                    await applyDelta(result.delta);
+                }
+            })
+            .catch(error => console.error('Failed to fetch changes:', error))
+            .finally(() => { changesPoll = null; });
+    }
+
+    document.addEventListener('visibilitychange', () => {
+        if (!document.hidden) pollChanges();
+    });
+    window.addEventListener('focus', pollChanges);
+
+    // --- PDF REPORT ---
+    // The PDF is rendered by a background job; poll its status, then download it.
+    async function downloadPdfReport(button) {
+        const originalHtml = button.innerHTML;
+        button.disabled = true;
+        button.textContent = 'Preparing PDF...';
+        try {
+            const response = await fetch('/api/reports/pdf', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ month: flaskData.active_month })
+            });
+            let job = await response.json();
+            if (!response.ok) throw new Error(job.message || `API error: ${response.status}`);
+
+            const deadline = Date.now() + 120000;
+            while (job.state === 'queued' || job.state === 'running') {
+                if (Date.now() > deadline) throw new Error('The PDF report is taking too long. Please try again.');
+                await new Promise(resolve => setTimeout(resolve, 1500));
+                const statusResponse = await fetch(job.status_url);
+                job = await statusResponse.json();
+                if (!statusResponse.ok) throw new Error(job.message || `API error: ${statusResponse.status}`);
+            }
+            if (job.state !== 'done') throw new Error(job.message || 'The PDF report could not be generated.');
+            window.location.href = job.download_url;
+        } catch (error) {
+            console.error('Failed to generate PDF report:', error);
+            showToast('error', 'PDF Report', getSafeErrorMessage(error, 'The PDF report could not be generated.'));
+        } finally {
+            button.disabled = false;
+            button.innerHTML = originalHtml;
+        }
+    }
+
     // --- EVENT LISTENERS SETUP ---
     function setupEventListeners() {
         console.log("Setting up event listeners...");
 
+        document.querySelectorAll('.download-pdf-btn').forEach(button => {
+            button.addEventListener('click', () => downloadPdfReport(button));
+        });
+
         // Desktop Tabs
         document.querySelectorAll('#desktop-view .tab-button').forEach(button => {
             button.addEventListener('click', function () {
@@ -1256,37 +1484,10 @@ document.addEventListener('DOMContentLoaded', function () {
                 }
             }
             searchBox.addEventListener('input', (e) => {
-                const searchTerm = (e.target.value || '').toLowerCase();
-                const filteredExpenses = expenses.filter(exp => {
-                    return searchTerm === '' ||
-                           (exp.description || '').toLowerCase().includes(searchTerm) ||
-                           (exp.category || '').toLowerCase().includes(searchTerm) ||
-                           (exp.payment_type || '').toLowerCase().includes(searchTerm);
-                });
-
-                // Calculate the total of filtered expenses
-                const filteredTotal = filteredExpenses.reduce((total, exp) => total + parseFloat(exp.amount), 0);
-
-                // Find the list and total span within the same view (desktop or mobile) as the search box
-                const viewContainer = e.target.closest('#desktop-view, #mobile-view');
-                const expenseList = viewContainer.querySelector('.expenseList');
-                const searchTotalEl = viewContainer.querySelector('.searchTotal');
-
-                // Use the same format as normal expense display (with payment type)
-                const expenseSearchContent = r => {
-                    const paymentType = r.payment_type ? `<span class=\"item-payment-type\" style=\"margin-left:8px;\">[${r.payment_type}]</span>` : '';
-                    return `${r.date} - ${r.category} - ${r.description}${paymentType}: <b>₹${parseFloat(r.amount).toFixed(2)}</b>`;
-                };
-                renderList(expenseList, filteredExpenses, 'expense', 'No matching expense records.', expenseSearchContent);
-                
-                if (searchTotalEl) {
-                    if (searchTerm) {
-                        searchTotalEl.textContent = `Total: ₹${filteredTotal.toFixed(2)}`;
-                    } else {
-                        searchTotalEl.textContent = '';
-                    }
-                }
-                
+                // Search runs on the server so it covers every expense of the month, not just loaded pages
+                const searchTerm = (e.target.value || '').trim().toLowerCase();
+                clearTimeout(expenseSearchTimer);
+                expenseSearchTimer = setTimeout(() => searchExpenses(searchTerm), 250);
                 toggleClearBtn();
             });
             // Initial state
@@ -1374,7 +1575,7 @@ document.addEventListener('DOMContentLoaded', function () {
                 const formData = new FormData(form);
 
                 try {
-                    const response = await fetch(endpoint, { method: 'POST', body: formData });
+                    const response = await fetch(withViewMonth(endpoint), { method: 'POST', body: formData });
                     if (!response.ok) {
                         let errorMessage = `Request failed with status ${response.status}.`;
                         const contentType = response.headers.get('content-type') || '';
@@ -1398,7 +1599,7 @@ document.addEventListener('DOMContentLoaded', function () {
 
                     if (result.status === 'success') {
                         if (form.id.startsWith('add') || action === 'setBudget') form.reset();
-                        await refreshDashboardData(selectedMonth);
+                        await applyMutationResult(result, selectedMonth);
                         if (form.closest('#mobile-view')) {
                             switchPane('#dashboard-content-mobile', 'mobile');
                         }
@@ -1750,7 +1951,7 @@ document.addEventListener('DOMContentLoaded', function () {
 
             try {
                 const formData = new FormData(fabQuickForm);
-                const response = await fetch('/api/add_expense', {
+                const response = await fetch(withViewMonth('/api/add_expense'), {
                     method: 'POST',
                     body: formData
                 });
@@ -1779,9 +1980,9 @@ document.addEventListener('DOMContentLoaded', function () {
                     // Close modal
                     closeFABModal();
                     
-                    // Refresh dashboard data
+                    // Apply the new expense, or load the month it was added to
                     const currentMonth = formData.get('month_select');
-                    await refreshDashboardData(currentMonth);
+                    await applyMutationResult(result, currentMonth);
                     
                 } else {
                     // Show error toast
@@ -1846,7 +2047,7 @@ document.addEventListener('DOMContentLoaded', function () {
                 if (result.status === 'success') {
                     showToast('success', 'Expense Updated!', 'Your expense has been updated successfully.');
                     closeModal();
-                    await refreshDashboardData(flaskData.active_month);
+                    await applyMutationResult(result);
                 } else {
                     showToast('error', 'Update Failed', result.message || 'Failed to update expense.');
                 }
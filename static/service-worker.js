@@ -1,4 +1,4 @@
-const CACHE_NAME = 'budget-planner-cache-v3.4';
+const CACHE_NAME = 'budget-planner-cache-v3.7';
 const urlsToCache = [
   '/static/style.css',
   '/static/script.js',
@@ -7,6 +7,10 @@ const urlsToCache = [
   '/static/icon-512x512.png',
   '/static/icon-192x192-round.png'
 ];
+// Month data the service worker keeps and revalidates with If-None-Match, so
+// an unchanged month costs the server a version lookup and an empty 304.
+const API_CACHE_NAME = 'budget-planner-api-v1';
+const REVALIDATED_API_PATHS = ['/api/report_data', '/api/weekly_budget'];
 
 self.addEventListener('install', event => {
   event.waitUntil(
@@ -20,7 +24,7 @@ self.addEventListener('install', event => {
 });
 
 self.addEventListener('activate', event => {
-  const cacheWhitelist = [CACHE_NAME];
+  const cacheWhitelist = [CACHE_NAME, API_CACHE_NAME];
   event.waitUntil(
     caches.keys().then(cacheNames => {
       return Promise.all(
@@ -47,11 +51,21 @@ self.addEventListener('fetch', event => {
     return;
   }
 
+  if (REVALIDATED_API_PATHS.includes(url.pathname)) {
+    event.respondWith(revalidate(request));
+    return;
+  }
+
   if (url.pathname.startsWith('/api/')) {
     event.respondWith(fetch(request));
     return;
   }
 
+  if (url.pathname === '/logout') {
+    // The next user of this browser must not be handed the last one's months.
+    event.waitUntil(caches.delete(API_CACHE_NAME));
+  }
+
   if (url.pathname.startsWith('/static/')) {
     event.respondWith(
       fetch(request)
@@ -82,3 +96,26 @@ self.addEventListener('fetch', event => {
     caches.match(request).then(response => response || fetch(request))
   );
 });
+
+function revalidate(request) {
+  return caches.open(API_CACHE_NAME).then(cache =>
+    cache.match(request).then(cached => {
+      const headers = new Headers(request.headers);
+      const etag = cached && cached.headers.get('ETag');
+      if (etag) {
+        headers.set('If-None-Match', etag);
+      }
+      return fetch(request.url, { headers, credentials: 'same-origin', cache: 'no-store' }).then(response => {
+        if (response.status === 304 && cached) {
+          return cached;
+        }
+        if (response.ok && response.headers.get('ETag')) {
+          cache.put(request, response.clone());
+        } else if (cached) {
+          cache.delete(request);
+        }
+        return response;
+      });
+    })
+  );
+}
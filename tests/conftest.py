@@ -0,0 +1,52 @@
+"""
+Shared fixtures: one app per test session, serving a throwaway SQLite database.
+
+app.py keeps its database in the working directory and builds its connection
+pool and dashboard cache on first use, so the session imports it once from a
+temporary directory; tests keep apart by logging in as their own users.
+"""
+import logging
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+# Database round-trips of each request, in order; see the round_trips fixture.
+_round_trips = []
+
+
+@pytest.fixture(scope='session')
+def workdir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp('app'))
+
+
+@pytest.fixture(scope='session')
+def app_module(workdir):
+    os.environ.pop('TURSO_DATABASE_URL', None)
+    os.environ['DASHBOARD_CACHE_PATH'] = os.path.join(workdir, 'cache.db')
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    import app
+    from flask import g
+    app.app.logger.setLevel(logging.ERROR)
+    app.init_db()
+
+    # Flask refuses new hooks once the app has served a request, so register it up front.
+    @app.app.after_request
+    def record_round_trips(response):
+        db = getattr(g, '_database', None)
+        _round_trips.append(db.round_trips if db is not None else 0)
+        return response
+
+    yield app
+    os.chdir(previous_cwd)
+
+
+@pytest.fixture
+def round_trips(app_module):
+    """DbWrapper.round_trips of every request so far, appended as each one ends."""
+    return _round_trips
@@ -0,0 +1,102 @@
+import os
+import random
+
+import pytest
+
+from check_conditional_get import ENDPOINTS, MAX_NOT_MODIFIED_ROUND_TRIPS
+from load_test import PASSWORD, seed
+
+
+@pytest.fixture(scope='module')
+def seeded(app_module, workdir):
+    """(client, other user's client, month, other month) over a seeded database."""
+    usernames, months = seed(os.path.join(workdir, app_module.DATABASE), 2, 4, 100, random.Random(1))
+    clients = []
+    for username in usernames:
+        client = app_module.app.test_client()
+        client.post('/login', data={'username': username, 'password': PASSWORD})
+        clients.append(client)
+    return clients[0], clients[1], months[1], months[3]
+
+
+def get(client, endpoint, month, etag=None):
+    return client.get(ENDPOINTS[endpoint].format(month=month), headers={'If-None-Match': etag} if etag else {})
+
+
+def assert_ok(response):
+    assert response.status_code == 200
+    assert response.headers.get('ETag', '').startswith('"')
+    assert response.get_data()
+
+
+def assert_not_modified(response, endpoint, round_trips):
+    assert response.status_code == 304
+    assert not response.get_data()
+    assert round_trips[-1] <= MAX_NOT_MODIFIED_ROUND_TRIPS[endpoint]
+
+
+def add_expense(client, month, amount, category='Dining'):
+    client.post('/api/add_expense', data={'month_select': month, 'date': f'{month}-10', 'category': category,
+                                          'description': 'conditional get check', 'amount': str(amount),
+                                          'payment_type': 'Card'})
+
+
+@pytest.mark.parametrize('endpoint', list(ENDPOINTS))
+def test_revalidation(seeded, round_trips, endpoint):
+    client, other_user, month, other_month = seeded
+    first = get(client, endpoint, month)
+    assert_ok(first)
+    etag = first.headers['ETag']
+    assert_not_modified(get(client, endpoint, month, etag), endpoint, round_trips)
+    assert_not_modified(get(client, endpoint, month, f'W/{etag}'), endpoint, round_trips)
+    assert_ok(get(other_user, endpoint, month, etag))
+
+    if endpoint == 'weekly_budget':
+        client.post('/api/weekly_budget/set', json={'month': month, 'week_index': 0, 'base_budget': 123})
+    else:
+        add_expense(client, month, 250)
+    changed = get(client, endpoint, month, etag)
+    assert_ok(changed)
+    assert changed.headers['ETag'] != etag
+    etag = changed.headers['ETag']
+    assert_not_modified(get(client, endpoint, month, etag), endpoint, round_trips)
+
+    # The weekly budget cycle of a month can reach into its neighbours, so skip one.
+    add_expense(client, other_month, 75)
+    assert_not_modified(get(client, endpoint, month, etag), endpoint, round_trips)
+
+
+def test_workers_with_their_own_caches_revalidate_against_the_database(app_module, seeded):
+    client, _, month, _ = seeded
+    caches = {name: app_module.DashboardCache(app_module.MemoryCacheStore()) for name in ('A', 'B', 'fresh')}
+
+    def on(worker):
+        app_module._dashboard_cache = caches[worker]
+        return client
+
+    def assert_current(response):
+        # What a worker with an empty cache reads from the database.
+        caches['fresh'] = app_module.DashboardCache(app_module.MemoryCacheStore())
+        fresh = get(on('fresh'), 'report_data', month)
+        data, expected = response.get_json() or {}, fresh.get_json()
+        for payload in (data, expected):
+            payload.pop('changes_version', None)
+        assert response.status_code == 200
+        assert data == expected
+        assert response.headers.get('ETag') == fresh.headers['ETag']
+        return response.headers['ETag']
+
+    def failing_bump(keys):
+        raise RuntimeError('cache store unavailable')
+
+    try:
+        etag = get(on('B'), 'report_data', month).headers['ETag']
+        add_expense(on('A'), month, 333, category='Travel')
+        etag = assert_current(get(on('B'), 'report_data', month, etag))
+        assert get(on('B'), 'report_data', month, etag).status_code == 304
+
+        caches['A'].store.bump_versions = failing_bump
+        add_expense(on('A'), month, 444, category='Travel')
+        assert_current(get(on('B'), 'report_data', month, etag))
+    finally:
+        app_module._dashboard_cache = None
@@ -0,0 +1,33 @@
+import json
+import random
+import subprocess
+import sys
+
+import pytest
+
+import bench_export
+
+ROWS = 200000
+MONTHS = 12
+MAX_RSS_GROWTH_MB = 64
+
+
+@pytest.fixture(scope='module')
+def exported_user(app_module, workdir):
+    """(user id, months) of a user with ROWS expenses, seeded into the session database."""
+    return bench_export.seed(workdir, ROWS, MONTHS, random.Random(1))
+
+
+@pytest.mark.parametrize('shape, export_format', bench_export.CASES)
+def test_export_memory_stays_flat(workdir, exported_user, shape, export_format):
+    user_id, months = exported_user
+    # A fresh process per export, so its peak RSS is this export's alone.
+    output = subprocess.run(
+        [sys.executable, bench_export.__file__, '--child', workdir, str(user_id), shape, export_format,
+         months[0], months[-1]],
+        check=True, capture_output=True, text=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    assert result['peak_mb'] - result['baseline_mb'] <= MAX_RSS_GROWTH_MB
+    if shape == 'ledger' and export_format == 'csv':
+        assert result['csv_rows'] == ROWS
@@ -0,0 +1,4 @@
+def test_hot_path_queries_use_an_index(app_module):
+    with app_module.app.app_context():
+        scans = app_module.check_query_plans(app_module.get_db())
+    assert scans == {}, f'hot-path queries scanning a whole table: {scans}'
@@ -0,0 +1,51 @@
+import pytest
+
+from check_round_trips import CATEGORIES, MAX_BUDGET_SAVE_ROUND_TRIPS
+
+
+@pytest.fixture(scope='module')
+def client(app_module):
+    client = app_module.app.test_client()
+    client.post('/register', data={'username': 'roundtrips', 'password': 'Passw0rdX', 'confirmPassword': 'Passw0rdX'})
+    client.post('/login', data={'username': 'roundtrips', 'password': 'Passw0rdX'})
+    return client
+
+
+def months_from(start_month, count):
+    year, month = map(int, start_month.split('-'))
+    return [f'{year + (month - 1 + i) // 12}-{(month - 1 + i) % 12 + 1:02d}' for i in range(count)]
+
+
+def budget_amounts(app_module, months):
+    with app_module.app.app_context():
+        db = app_module.get_db()
+        placeholders = ', '.join('?' for _ in months)
+        rows = db.fetchall(db.execute(
+            f'''SELECT month, category, amount FROM budgets
+                WHERE user_id = (SELECT id FROM users WHERE username = 'roundtrips') AND month IN ({placeholders})''',
+            months
+        ))
+    return {(row['month'], row['category']): row['amount'] for row in rows}
+
+
+def assert_budget_save(app_module, client, round_trips, path, data, expected_grid):
+    response = client.post(path, data=data)
+    assert response.status_code == 200, response.get_data(as_text=True)[:200]
+    assert round_trips[-1] <= MAX_BUDGET_SAVE_ROUND_TRIPS
+    saved = budget_amounts(app_module, sorted({month for month, _ in expected_grid}))
+    assert {key: saved.get(key) for key in expected_grid} == expected_grid
+
+
+def test_set_budget(app_module, client, round_trips):
+    assert_budget_save(app_module, client, round_trips, '/api/set_budget',
+                       {'month_select': '2026-01', 'category': 'Rent', 'amount': '900'},
+                       {('2026-01', 'Rent'): 900.0})
+
+
+@pytest.mark.parametrize('categories, horizon, amount', [(1, 1, 100.0), (12, 3, 250.5), (12, 12, 300.0), (12, 24, 125.25)])
+def test_set_budgets_costs_the_same_round_trips_at_any_size(app_module, client, round_trips, categories, horizon, amount):
+    names = CATEGORIES[:categories]
+    assert_budget_save(app_module, client, round_trips, '/api/set_budgets',
+                       {'month_select': '2026-02', 'horizon_months': str(horizon),
+                        'budget_category[]': names, 'budget_amount[]': [str(amount)] * categories},
+                       {(month, name): amount for month in months_from('2026-02', horizon) for name in names})